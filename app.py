@@ -1,24 +1,154 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
 from datetime import datetime, timedelta, date
 import os
 from typing import List, Dict, Any
 import json
+import io
+from functools import lru_cache
+from itertools import islice
+import hashlib
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 from data_processor import DataProcessor
 from expense_categorizer import ExpenseCategorizer
-from vector_store import VectorStore
-from conversation_handler import ConversationHandler
-from visualizations import FinanceVisualizer
-from utils import format_currency, validate_file
-from financial_health import FinancialHealthAnalyzer
-from predictive_analytics import PredictiveAnalytics
-from smart_alerts import SmartAlertsSystem
-from goal_tracker import GoalTracker
-from financial_calendar import FinancialCalendar
+from utils import format_currency, pandas_fingerprint, validate_file
+
+# HTML templates for repeated card layouts
+CARD_ROW_TPL = "<div style='display: flex; gap: 10px;'>{cards}</div>"
+
+FEATURE_CARD_TPL = (
+    "<div style='flex: 1; text-align: center; padding: 20px; border: 2px solid #667eea; border-radius: 10px; margin: 10px;'>"
+    "<h3>{icon}</h3><h4>{title}</h4><p>{body}</p>"
+    "</div>"
+)
+
+KPI_CARD_TPL = (
+    "<div style='flex: 1; background: {background}; padding: 20px; border-radius: 10px; text-align: center; margin: 5px;'>"
+    "<h3 style='color: white; margin: 0;'>{icon}</h3>"
+    "<h2 style='color: white; margin: 10px 0;'>{value}</h2>"
+    "<p style='color: white; margin: 0; opacity: 0.9;'>{label}</p>"
+    "</div>"
+)
+
+SECTION_CARD_TPL = (
+    "<div style='background: white; border: 1px solid #e0e0e0; border-radius: 10px; padding: 20px; margin: 10px 0; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>"
+    "<h4 style='color: {color}; margin-top: 0;'>{title}</h4>"
+    "</div>"
+)
+
+ALERT_ITEM_TPL = (
+    "<div style='background: {background}; border-left: 4px solid {border}; padding: 15px; margin: 10px 0; border-radius: 5px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>"
+    "<p style='margin: 0; color: #333; font-weight: 500;'>{message}</p>"
+    "</div>"
+)
+
+BUDGET_ITEM_TPL = (
+    "<div style='background: #f8f9fa; border: 1px solid #e9ecef; padding: 10px; margin: 5px 0; border-radius: 5px; display: flex; justify-content: space-between;'>"
+    "<span style='font-weight: 500;'>{category}</span>"
+    "<span style='color: #43a047; font-weight: bold;'>{amount}</span>"
+    "</div>"
+)
+
+TIP_ITEM_TPL = (
+    "<div style='background: #f1f8e9; border-left: 4px solid #43a047; padding: 15px; margin: 10px 0; border-radius: 5px;'>"
+    "<p style='margin: 0; color: #333;'>{tip}</p>"
+    "</div>"
+)
+
+# Static welcome screen sections
+WELCOME_HTML = """
+<div style='text-align: center; padding: 50px 20px; margin: 50px 0;'>
+    <h1 style='color: #667eea; font-size: 4em; margin: 0; font-weight: 300;'>🚀 AI FinancePilot</h1>
+    <h2 style='color: #764ba2; margin: 30px 0; font-weight: 300; font-size: 2em;'>Your Intelligent Financial Co-Pilot</h2>
+    <p style='color: #666; font-size: 1.4em; margin: 40px 0; max-width: 800px; margin-left: auto; margin-right: auto; line-height: 1.6;'>
+        Transform your financial data into actionable insights with revolutionary AI-powered analytics
+    </p>
+</div>
+"""
+
+GET_STARTED_HTML = """
+<div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; border-radius: 15px; margin: 40px 0; text-align: center;'>
+    <h3 style='margin: 0 0 20px 0; font-size: 1.8em;'>👆 Get Started</h3>
+    <p style='margin: 0; opacity: 0.9; font-size: 1.2em;'>Upload your bank statement using the sidebar to unlock powerful financial insights</p>
+</div>
+"""
+
+REQUIREMENTS_HTML = """
+<div style='background: white; border: 1px solid #e0e0e0; border-radius: 15px; padding: 25px; margin: 20px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
+    <h4 style='color: #667eea; margin-top: 0;'>📋 File Requirements</h4>
+    <p style='margin: 0; color: #333;'>Your CSV/Excel file should contain:</p>
+    <ul style='color: #666; margin: 15px 0;'>
+        <li><strong>Date</strong> column (transaction dates)</li>
+        <li><strong>Description</strong> column (transaction details)</li>
+        <li><strong>Amount</strong> column (transaction amounts)</li>
+    </ul>
+</div>
+"""
+
+FEATURES_HTML = """
+<div style='background: white; border: 1px solid #e0e0e0; border-radius: 15px; padding: 25px; margin: 20px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
+    <h4 style='color: #43a047; margin-top: 0;'>🎯 What You Can Do</h4>
+    <ul style='color: #666; margin: 15px 0;'>
+        <li>🤖 <strong>AI Chat</strong>: Natural language queries</li>
+        <li>📊 <strong>Analytics</strong>: Beautiful charts & insights</li>
+        <li>🏥 <strong>Health Score</strong>: Financial wellness rating</li>
+        <li>🔮 <strong>Predictions</strong>: Future spending forecasts</li>
+        <li>🚨 <strong>Smart Alerts</strong>: Proactive notifications</li>
+        <li>🎯 <strong>Goals</strong>: Savings strategy recommendations</li>
+    </ul>
+</div>
+"""
+
+EXAMPLES_HTML = """
+<div style='background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%); color: white; padding: 25px; border-radius: 15px; margin: 30px 0;'>
+    <h4 style='margin: 0 0 20px 0; text-align: center;'>💬 Example Questions You Can Ask</h4>
+    <div style='display: grid; grid-template-columns: 1fr 1fr; gap: 15px; margin: 0;'>
+        <div style='background: rgba(255,255,255,0.1); padding: 15px; border-radius: 8px;'>
+            <p style='margin: 0; opacity: 0.9;'>"How much did I spend on food last month?"</p>
+        </div>
+        <div style='background: rgba(255,255,255,0.1); padding: 15px; border-radius: 8px;'>
+            <p style='margin: 0; opacity: 0.9;'>"What's my biggest expense category?"</p>
+        </div>
+        <div style='background: rgba(255,255,255,0.1); padding: 15px; border-radius: 8px;'>
+            <p style='margin: 0; opacity: 0.9;'>"Show me my travel expenses for the last 6 months"</p>
+        </div>
+        <div style='background: rgba(255,255,255,0.1); padding: 15px; border-radius: 8px;'>
+            <p style='margin: 0; opacity: 0.9;'>"How does my spending compare to last year?"</p>
+        </div>
+    </div>
+</div>
+"""
+
+# Calendar tab selector options
+CALENDAR_YEARS = tuple(range(2020, 2030))
+CALENDAR_MONTHS = tuple(range(1, 13))
+
+# Plotly config for summary charts that need no hover/zoom handlers
+STATIC_CHART_CONFIG = {'staticPlot': True, 'displayModeBar': False}
+
+# Alert card colors by severity
+ALERT_BACKGROUNDS = {'high': '#ffebee', 'medium': '#fff3e0', 'low': '#e3f2fd'}
+ALERT_BORDERS = {'high': '#f44336', 'medium': '#ff9800', 'low': '#2196f3'}
+
+@lru_cache(maxsize=128)
+def _card_row_html(template: str, cards: tuple) -> str:
+    """Render a row of cards into a single HTML block; cards are tuples of (field, value) pairs."""
+    return CARD_ROW_TPL.format(cards=''.join(template.format(**dict(card)) for card in cards))
+
+def render_card_row(template: str, cards: List[Dict[str, Any]]):
+    """Emit a whole row of cards with one markdown call."""
+    st.markdown(_card_row_html(template, tuple(tuple(card.items()) for card in cards)), unsafe_allow_html=True)
+
+def render_items(template: str, items: List[Dict[str, Any]]):
+    """Emit a vertical list of cards with one markdown call."""
+    st.markdown(''.join(template.format(**item) for item in items), unsafe_allow_html=True)
+
+def render_section_card(title: str, color: str):
+    """Emit a white section header card."""
+    st.markdown(SECTION_CARD_TPL.format(title=title, color=color), unsafe_allow_html=True)
 
 # Configure Streamlit page
 st.set_page_config(
@@ -28,36 +158,551 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Shared, stateless analysis components (one instance across all sessions)
+@st.cache_resource
+def get_data_processor() -> DataProcessor:
+    return DataProcessor()
+
+@st.cache_resource
+def get_categorizer() -> ExpenseCategorizer:
+    return ExpenseCategorizer()
+
+# The analysis modules below are imported on first use, so a session that has
+# not uploaded data yet never loads them (or plotly, which several pull in)
+@st.cache_resource
+def get_visualizer():
+    from visualizations import FinanceVisualizer
+    return FinanceVisualizer()
+
+@st.cache_resource
+def get_health_analyzer():
+    from financial_health import FinancialHealthAnalyzer
+    return FinancialHealthAnalyzer()
+
+@st.cache_resource
+def get_predictive_analytics():
+    from predictive_analytics import PredictiveAnalytics
+    return PredictiveAnalytics()
+
+@st.cache_resource
+def get_smart_alerts():
+    from smart_alerts import SmartAlertsSystem
+    return SmartAlertsSystem()
+
+@st.cache_resource
+def get_goal_tracker():
+    from goal_tracker import GoalTracker
+    return GoalTracker()
+
+@st.cache_resource
+def get_financial_calendar():
+    from financial_calendar import FinancialCalendar
+    return FinancialCalendar()
+
+# Vectorized content fingerprints for pandas arguments of cached functions,
+# used instead of Streamlit's default pickle-based hashing
+_DF_HASH = {
+    pd.DataFrame: pandas_fingerprint,
+    pd.Series: pandas_fingerprint
+}
+
+@st.cache_data(show_spinner=False, max_entries=8, ttl=3600)
+def _load_and_categorize(file_bytes: bytes, filename: str) -> pd.DataFrame:
+    """Parse and categorize an uploaded file, cached on its raw bytes."""
+    buffer = io.BytesIO(file_bytes)
+    buffer.name = filename
+    
+    df = get_data_processor().load_file(buffer)
+    if df is None:
+        return None
+    
+    df_categorized = get_categorizer().categorize_transactions(df)
+    
+    # Canonical order is newest first, so recent-activity views are plain positional slices
+    return df_categorized.sort_values('date', ascending=False, ignore_index=True)
+
+@st.cache_resource
+def _get_ingest_executor() -> ThreadPoolExecutor:
+    """Worker pool used to embed uploaded transactions off the script thread."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="vector-ingest")
+
+def _session_vector_store():
+    """This session's vector store, kept in session state; later uploads update its collection incrementally.
+    
+    The store deletes its collection once the session's state is discarded.
+    """
+    vector_store = st.session_state.vector_store
+    if vector_store is not None and vector_store.collection is not None:
+        return vector_store
+    
+    # Imported lazily so chromadb only loads once a file has been uploaded
+    from vector_store import VectorStore
+    
+    if vector_store is not None:
+        vector_store.drop()
+    vector_store = VectorStore(collection_name=f"financial_transactions_{uuid.uuid4().hex[:16]}")
+    st.session_state.vector_store = vector_store
+    return vector_store
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH)
+def _compute_health(df: pd.DataFrame) -> Dict[str, Any]:
+    """Financial health score for a dataset."""
+    return get_health_analyzer().calculate_health_score(df)
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH)
+def _compute_alerts(df: pd.DataFrame, budgets: tuple, today: date) -> List[Dict[str, Any]]:
+    """Smart alerts for a dataset; budgets are passed as a sorted items tuple.
+    
+    Alerts depend on the current month and day, so today is part of the cache key.
+    """
+    return get_smart_alerts().generate_alerts(df, dict(budgets))
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH)
+def _compute_alert_summary(df: pd.DataFrame, budgets: tuple, today: date) -> Dict[str, Any]:
+    """Alert counts by severity and type, cached alongside the alerts themselves."""
+    return get_smart_alerts().create_alerts_summary(_compute_alerts(df, budgets, today))
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH)
+def _compute_aggregates(df: pd.DataFrame) -> Dict[str, Any]:
+    """Spending/income totals and per-category totals, computed once per dataset."""
+    is_expense = df['is_expense']
+    return {
+        'spend': abs(df.loc[is_expense, 'amount'].sum()),
+        'income': df.loc[~is_expense, 'amount'].sum(),
+        'cat_totals': df.groupby('category', observed=True)['amount'].sum().abs().sort_values(ascending=False)
+    }
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH)
+def _to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """CSV export of a frame, serialized once per distinct content."""
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+# Chart figures are cached as shared resources (see _prediction_fig below), so a
+# rerun on unchanged data neither rebuilds nor unpickles them
+@st.cache_resource(show_spinner=False, hash_funcs=_DF_HASH)
+def _category_pie_fig(category_spending: pd.Series):
+    """Expense distribution pie chart."""
+    import plotly.express as px
+    
+    return px.pie(
+        values=category_spending.values,
+        names=category_spending.index,
+        title="Expense Distribution by Category"
+    )
+
+@st.cache_resource(show_spinner=False, hash_funcs=_DF_HASH)
+def _top_categories_fig(top_categories: pd.Series):
+    """Top spending categories bar chart."""
+    import plotly.express as px
+    
+    return px.bar(
+        x=top_categories.index,
+        y=top_categories.values,
+        title="Top 10 Spending Categories",
+        labels={'x': 'Category', 'y': 'Amount'}
+    )
+
+@st.cache_resource(show_spinner=False, hash_funcs=_DF_HASH)
+def _monthly_trend_fig(df: pd.DataFrame):
+    """Monthly income/expense trend chart."""
+    return get_visualizer().create_monthly_trend(df)
+
+@st.cache_resource(show_spinner=False)
+def _health_fig(health_data: Dict[str, Any]):
+    """Overall health score gauge."""
+    return get_health_analyzer().create_health_score_visualization(health_data)
+
+@st.cache_resource(show_spinner=False)
+def _component_fig(component_scores: Dict[str, float]):
+    """Health component radar chart."""
+    return get_health_analyzer().create_component_scores_chart(component_scores)
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH)
+def _predict_spending(df: pd.DataFrame, this_month: str) -> Dict[str, Any]:
+    """Three-month spending forecast for a dataset.
+    
+    Seasonal factors follow the current month, so this_month ('YYYY-MM') is part of the cache key.
+    """
+    return get_predictive_analytics().predict_future_spending(df, months_ahead=3)
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH)
+def _predict_categories(df: pd.DataFrame) -> Dict[str, Any]:
+    """Next-month forecast per category."""
+    return get_predictive_analytics().predict_category_spending(df)
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH)
+def _detect_anomalies(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Unusual monthly and per-category spending."""
+    return get_predictive_analytics().detect_spending_anomalies(df)
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH)
+def _goal_stats(df: pd.DataFrame) -> Dict[str, Any]:
+    """Income/expense/category summary used by goal analysis."""
+    return get_goal_tracker().precompute_df_stats(df)
+
+@st.cache_resource(show_spinner=False)
+def _goal_progress_fig(goal_id: str, name: str, current_amount: float, target_amount: float, progress_percentage: float):
+    """Progress gauge for one goal, rebuilt only when the values it shows change."""
+    return get_goal_tracker().create_goal_progress_chart({
+        'name': name,
+        'current_amount': current_amount,
+        'target_amount': target_amount,
+        'progress_percentage': progress_percentage
+    })
+
+@st.cache_resource(show_spinner=False)
+def _savings_strategy_fig(bars: tuple):
+    """Strategy comparison chart, keyed on the (strategy, potential_savings, difficulty) bars it draws."""
+    return get_goal_tracker().create_savings_strategy_chart([
+        {'strategy': name, 'potential_savings': amount, 'difficulty': difficulty}
+        for name, amount, difficulty in bars
+    ])
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH)
+def _calendar_view(df: pd.DataFrame, year: int, month: int) -> Dict[str, Any]:
+    """Calendar data for one month of a dataset."""
+    return get_financial_calendar().create_calendar_view(df, year, month)
+
+# Plotly figures are kept as shared objects rather than pickled copies;
+# st.plotly_chart only serializes them, so reusing one instance is safe.
+@st.cache_resource(show_spinner=False, hash_funcs=_DF_HASH)
+def _prediction_fig(df: pd.DataFrame, this_month: str):
+    """Historical vs forecast spending chart."""
+    return get_predictive_analytics().create_prediction_chart(df, _predict_spending(df, this_month))
+
+@st.cache_resource(show_spinner=False, hash_funcs=_DF_HASH)
+def _calendar_heatmap_fig(df: pd.DataFrame, year: int, month: int):
+    """Daily spending heatmap for one month."""
+    return get_financial_calendar().create_calendar_heatmap(_calendar_view(df, year, month))
+
+@st.cache_resource(show_spinner=False, hash_funcs=_DF_HASH)
+def _spending_pattern_fig(df: pd.DataFrame, year: int, month: int):
+    """Weekday/weekend spending pattern chart for one month."""
+    return get_financial_calendar().create_spending_pattern_chart(_calendar_view(df, year, month)['patterns'])
+
+@st.cache_resource(show_spinner=False, hash_funcs=_DF_HASH)
+def _cash_flow_fig(df: pd.DataFrame):
+    """Daily cash flow chart over the whole dataset."""
+    return get_financial_calendar().create_monthly_flow_chart(df)
+
 # Initialize session state
-if 'data_processor' not in st.session_state:
-    st.session_state.data_processor = DataProcessor()
-if 'categorizer' not in st.session_state:
-    st.session_state.categorizer = ExpenseCategorizer()
 if 'vector_store' not in st.session_state:
-    st.session_state.vector_store = VectorStore()
-if 'conversation_handler' not in st.session_state:
-    st.session_state.conversation_handler = ConversationHandler()
-if 'visualizer' not in st.session_state:
-    st.session_state.visualizer = FinanceVisualizer()
-if 'health_analyzer' not in st.session_state:
-    st.session_state.health_analyzer = FinancialHealthAnalyzer()
-if 'predictive_analytics' not in st.session_state:
-    st.session_state.predictive_analytics = PredictiveAnalytics()
-if 'smart_alerts' not in st.session_state:
-    st.session_state.smart_alerts = SmartAlertsSystem()
-if 'goal_tracker' not in st.session_state:
-    st.session_state.goal_tracker = GoalTracker()
-if 'financial_calendar' not in st.session_state:
-    st.session_state.financial_calendar = FinancialCalendar()
+    st.session_state.vector_store = None
 if 'transactions_df' not in st.session_state:
     st.session_state.transactions_df = None
+if 'agg' not in st.session_state:
+    st.session_state.agg = None
+if 'data_key' not in st.session_state:
+    st.session_state.data_key = None
+if 'categories' not in st.session_state:
+    st.session_state.categories = []
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 if 'user_goals' not in st.session_state:
-    st.session_state.user_goals = []
+    st.session_state.user_goals = {}  # goal id -> goal
+if 'user_goals_df' not in st.session_state:
+    st.session_state.user_goals_df = pd.DataFrame(list(st.session_state.user_goals.values()))
+
+def _sync_goals_df():
+    """Refresh the tabular copy of user goals after they change."""
+    st.session_state.user_goals_df = pd.DataFrame(list(st.session_state.user_goals.values()))
 if 'budgets' not in st.session_state:
     st.session_state.budgets = {}
 
+@st.fragment
+def _render_predictions(df: pd.DataFrame):
+    """Spending forecast, category forecasts and anomalies tab."""
+    st.header("🔮 Financial Predictions")
+    
+    # Spending predictions
+    this_month = datetime.now().strftime('%Y-%m')
+    predictions = _predict_spending(df, this_month)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Prediction chart
+        pred_fig = _prediction_fig(df, this_month)
+        st.plotly_chart(pred_fig, use_container_width=True)
+        
+        # Prediction summary
+        st.subheader("📊 Forecast Summary")
+        if predictions['predictions']:
+            avg_prediction = np.mean(predictions['predictions'])
+            st.metric("Avg Monthly Spending (Next 3 months)", format_currency(avg_prediction))
+            st.metric("Trend Direction", predictions['trend_direction'].title())
+            st.metric("Confidence Level", f"{predictions['confidence_level']:.1f}%")
+    
+    with col2:
+        # Category predictions
+        category_predictions = _predict_categories(df)
+        
+        if category_predictions:
+            st.subheader("📈 Category Forecasts")
+            forecast_df = pd.DataFrame(
+                [(category, pred_data['predicted_amount'], pred_data['trend'].title(), pred_data['confidence'])
+                 for category, pred_data in islice(category_predictions.items(), 5)],
+                columns=['Category', 'Predicted', 'Trend', 'Confidence']
+            )
+            st.dataframe(
+                forecast_df,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    'Predicted': st.column_config.NumberColumn(format="dollar"),
+                    'Confidence': st.column_config.NumberColumn(format="%.0f%%")
+                }
+            )
+        
+        # Anomalies
+        anomalies = _detect_anomalies(df)
+        if anomalies:
+            st.subheader("⚠️ Detected Anomalies")
+            for anomaly in anomalies[:3]:
+                severity_color = "🔴" if anomaly['severity'] == 'high' else "🟡"
+                st.write(f"{severity_color} {anomaly['type'].replace('_', ' ').title()}")
+                if 'month' in anomaly:
+                    st.write(f"Month: {anomaly['month']}")
+                st.write(f"Amount: {format_currency(anomaly['amount'])}")
+                st.write("---")
+
+@st.fragment
+def _render_alerts(df: pd.DataFrame):
+    """Alerts and budget management tab."""
+    # Enhanced Alerts Layout
+    st.markdown("""
+    <div style='text-align: center; margin-bottom: 30px;'>
+        <h2 style='color: #f5576c;'>🚨 Smart Financial Alerts</h2>
+        <p style='color: #666; font-size: 1.1em;'>Proactive notifications to keep your finances on track</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Generate and display alerts
+    budgets = tuple(sorted(st.session_state.budgets.items()))
+    alerts = _compute_alerts(df, budgets, date.today())
+    
+    if alerts:
+        # Alert summary cards at top
+        alert_summary = _compute_alert_summary(df, budgets, date.today())
+        
+        render_card_row(KPI_CARD_TPL, [
+            {'icon': '🚨', 'value': alert_summary['total_alerts'], 'label': 'Total Alerts',
+             'background': 'linear-gradient(135deg, #f5576c 0%, #f093fb 100%)'},
+            {'icon': '🔴', 'value': alert_summary['high_severity'], 'label': 'High Priority',
+             'background': 'linear-gradient(135deg, #e53e3e 0%, #ff6b35 100%)'},
+            {'icon': '🟡', 'value': alert_summary['medium_severity'], 'label': 'Medium Priority',
+             'background': 'linear-gradient(135deg, #ff9800 0%, #ffb74d 100%)'},
+            {'icon': '🔵', 'value': alert_summary['low_severity'], 'label': 'Low Priority',
+             'background': 'linear-gradient(135deg, #2196f3 0%, #64b5f6 100%)'}
+        ])
+        
+        st.markdown("<br>", unsafe_allow_html=True)
+        
+        # Alert details in cards
+        st.markdown("""
+        <div style='background: white; border: 1px solid #e0e0e0; border-radius: 15px; padding: 25px; margin: 20px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
+            <h4 style='color: #f5576c; margin-top: 0;'>📋 Alert Details</h4>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Display alerts with better styling
+        render_items(ALERT_ITEM_TPL, [
+            {'message': alert['message'],
+             'background': ALERT_BACKGROUNDS.get(alert.get('severity', 'low'), '#f5f5f5'),
+             'border': ALERT_BORDERS.get(alert.get('severity', 'low'), '#ddd')}
+            for alert in alerts
+        ])
+    else:
+        st.markdown("""
+        <div style='text-align: center; padding: 50px; background: linear-gradient(135deg, #43a047 0%, #66bb6a 100%); border-radius: 15px; margin: 20px 0;'>
+            <h1 style='color: white; margin: 0; font-size: 4em;'>🎉</h1>
+            <h2 style='color: white; margin: 20px 0;'>All Clear!</h2>
+            <p style='color: white; opacity: 0.9; font-size: 1.2em;'>No alerts detected - your finances look healthy!</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    # Budget Management Card
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown("""
+    <div style='background: white; border: 1px solid #e0e0e0; border-radius: 15px; padding: 25px; margin: 20px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
+        <h4 style='color: #43a047; margin-top: 0;'>💰 Budget Management</h4>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    budget_col1, budget_col2 = st.columns(2)
+    
+    with budget_col1:
+        st.markdown("##### Set New Budget")
+        if 'category' in df.columns:
+            # Category list is derived once per upload in the sidebar
+            selected_category = st.selectbox("Category", st.session_state.categories, key="budget_category")
+            budget_amount = st.number_input(f"Monthly Budget ($)", min_value=0.0, step=50.0, key="budget_amount")
+            
+            if st.button("💾 Set Budget", key="set_budget_btn"):
+                st.session_state.budgets[selected_category] = budget_amount
+                st.success(f"✅ Budget set for {selected_category}: {format_currency(budget_amount)}")
+                # Budgets also drive the dashboard alerts, so rerun the whole app rather than this fragment
+                st.rerun(scope="app")
+    
+    with budget_col2:
+        st.markdown("##### Current Budgets")
+        if st.session_state.budgets:
+            render_items(BUDGET_ITEM_TPL, [
+                {'category': category, 'amount': format_currency(amount)}
+                for category, amount in st.session_state.budgets.items()
+            ])
+        else:
+            st.info("No budgets set yet. Set your first budget to get started!")
+
+@st.fragment
+def _render_goals(df: pd.DataFrame):
+    """Goal creation and tracking tab."""
+    st.header("🎯 Financial Goals")
+    
+    # One pass over the data shared by every goal's feasibility and strategy analysis
+    goal_stats = _goal_stats(df)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("➕ Create New Goal")
+        
+        goal_name = st.text_input("Goal Name", placeholder="e.g., Emergency Fund")
+        goal_type = st.selectbox("Goal Type", get_goal_tracker().goal_types)
+        target_amount = st.number_input("Target Amount ($)", min_value=0.0, step=100.0)
+        target_date = st.date_input("Target Date", min_value=date.today())
+        current_amount = st.number_input("Current Amount ($)", min_value=0.0, step=50.0)
+        
+        if st.button("Create Goal"):
+            new_goal = get_goal_tracker().create_goal(
+                goal_name, target_amount, target_date, goal_type, current_amount
+            )
+            st.session_state.user_goals[new_goal['id']] = new_goal
+            _sync_goals_df()
+            st.success(f"Goal '{goal_name}' created successfully!")
+            # Goals are summarized on the dashboard too
+            st.rerun(scope="app")
+    
+    with col2:
+        st.subheader("📋 Your Goals")
+        
+        if st.session_state.user_goals:
+            for goal_id, goal in st.session_state.user_goals.items():
+                with st.expander(f"{goal['name']} ({goal['progress_percentage']:.1f}% complete)"):
+                    
+                    # Goal progress chart
+                    progress_fig = _goal_progress_fig(goal_id, goal['name'], goal['current_amount'], goal['target_amount'], goal['progress_percentage'])
+                    st.plotly_chart(progress_fig, use_container_width=True, key=f"progress_{goal_id}", config=STATIC_CHART_CONFIG)
+                    
+                    # Goal details
+                    col_a, col_b = st.columns(2)
+                    with col_a:
+                        st.write(f"**Target:** {format_currency(goal['target_amount'])}")
+                        st.write(f"**Current:** {format_currency(goal['current_amount'])}")
+                        st.write(f"**Target Date:** {goal['target_date']}")
+                    with col_b:
+                        st.write(f"**Status:** {goal['status']}")
+                        st.write(f"**Days Remaining:** {goal['days_remaining']}")
+                        st.write(f"**Monthly Savings Needed:** {format_currency(goal['monthly_savings_needed'])}")
+                    
+                    # Feasibility analysis
+                    feasibility = get_goal_tracker().analyze_goal_feasibility(goal, goal_stats)
+                    st.write(f"**Feasibility:** {feasibility['feasibility']}")
+                    st.write(f"**Success Probability:** {feasibility['success_probability']:.1f}%")
+                    
+                    # Remove goal button, keyed on the goal id so removals never shift other goals' buttons
+                    if st.button(f"Remove Goal", key=f"remove_{goal_id}"):
+                        del st.session_state.user_goals[goal_id]
+                        _sync_goals_df()
+                        st.rerun(scope="app")
+        else:
+            st.info("No goals set yet. Create your first goal to get started!")
+    
+    # Goal strategies
+    if st.session_state.user_goals:
+        st.subheader("💡 Savings Strategies")
+        for goal_id, goal in islice(st.session_state.user_goals.items(), 2):  # Show strategies for first 2 goals
+            strategies = get_goal_tracker().generate_savings_strategies(goal, goal_stats)
+            if strategies:
+                st.write(f"**Strategies for {goal['name']}:**")
+                strategy_fig = _savings_strategy_fig(tuple(
+                    (s['strategy'], float(s['potential_savings']), s['difficulty']) for s in strategies[:5]
+                ))
+                st.plotly_chart(strategy_fig, use_container_width=True, key=f"strategy_{goal_id}", config=STATIC_CHART_CONFIG)
+                
+                for strategy in strategies[:3]:
+                    st.write(f"• **{strategy['strategy']}**: {strategy['description']}")
+
+@st.fragment
+def _render_calendar(df: pd.DataFrame):
+    """Calendar tab; the month/year selectors only rerun this fragment."""
+    st.header("📅 Financial Calendar")
+    
+    # Month/Year selector
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_year = st.selectbox("Year", CALENDAR_YEARS, index=4)  # Default to 2024
+    with col2:
+        selected_month = st.selectbox("Month", CALENDAR_MONTHS, index=date.today().month - 1)
+    
+    # Generate calendar data
+    calendar_data = _calendar_view(df, selected_year, selected_month)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Calendar heatmap
+        calendar_fig = _calendar_heatmap_fig(df, selected_year, selected_month)
+        st.plotly_chart(calendar_fig, use_container_width=True, config=STATIC_CHART_CONFIG)
+        
+        # Month statistics
+        st.subheader("📊 Month Statistics")
+        month_stats = calendar_data['month_stats']
+        st.metric("Total Spending", format_currency(month_stats['total_expense']))
+        st.metric("Total Income", format_currency(month_stats['total_income']))
+        st.metric("Net Flow", format_currency(month_stats['net_flow']))
+        st.metric("Transaction Count", month_stats['transaction_count'])
+        st.metric("Most Active Day", month_stats['most_active_day'])
+    
+    with col2:
+        # Spending patterns
+        if calendar_data['patterns']:
+            pattern_fig = _spending_pattern_fig(df, selected_year, selected_month)
+            st.plotly_chart(pattern_fig, use_container_width=True)
+        
+        # Calendar insights
+        insights = get_financial_calendar().get_calendar_insights(calendar_data)
+        st.subheader("💡 Calendar Insights")
+        for insight in insights:
+            st.info(insight)
+    
+    # Daily cash flow
+    st.subheader("💰 Daily Cash Flow")
+    flow_fig = _cash_flow_fig(df)
+    st.plotly_chart(flow_fig, use_container_width=True)
+
+def _render_welcome():
+    """Landing page shown until a statement is uploaded."""
+    # Enhanced welcome screen with proper branding
+    st.markdown(WELCOME_HTML, unsafe_allow_html=True)
+    
+    # Getting Started Card
+    st.markdown(GET_STARTED_HTML, unsafe_allow_html=True)
+    
+    # Requirements and Features
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown(REQUIREMENTS_HTML, unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown(FEATURES_HTML, unsafe_allow_html=True)
+    
+    # Example Questions Card
+    st.markdown(EXAMPLES_HTML, unsafe_allow_html=True)
+
 def main():
     # Enhanced header with branding
     st.markdown("""
@@ -76,56 +721,21 @@ def main():
         </div>
         """, unsafe_allow_html=True)
         
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.markdown("""
-            <div style='text-align: center; padding: 20px; border: 2px solid #667eea; border-radius: 10px; margin: 10px;'>
-                <h3>🏥</h3>
-                <h4>Health Score</h4>
-                <p>AI-powered financial wellness scoring</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown("""
-            <div style='text-align: center; padding: 20px; border: 2px solid #667eea; border-radius: 10px; margin: 10px;'>
-                <h3>🔮</h3>
-                <h4>Predictions</h4>
-                <p>Future spending forecasts & trends</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown("""
-            <div style='text-align: center; padding: 20px; border: 2px solid #667eea; border-radius: 10px; margin: 10px;'>
-                <h3>🚨</h3>
-                <h4>Smart Alerts</h4>
-                <p>Proactive spending notifications</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col4:
-            st.markdown("""
-            <div style='text-align: center; padding: 20px; border: 2px solid #667eea; border-radius: 10px; margin: 10px;'>
-                <h3>🎯</h3>
-                <h4>Goal Tracking</h4>
-                <p>Personalized savings strategies</p>
-            </div>
-            """, unsafe_allow_html=True)
+        render_card_row(FEATURE_CARD_TPL, [
+            {'icon': '🏥', 'title': 'Health Score', 'body': 'AI-powered financial wellness scoring'},
+            {'icon': '🔮', 'title': 'Predictions', 'body': 'Future spending forecasts & trends'},
+            {'icon': '🚨', 'title': 'Smart Alerts', 'body': 'Proactive notifications'},
+            {'icon': '🎯', 'title': 'Goal Tracking', 'body': 'Personalized savings strategies'}
+        ])
     
     # Enhanced sidebar with branding
     with st.sidebar:
-        # Sidebar Branding Header
+        # Sidebar Branding Header and Data Upload Section
         st.markdown("""
         <div style='text-align: center; padding: 20px; background: linear-gradient(45deg, #667eea, #764ba2); border-radius: 10px; margin-bottom: 25px;'>
             <h2 style='color: white; margin: 0; font-size: 1.8em;'>🚀 FinancePilot</h2>
             <p style='color: white; margin: 5px 0 0 0; opacity: 0.9; font-size: 0.9em;'>Control Center</p>
         </div>
-        """, unsafe_allow_html=True)
-        
-        # Data Upload Section
-        st.markdown("""
         <div style='text-align: center; padding: 15px; background: linear-gradient(45deg, #4facfe, #00f2fe); border-radius: 10px; margin-bottom: 20px;'>
             <h4 style='color: white; margin: 0;'>📁 Data Upload</h4>
             <p style='color: white; margin: 0; font-size: 0.9em;'>CSV & Excel supported</p>
@@ -140,24 +750,32 @@ def main():
         if uploaded_file is not None:
             if validate_file(uploaded_file):
                 with st.spinner("Processing your financial data..."):
-                    # Process the uploaded file
-                    df = st.session_state.data_processor.load_file(uploaded_file)
+                    # Process the uploaded file (cached on the file contents)
+                    file_bytes = uploaded_file.getvalue()
+                    df_categorized = _load_and_categorize(file_bytes, uploaded_file.name)
                     
-                    if df is not None:
-                        # Categorize expenses
-                        df_categorized = st.session_state.categorizer.categorize_transactions(df)
-                        
-                        # Store in vector database
-                        st.session_state.vector_store.add_transactions(df_categorized)
+                    if df_categorized is not None:
+                        data_key = hashlib.sha256(file_bytes).hexdigest()
                         
-                        # Update session state
-                        st.session_state.transactions_df = df_categorized
+                        # Update session state once per distinct upload
+                        if st.session_state.data_key != data_key:
+                            # Store in vector database, in the background; an overlapping
+                            # statement only embeds the transactions it adds, and stored
+                            # transactions missing from the new upload are deleted
+                            _session_vector_store().add_transactions_in_background(df_categorized, _get_ingest_executor())
+                            
+                            st.session_state.transactions_df = df_categorized
+                            st.session_state.agg = _compute_aggregates(df_categorized)
+                            st.session_state.categories = df_categorized['category'].unique().tolist()
+                            st.session_state.n_months = df_categorized['month_year'].nunique()
+                            st.session_state.n_transactions = len(df_categorized)
+                            st.session_state.data_key = data_key
                         
-                        st.success(f"✅ Processed {len(df_categorized)} transactions!")
+                        st.success(f"✅ Processed {st.session_state.n_transactions} transactions!")
                         
                         # Display basic stats
                         st.subheader("📊 Quick Stats")
-                        total_transactions = len(df_categorized)
+                        total_transactions = st.session_state.n_transactions
                         total_amount = df_categorized['amount'].sum()
                         avg_transaction = df_categorized['amount'].mean()
                         
@@ -170,8 +788,8 @@ def main():
                         st.markdown("### 🏆 Your Achievements")
                         
                         # Calculate achievements
-                        categories = len(df_categorized['category'].unique()) if 'category' in df_categorized.columns else 0
-                        months_tracked = len(df_categorized['month_year'].unique()) if 'month_year' in df_categorized.columns else 0
+                        categories = len(st.session_state.categories)
+                        months_tracked = st.session_state.n_months
                         
                         # Achievement badges
                         achievements = []
@@ -207,791 +825,399 @@ def main():
             else:
                 st.error("❌ Invalid file format or structure")
     
-    # Main content area
-    if st.session_state.transactions_df is not None:
-        df = st.session_state.transactions_df
-        
-        # Create tabs with better organization and flow
-        tab0, tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
-            "🏠 Dashboard",
-            "💬 AI Chat", 
-            "📈 Analytics", 
-            "🔍 Explorer", 
-            "🏥 Health",
-            "🔮 Predictions",
-            "🚨 Alerts", 
-            "🎯 Goals",
-            "📅 Calendar"
+    # Nothing below needs the analysis components until a file is uploaded
+    if st.session_state.transactions_df is None:
+        _render_welcome()
+        return
+    
+    # Per-session chat state, created once there is data to talk about
+    if 'conversation_handler' not in st.session_state:
+        from conversation_handler import ConversationHandler
+        st.session_state.conversation_handler = ConversationHandler()
+    
+    df = st.session_state.transactions_df
+    
+    # Create tabs with better organization and flow
+    tab0, tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
+        "🏠 Dashboard",
+        "💬 AI Chat", 
+        "📈 Analytics", 
+        "🔍 Explorer", 
+        "🏥 Health",
+        "🔮 Predictions",
+        "🚨 Alerts", 
+        "🎯 Goals",
+        "📅 Calendar"
+    ])
+    
+    with tab0:
+        # MAIN DASHBOARD - Overview of everything
+        st.markdown("""
+        <div style='text-align: center; margin-bottom: 30px;'>
+            <h2 style='color: #667eea;'>📊 Financial Dashboard</h2>
+            <p style='color: #666; font-size: 1.1em;'>Your complete financial overview at a glance</p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Calculate key metrics
+        total_transactions = len(df)
+        total_spending = st.session_state.agg['spend']
+        total_income = st.session_state.agg['income']
+        net_worth = total_income - total_spending
+        
+        # Quick Stats Cards
+        render_card_row(KPI_CARD_TPL, [
+            {'icon': '💳', 'value': total_transactions, 'label': 'Total Transactions',
+             'background': 'linear-gradient(135deg, #667eea 0%, #764ba2 100%)'},
+            {'icon': '💸', 'value': format_currency(total_spending), 'label': 'Total Spending',
+             'background': 'linear-gradient(135deg, #f093fb 0%, #f5576c 100%)'},
+            {'icon': '💰', 'value': format_currency(total_income), 'label': 'Total Income',
+             'background': 'linear-gradient(135deg, #4facfe 0%, #00f2fe 100%)'},
+            {'icon': '📈' if net_worth >= 0 else '📉', 'value': format_currency(net_worth), 'label': 'Net Flow',
+             'background': '#43a047' if net_worth >= 0 else '#e53e3e'}
         ])
         
-        with tab0:
-            # MAIN DASHBOARD - Overview of everything
-            st.markdown("""
-            <div style='text-align: center; margin-bottom: 30px;'>
-                <h2 style='color: #667eea;'>📊 Financial Dashboard</h2>
-                <p style='color: #666; font-size: 1.1em;'>Your complete financial overview at a glance</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Quick Stats Cards
-            col1, col2, col3, col4 = st.columns(4)
-            
-            # Calculate key metrics
-            total_transactions = len(df)
-            total_spending = abs(df[df['amount'] < 0]['amount'].sum())
-            total_income = df[df['amount'] > 0]['amount'].sum()
-            net_worth = total_income - total_spending
-            
-            with col1:
-                st.markdown("""
-                <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 20px; border-radius: 10px; text-align: center; margin: 5px;'>
-                    <h3 style='color: white; margin: 0;'>💳</h3>
-                    <h2 style='color: white; margin: 10px 0;'>{}</h2>
-                    <p style='color: white; margin: 0; opacity: 0.9;'>Total Transactions</p>
-                </div>
-                """.format(total_transactions), unsafe_allow_html=True)
-            
-            with col2:
-                st.markdown("""
-                <div style='background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); padding: 20px; border-radius: 10px; text-align: center; margin: 5px;'>
-                    <h3 style='color: white; margin: 0;'>💸</h3>
-                    <h2 style='color: white; margin: 10px 0;'>{}</h2>
-                    <p style='color: white; margin: 0; opacity: 0.9;'>Total Spending</p>
-                </div>
-                """.format(format_currency(total_spending)), unsafe_allow_html=True)
-            
-            with col3:
-                st.markdown("""
-                <div style='background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%); padding: 20px; border-radius: 10px; text-align: center; margin: 5px;'>
-                    <h3 style='color: white; margin: 0;'>💰</h3>
-                    <h2 style='color: white; margin: 10px 0;'>{}</h2>
-                    <p style='color: white; margin: 0; opacity: 0.9;'>Total Income</p>
-                </div>
-                """.format(format_currency(total_income)), unsafe_allow_html=True)
-            
-            with col4:
-                net_color = "#43a047" if net_worth >= 0 else "#e53e3e"
-                net_icon = "📈" if net_worth >= 0 else "📉"
-                st.markdown("""
-                <div style='background: {}; padding: 20px; border-radius: 10px; text-align: center; margin: 5px;'>
-                    <h3 style='color: white; margin: 0;'>{}</h3>
-                    <h2 style='color: white; margin: 10px 0;'>{}</h2>
-                    <p style='color: white; margin: 0; opacity: 0.9;'>Net Flow</p>
-                </div>
-                """.format(net_color, net_icon, format_currency(net_worth)), unsafe_allow_html=True)
-            
-            st.markdown("<br>", unsafe_allow_html=True)
-            
-            # Three-column layout for dashboard sections
-            dash_col1, dash_col2, dash_col3 = st.columns([1, 1, 1])
-            
-            with dash_col1:
-                # Health Score Card
-                st.markdown("""
-                <div style='background: white; border: 1px solid #e0e0e0; border-radius: 10px; padding: 20px; margin: 10px 0; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>
-                    <h4 style='color: #667eea; margin-top: 0;'>🏥 Health Score</h4>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Mini health score
-                health_data = st.session_state.health_analyzer.calculate_health_score(df)
-                score = health_data['total_score']
-                grade = health_data['grade']
-                
-                st.markdown(f"""
-                <div style='text-align: center; padding: 10px;'>
-                    <h1 style='color: #667eea; margin: 0; font-size: 3em;'>{score}</h1>
-                    <h3 style='color: #666; margin: 0;'>Grade: {grade}</h3>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                if st.button("📊 View Full Health Analysis", key="health_dash"):
-                    st.info("💡 Switch to the Health tab for detailed analysis!")
-            
-            with dash_col2:
-                # Recent Alerts Card
-                st.markdown("""
-                <div style='background: white; border: 1px solid #e0e0e0; border-radius: 10px; padding: 20px; margin: 10px 0; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>
-                    <h4 style='color: #f5576c; margin-top: 0;'>🚨 Smart Alerts</h4>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Quick alerts preview
-                alerts = st.session_state.smart_alerts.generate_alerts(df, st.session_state.budgets)
-                
-                if alerts:
-                    alert_count = len(alerts)
-                    high_priority = len([a for a in alerts if a.get('severity') == 'high'])
-                    
-                    st.markdown(f"""
-                    <div style='text-align: center; padding: 10px;'>
-                        <h2 style='color: #f5576c; margin: 0;'>{alert_count}</h2>
-                        <p style='color: #666; margin: 5px 0;'>Active Alerts</p>
-                        <p style='color: #e53e3e; margin: 0; font-weight: bold;'>{high_priority} High Priority</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Show top alert
-                    if alerts:
-                        top_alert = alerts[0]
-                        st.warning(f"⚠️ {top_alert['message'][:50]}...")
-                else:
-                    st.success("🎉 No alerts - you're doing great!")
-                
-                if st.button("🔍 View All Alerts", key="alerts_dash"):
-                    st.info("💡 Switch to the Alerts tab for detailed information!")
-            
-            with dash_col3:
-                # Goals Progress Card
-                st.markdown("""
-                <div style='background: white; border: 1px solid #e0e0e0; border-radius: 10px; padding: 20px; margin: 10px 0; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>
-                    <h4 style='color: #43a047; margin-top: 0;'>🎯 Goals Progress</h4>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                if st.session_state.user_goals:
-                    total_goals = len(st.session_state.user_goals)
-                    completed_goals = len([g for g in st.session_state.user_goals if g['progress_percentage'] >= 100])
-                    avg_progress = np.mean([g['progress_percentage'] for g in st.session_state.user_goals])
-                    
-                    st.markdown(f"""
-                    <div style='text-align: center; padding: 10px;'>
-                        <h2 style='color: #43a047; margin: 0;'>{total_goals}</h2>
-                        <p style='color: #666; margin: 5px 0;'>Active Goals</p>
-                        <p style='color: #43a047; margin: 0; font-weight: bold;'>{avg_progress:.1f}% Avg Progress</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Show next goal
-                    next_goal = min(st.session_state.user_goals, key=lambda x: x['days_remaining'])
-                    st.info(f"⏰ Next: {next_goal['name']} ({next_goal['days_remaining']} days)")
-                else:
-                    st.markdown("""
-                    <div style='text-align: center; padding: 20px;'>
-                        <p style='color: #666;'>No goals set yet</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                if st.button("🎯 Manage Goals", key="goals_dash"):
-                    st.info("💡 Switch to the Goals tab to create and manage your financial goals!")
-            
-            st.markdown("<br>", unsafe_allow_html=True)
-            
-            # Quick Actions Section
-            st.markdown("""
-            <div style='background: linear-gradient(90deg, #667eea 0%, #764ba2 100%); padding: 20px; border-radius: 10px; margin: 20px 0;'>
-                <h3 style='color: white; text-align: center; margin: 0;'>⚡ Quick Actions</h3>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            action_col1, action_col2, action_col3, action_col4 = st.columns(4)
-            
-            with action_col1:
-                if st.button("💬 Ask AI Assistant", key="quick_chat"):
-                    st.info("💡 Go to AI Chat tab to ask questions about your finances!")
-            
-            with action_col2:
-                if st.button("📈 View Analytics", key="quick_analytics"):
-                    st.info("💡 Go to Analytics tab for detailed spending analysis!")
-            
-            with action_col3:
-                if st.button("🔮 See Predictions", key="quick_predictions"):
-                    st.info("💡 Go to Predictions tab to forecast future spending!")
-            
-            with action_col4:
-                if st.button("📅 Calendar View", key="quick_calendar"):
-                    st.info("💡 Go to Calendar tab to see spending patterns by date!")
-            
-            # Recent Activity Section
-            st.markdown("""
-            <div style='margin-top: 30px;'>
-                <h3 style='color: #667eea;'>📋 Recent Activity</h3>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Show recent transactions in a nice format
-            recent_transactions = df.head(5)
-            
-            for _, transaction in recent_transactions.iterrows():
-                amount_color = "#e53e3e" if transaction['amount'] < 0 else "#43a047"
-                amount_symbol = "💸" if transaction['amount'] < 0 else "💰"
-                
-                st.markdown(f"""
-                <div style='background: white; border-left: 4px solid {amount_color}; padding: 15px; margin: 10px 0; border-radius: 5px; box-shadow: 0 1px 3px rgba(0,0,0,0.1);'>
-                    <div style='display: flex; justify-content: space-between; align-items: center;'>
-                        <div>
-                            <strong>{transaction['description']}</strong><br>
-                            <small style='color: #666;'>{transaction['date'].strftime('%Y-%m-%d') if hasattr(transaction['date'], 'strftime') else str(transaction['date'])}</small>
-                        </div>
-                        <div style='text-align: right;'>
-                            <span style='font-size: 1.2em;'>{amount_symbol}</span>
-                            <strong style='color: {amount_color}; font-size: 1.1em;'>{format_currency(abs(transaction['amount']))}</strong>
-                        </div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+        st.markdown("<br>", unsafe_allow_html=True)
         
-        with tab1:
-            st.header("💬 Ask Your Finance Assistant")
-            st.markdown("Ask questions about your spending habits in natural language!")
-            
-            # Chat interface
-            user_question = st.text_input(
-                "Ask a question about your finances:",
-                placeholder="e.g., How much did I spend on food last month?",
-                key="user_input"
-            )
-            
-            if st.button("Ask") and user_question:
-                with st.spinner("Analyzing your financial data..."):
-                    # Get response from conversation handler
-                    response = st.session_state.conversation_handler.get_response(
-                        user_question, 
-                        st.session_state.vector_store,
-                        df
-                    )
-                    
-                    # Add to chat history
-                    st.session_state.chat_history.append({
-                        "question": user_question,
-                        "answer": response,
-                        "timestamp": datetime.now()
-                    })
-            
-            # Display chat history
-            if st.session_state.chat_history:
-                st.subheader("💭 Conversation History")
-                for i, chat in enumerate(reversed(st.session_state.chat_history[-5:])):  # Show last 5
-                    with st.expander(f"Q: {chat['question'][:50]}...", expanded=(i==0)):
-                        st.write(f"**Question:** {chat['question']}")
-                        st.write(f"**Answer:** {chat['answer']}")
-                        st.write(f"*{chat['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}*")
-        
-        with tab2:
-            st.header("📈 Financial Analytics")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # Spending by category pie chart
-                st.subheader("Spending by Category")
-                category_spending = df.groupby('category')['amount'].sum().abs()
-                fig_pie = px.pie(
-                    values=category_spending.values,
-                    names=category_spending.index,
-                    title="Expense Distribution by Category"
-                )
-                st.plotly_chart(fig_pie, use_container_width=True)
-            
-            with col2:
-                # Monthly spending trend
-                st.subheader("Monthly Spending Trend")
-                monthly_spending = st.session_state.visualizer.create_monthly_trend(df)
-                st.plotly_chart(monthly_spending, use_container_width=True)
-            
-            # Top spending categories
-            st.subheader("📊 Top Spending Categories")
-            top_categories = df.groupby('category')['amount'].sum().abs().sort_values(ascending=False).head(10)
-            fig_bar = px.bar(
-                x=top_categories.index,
-                y=top_categories.values,
-                title="Top 10 Spending Categories",
-                labels={'x': 'Category', 'y': 'Amount'}
-            )
-            st.plotly_chart(fig_bar, use_container_width=True)
+        # Three-column layout for dashboard sections
+        dash_col1, dash_col2, dash_col3 = st.columns([1, 1, 1])
         
-        with tab3:
-            st.header("🔍 Transaction Explorer")
-            
-            # Filters
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                categories = ['All'] + list(df['category'].unique())
-                selected_category = st.selectbox("Filter by Category", categories)
-            
-            with col2:
-                date_range = st.date_input(
-                    "Date Range",
-                    value=(df['date'].min(), df['date'].max()),
-                    min_value=df['date'].min(),
-                    max_value=df['date'].max()
-                )
-            
-            with col3:
-                amount_range = st.slider(
-                    "Amount Range",
-                    float(df['amount'].min()),
-                    float(df['amount'].max()),
-                    (float(df['amount'].min()), float(df['amount'].max()))
-                )
-            
-            # Filter data
-            filtered_df = df.copy()
-            
-            if selected_category != 'All':
-                filtered_df = filtered_df[filtered_df['category'] == selected_category]
+        with dash_col1:
+            # Health Score Card
+            render_section_card("🏥 Health Score", "#667eea")
             
-            if len(date_range) == 2:
-                filtered_df = filtered_df[
-                    (filtered_df['date'] >= pd.to_datetime(date_range[0])) &
-                    (filtered_df['date'] <= pd.to_datetime(date_range[1]))
-                ]
+            # Mini health score
+            health_data = _compute_health(df)
+            score = health_data['total_score']
+            grade = health_data['grade']
             
-            filtered_df = filtered_df[
-                (filtered_df['amount'] >= amount_range[0]) &
-                (filtered_df['amount'] <= amount_range[1])
-            ]
-            
-            # Display filtered transactions
-            st.subheader(f"📋 Transactions ({len(filtered_df)} found)")
-            
-            if len(filtered_df) > 0:
-                # Format for display
-                display_df = filtered_df.copy()
-                display_df['amount'] = display_df['amount'].apply(format_currency)
-                display_df['date'] = display_df['date'].dt.strftime('%Y-%m-%d')
-                
-                st.dataframe(
-                    display_df[['date', 'description', 'amount', 'category']],
-                    use_container_width=True
-                )
-                
-                # Download filtered data
-                csv = filtered_df.to_csv(index=False)
-                st.download_button(
-                    label="📥 Download Filtered Data",
-                    data=csv,
-                    file_name=f"filtered_transactions_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv"
-                )
-            else:
-                st.info("No transactions found matching the selected filters.")
-        
-        with tab4:
-            # Enhanced Health Score Layout
-            st.markdown("""
-            <div style='text-align: center; margin-bottom: 30px;'>
-                <h2 style='color: #667eea;'>🏥 Financial Health Analysis</h2>
-                <p style='color: #666; font-size: 1.1em;'>Comprehensive assessment of your financial wellness</p>
+            st.markdown(f"""
+            <div style='text-align: center; padding: 10px;'>
+                <h1 style='color: #667eea; margin: 0; font-size: 3em;'>{score}</h1>
+                <h3 style='color: #666; margin: 0;'>Grade: {grade}</h3>
             </div>
             """, unsafe_allow_html=True)
             
-            # Calculate health score
-            health_data = st.session_state.health_analyzer.calculate_health_score(df)
-            
-            col1, col2 = st.columns(2)
+            if st.button("📊 View Full Health Analysis", key="health_dash"):
+                st.info("💡 Switch to the Health tab for detailed analysis!")
+        
+        with dash_col2:
+            # Recent Alerts Card
+            render_section_card("🚨 Smart Alerts", "#f5576c")
             
-            with col1:
-                # Health Score Card
-                st.markdown("""
-                <div style='background: white; border: 1px solid #e0e0e0; border-radius: 15px; padding: 25px; margin: 10px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
-                    <h4 style='color: #667eea; margin-top: 0; text-align: center;'>📊 Overall Health Score</h4>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                health_fig = st.session_state.health_analyzer.create_health_score_visualization(health_data)
-                st.plotly_chart(health_fig, use_container_width=True)
-                
-                # Health insights in cards
-                st.markdown("""
-                <div style='background: white; border: 1px solid #e0e0e0; border-radius: 15px; padding: 25px; margin: 15px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
-                    <h4 style='color: #4facfe; margin-top: 0;'>💡 Key Insights</h4>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                for insight in health_data['insights']:
-                    st.markdown(f"""
-                    <div style='background: #f8f9fa; border-left: 4px solid #4facfe; padding: 15px; margin: 10px 0; border-radius: 5px;'>
-                        <p style='margin: 0; color: #333;'>{insight}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+            # Quick alerts preview
+            alerts = _compute_alerts(df, tuple(sorted(st.session_state.budgets.items())), date.today())
             
-            with col2:
-                # Component scores card
-                st.markdown("""
-                <div style='background: white; border: 1px solid #e0e0e0; border-radius: 15px; padding: 25px; margin: 10px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
-                    <h4 style='color: #667eea; margin-top: 0; text-align: center;'>🎯 Component Analysis</h4>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                component_fig = st.session_state.health_analyzer.create_component_scores_chart(health_data['component_scores'])
-                st.plotly_chart(component_fig, use_container_width=True)
+            if alerts:
+                alert_count = len(alerts)
+                high_priority = len([a for a in alerts if a.get('severity') == 'high'])
                 
-                # Improvement tips in cards
-                st.markdown("""
-                <div style='background: white; border: 1px solid #e0e0e0; border-radius: 15px; padding: 25px; margin: 15px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
-                    <h4 style='color: #43a047; margin-top: 0;'>🚀 Improvement Tips</h4>
+                st.markdown(f"""
+                <div style='text-align: center; padding: 10px;'>
+                    <h2 style='color: #f5576c; margin: 0;'>{alert_count}</h2>
+                    <p style='color: #666; margin: 5px 0;'>Active Alerts</p>
+                    <p style='color: #e53e3e; margin: 0; font-weight: bold;'>{high_priority} High Priority</p>
                 </div>
                 """, unsafe_allow_html=True)
                 
-                for tip in health_data['improvement_tips']:
-                    st.markdown(f"""
-                    <div style='background: #f1f8e9; border-left: 4px solid #43a047; padding: 15px; margin: 10px 0; border-radius: 5px;'>
-                        <p style='margin: 0; color: #333;'>{tip}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-        
-        with tab5:
-            st.header("🔮 Financial Predictions")
-            
-            # Spending predictions
-            predictions = st.session_state.predictive_analytics.predict_future_spending(df, months_ahead=3)
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # Prediction chart
-                pred_fig = st.session_state.predictive_analytics.create_prediction_chart(df, predictions)
-                st.plotly_chart(pred_fig, use_container_width=True)
-                
-                # Prediction summary
-                st.subheader("📊 Forecast Summary")
-                if predictions['predictions']:
-                    avg_prediction = np.mean(predictions['predictions'])
-                    st.metric("Avg Monthly Spending (Next 3 months)", format_currency(avg_prediction))
-                    st.metric("Trend Direction", predictions['trend_direction'].title())
-                    st.metric("Confidence Level", f"{predictions['confidence_level']:.1f}%")
-            
-            with col2:
-                # Category predictions
-                category_predictions = st.session_state.predictive_analytics.predict_category_spending(df)
-                
-                if category_predictions:
-                    st.subheader("📈 Category Forecasts")
-                    for category, pred_data in list(category_predictions.items())[:5]:
-                        st.write(f"**{category}**")
-                        st.write(f"Predicted: {format_currency(pred_data['predicted_amount'])}")
-                        st.write(f"Trend: {pred_data['trend']} ({pred_data['confidence']:.0f}% confidence)")
-                        st.write("---")
-                
-                # Anomalies
-                anomalies = st.session_state.predictive_analytics.detect_spending_anomalies(df)
-                if anomalies:
-                    st.subheader("⚠️ Detected Anomalies")
-                    for anomaly in anomalies[:3]:
-                        severity_color = "🔴" if anomaly['severity'] == 'high' else "🟡"
-                        st.write(f"{severity_color} {anomaly['type'].replace('_', ' ').title()}")
-                        if 'month' in anomaly:
-                            st.write(f"Month: {anomaly['month']}")
-                        st.write(f"Amount: {format_currency(anomaly['amount'])}")
-                        st.write("---")
-        
-        with tab6:
-            # Enhanced Alerts Layout
-            st.markdown("""
-            <div style='text-align: center; margin-bottom: 30px;'>
-                <h2 style='color: #f5576c;'>🚨 Smart Financial Alerts</h2>
-                <p style='color: #666; font-size: 1.1em;'>Proactive notifications to keep your finances on track</p>
-            </div>
-            """, unsafe_allow_html=True)
+                # Show top alert
+                if alerts:
+                    top_alert = alerts[0]
+                    st.warning(f"⚠️ {top_alert['message'][:50]}...")
+            else:
+                st.success("🎉 No alerts - you're doing great!")
             
-            # Generate and display alerts
-            alerts = st.session_state.smart_alerts.generate_alerts(df, st.session_state.budgets)
+            if st.button("🔍 View All Alerts", key="alerts_dash"):
+                st.info("💡 Switch to the Alerts tab for detailed information!")
+        
+        with dash_col3:
+            # Goals Progress Card
+            render_section_card("🎯 Goals Progress", "#43a047")
             
-            if alerts:
-                # Alert summary cards at top
-                alert_summary = st.session_state.smart_alerts.create_alerts_summary(alerts)
-                
-                sum_col1, sum_col2, sum_col3, sum_col4 = st.columns(4)
-                
-                with sum_col1:
-                    st.markdown(f"""
-                    <div style='background: linear-gradient(135deg, #f5576c 0%, #f093fb 100%); padding: 20px; border-radius: 10px; text-align: center; margin: 5px;'>
-                        <h3 style='color: white; margin: 0;'>🚨</h3>
-                        <h2 style='color: white; margin: 10px 0;'>{alert_summary['total_alerts']}</h2>
-                        <p style='color: white; margin: 0; opacity: 0.9;'>Total Alerts</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with sum_col2:
-                    st.markdown(f"""
-                    <div style='background: linear-gradient(135deg, #e53e3e 0%, #ff6b35 100%); padding: 20px; border-radius: 10px; text-align: center; margin: 5px;'>
-                        <h3 style='color: white; margin: 0;'>🔴</h3>
-                        <h2 style='color: white; margin: 10px 0;'>{alert_summary['high_severity']}</h2>
-                        <p style='color: white; margin: 0; opacity: 0.9;'>High Priority</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with sum_col3:
-                    st.markdown(f"""
-                    <div style='background: linear-gradient(135deg, #ff9800 0%, #ffb74d 100%); padding: 20px; border-radius: 10px; text-align: center; margin: 5px;'>
-                        <h3 style='color: white; margin: 0;'>🟡</h3>
-                        <h2 style='color: white; margin: 10px 0;'>{alert_summary['medium_severity']}</h2>
-                        <p style='color: white; margin: 0; opacity: 0.9;'>Medium Priority</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+            goals_df = st.session_state.user_goals_df
+            if not goals_df.empty:
+                total_goals = len(goals_df)
+                completed_goals = int((goals_df['progress_percentage'] >= 100).sum())
+                avg_progress = goals_df['progress_percentage'].mean()
                 
-                with sum_col4:
-                    st.markdown(f"""
-                    <div style='background: linear-gradient(135deg, #2196f3 0%, #64b5f6 100%); padding: 20px; border-radius: 10px; text-align: center; margin: 5px;'>
-                        <h3 style='color: white; margin: 0;'>🔵</h3>
-                        <h2 style='color: white; margin: 10px 0;'>{alert_summary['low_severity']}</h2>
-                        <p style='color: white; margin: 0; opacity: 0.9;'>Low Priority</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                st.markdown("<br>", unsafe_allow_html=True)
-                
-                # Alert details in cards
-                st.markdown("""
-                <div style='background: white; border: 1px solid #e0e0e0; border-radius: 15px; padding: 25px; margin: 20px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
-                    <h4 style='color: #f5576c; margin-top: 0;'>📋 Alert Details</h4>
+                st.markdown(f"""
+                <div style='text-align: center; padding: 10px;'>
+                    <h2 style='color: #43a047; margin: 0;'>{total_goals}</h2>
+                    <p style='color: #666; margin: 5px 0;'>Active Goals</p>
+                    <p style='color: #43a047; margin: 0; font-weight: bold;'>{avg_progress:.1f}% Avg Progress</p>
                 </div>
                 """, unsafe_allow_html=True)
                 
-                # Display alerts with better styling
-                for alert in alerts:
-                    severity_colors = {
-                        'high': '#ffebee',
-                        'medium': '#fff3e0', 
-                        'low': '#e3f2fd'
-                    }
-                    border_colors = {
-                        'high': '#f44336',
-                        'medium': '#ff9800',
-                        'low': '#2196f3'
-                    }
-                    
-                    severity = alert.get('severity', 'low')
-                    bg_color = severity_colors.get(severity, '#f5f5f5')
-                    border_color = border_colors.get(severity, '#ddd')
-                    
-                    st.markdown(f"""
-                    <div style='background: {bg_color}; border-left: 4px solid {border_color}; padding: 15px; margin: 10px 0; border-radius: 5px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>
-                        <p style='margin: 0; color: #333; font-weight: 500;'>{alert['message']}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                # Show next goal
+                next_goal = goals_df.loc[goals_df['days_remaining'].idxmin()]
+                st.info(f"⏰ Next: {next_goal['name']} ({next_goal['days_remaining']} days)")
             else:
                 st.markdown("""
-                <div style='text-align: center; padding: 50px; background: linear-gradient(135deg, #43a047 0%, #66bb6a 100%); border-radius: 15px; margin: 20px 0;'>
-                    <h1 style='color: white; margin: 0; font-size: 4em;'>🎉</h1>
-                    <h2 style='color: white; margin: 20px 0;'>All Clear!</h2>
-                    <p style='color: white; opacity: 0.9; font-size: 1.2em;'>No alerts detected - your finances look healthy!</p>
+                <div style='text-align: center; padding: 20px;'>
+                    <p style='color: #666;'>No goals set yet</p>
                 </div>
                 """, unsafe_allow_html=True)
             
-            # Budget Management Card
-            st.markdown("<br>", unsafe_allow_html=True)
-            st.markdown("""
-            <div style='background: white; border: 1px solid #e0e0e0; border-radius: 15px; padding: 25px; margin: 20px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
-                <h4 style='color: #43a047; margin-top: 0;'>💰 Budget Management</h4>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            budget_col1, budget_col2 = st.columns(2)
-            
-            with budget_col1:
-                st.markdown("##### Set New Budget")
-                if 'category' in df.columns:
-                    categories = df['category'].unique()
-                    selected_category = st.selectbox("Category", categories, key="budget_category")
-                    budget_amount = st.number_input(f"Monthly Budget ($)", min_value=0.0, step=50.0, key="budget_amount")
-                    
-                    if st.button("💾 Set Budget", key="set_budget_btn"):
-                        st.session_state.budgets[selected_category] = budget_amount
-                        st.success(f"✅ Budget set for {selected_category}: {format_currency(budget_amount)}")
-                        st.rerun()
-            
-            with budget_col2:
-                st.markdown("##### Current Budgets")
-                if st.session_state.budgets:
-                    for category, amount in st.session_state.budgets.items():
-                        st.markdown(f"""
-                        <div style='background: #f8f9fa; border: 1px solid #e9ecef; padding: 10px; margin: 5px 0; border-radius: 5px; display: flex; justify-content: space-between;'>
-                            <span style='font-weight: 500;'>{category}</span>
-                            <span style='color: #43a047; font-weight: bold;'>{format_currency(amount)}</span>
-                        </div>
-                        """, unsafe_allow_html=True)
-                else:
-                    st.info("No budgets set yet. Set your first budget to get started!")
-        
-        with tab7:
-            st.header("🎯 Financial Goals")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("➕ Create New Goal")
-                
-                goal_name = st.text_input("Goal Name", placeholder="e.g., Emergency Fund")
-                goal_type = st.selectbox("Goal Type", st.session_state.goal_tracker.goal_types)
-                target_amount = st.number_input("Target Amount ($)", min_value=0.0, step=100.0)
-                target_date = st.date_input("Target Date", min_value=datetime.now().date())
-                current_amount = st.number_input("Current Amount ($)", min_value=0.0, step=50.0)
-                
-                if st.button("Create Goal"):
-                    new_goal = st.session_state.goal_tracker.create_goal(
-                        goal_name, target_amount, target_date, goal_type, current_amount
-                    )
-                    st.session_state.user_goals.append(new_goal)
-                    st.success(f"Goal '{goal_name}' created successfully!")
-                    st.rerun()
-            
-            with col2:
-                st.subheader("📋 Your Goals")
-                
-                if st.session_state.user_goals:
-                    for i, goal in enumerate(st.session_state.user_goals):
-                        with st.expander(f"{goal['name']} ({goal['progress_percentage']:.1f}% complete)"):
-                            
-                            # Goal progress chart
-                            progress_fig = st.session_state.goal_tracker.create_goal_progress_chart(goal)
-                            st.plotly_chart(progress_fig, use_container_width=True)
-                            
-                            # Goal details
-                            col_a, col_b = st.columns(2)
-                            with col_a:
-                                st.write(f"**Target:** {format_currency(goal['target_amount'])}")
-                                st.write(f"**Current:** {format_currency(goal['current_amount'])}")
-                                st.write(f"**Target Date:** {goal['target_date']}")
-                            with col_b:
-                                st.write(f"**Status:** {goal['status']}")
-                                st.write(f"**Days Remaining:** {goal['days_remaining']}")
-                                st.write(f"**Monthly Savings Needed:** {format_currency(goal['monthly_savings_needed'])}")
-                            
-                            # Feasibility analysis
-                            feasibility = st.session_state.goal_tracker.analyze_goal_feasibility(goal, df)
-                            st.write(f"**Feasibility:** {feasibility['feasibility']}")
-                            st.write(f"**Success Probability:** {feasibility['success_probability']:.1f}%")
-                            
-                            # Remove goal button
-                            if st.button(f"Remove Goal", key=f"remove_{i}"):
-                                st.session_state.user_goals.pop(i)
-                                st.rerun()
-                else:
-                    st.info("No goals set yet. Create your first goal to get started!")
-            
-            # Goal strategies
-            if st.session_state.user_goals:
-                st.subheader("💡 Savings Strategies")
-                for goal in st.session_state.user_goals[:2]:  # Show strategies for first 2 goals
-                    strategies = st.session_state.goal_tracker.generate_savings_strategies(goal, df)
-                    if strategies:
-                        st.write(f"**Strategies for {goal['name']}:**")
-                        strategy_fig = st.session_state.goal_tracker.create_savings_strategy_chart(strategies)
-                        st.plotly_chart(strategy_fig, use_container_width=True)
-                        
-                        for strategy in strategies[:3]:
-                            st.write(f"• **{strategy['strategy']}**: {strategy['description']}")
+            if st.button("🎯 Manage Goals", key="goals_dash"):
+                st.info("💡 Switch to the Goals tab to create and manage your financial goals!")
         
-        with tab8:
-            st.header("📅 Financial Calendar")
-            
-            # Month/Year selector
-            col1, col2 = st.columns(2)
-            with col1:
-                selected_year = st.selectbox("Year", range(2020, 2030), index=4)  # Default to 2024
-            with col2:
-                selected_month = st.selectbox("Month", range(1, 13), index=datetime.now().month-1)
-            
-            # Generate calendar data
-            calendar_data = st.session_state.financial_calendar.create_calendar_view(df, selected_year, selected_month)
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # Calendar heatmap
-                calendar_fig = st.session_state.financial_calendar.create_calendar_heatmap(calendar_data)
-                st.plotly_chart(calendar_fig, use_container_width=True)
+        st.markdown("<br>", unsafe_allow_html=True)
+        
+        # Quick Actions Section
+        st.markdown("""
+        <div style='background: linear-gradient(90deg, #667eea 0%, #764ba2 100%); padding: 20px; border-radius: 10px; margin: 20px 0;'>
+            <h3 style='color: white; text-align: center; margin: 0;'>⚡ Quick Actions</h3>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        action_col1, action_col2, action_col3, action_col4 = st.columns(4)
+        
+        with action_col1:
+            if st.button("💬 Ask AI Assistant", key="quick_chat"):
+                st.info("💡 Go to AI Chat tab to ask questions about your finances!")
+        
+        with action_col2:
+            if st.button("📈 View Analytics", key="quick_analytics"):
+                st.info("💡 Go to Analytics tab for detailed spending analysis!")
+        
+        with action_col3:
+            if st.button("🔮 See Predictions", key="quick_predictions"):
+                st.info("💡 Go to Predictions tab to forecast future spending!")
+        
+        with action_col4:
+            if st.button("📅 Calendar View", key="quick_calendar"):
+                st.info("💡 Go to Calendar tab to see spending patterns by date!")
+        
+        # Recent Activity Section
+        st.markdown("""
+        <div style='margin-top: 30px;'>
+            <h3 style='color: #667eea;'>📋 Recent Activity</h3>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Show recent transactions as a single styled table
+        recent_transactions = df.iloc[:5]
+        recent_view = pd.DataFrame({
+            'Date': recent_transactions['date'].dt.strftime('%Y-%m-%d'),
+            'Description': recent_transactions['description'],
+            'Amount': recent_transactions['amount']
+        })
+        
+        st.dataframe(
+            recent_view.style
+                .format(format_currency, subset=['Amount'])
+                .map(lambda amount: 'color: #e53e3e' if amount < 0 else 'color: #43a047', subset=['Amount']),
+            use_container_width=True,
+            hide_index=True
+        )
+    
+    with tab1:
+        st.header("💬 Ask Your Finance Assistant")
+        st.markdown("Ask questions about your spending habits in natural language!")
+        
+        # Chat interface
+        user_question = st.text_input(
+            "Ask a question about your finances:",
+            placeholder="e.g., How much did I spend on food last month?",
+            key="user_input"
+        )
+        
+        vector_store = st.session_state.vector_store
+        search_ready = vector_store is None or vector_store.is_ready()
+        if not search_ready:
+            st.info("⏳ Indexing your transactions for semantic search. Chat will be available in a moment.")
+        elif vector_store is not None and vector_store.ingest_future is not None and not vector_store.ingest_future.result():
+            st.warning("⚠️ Semantic search is unavailable for this file; answers will use summary statistics only.")
+        
+        if st.button("Ask", disabled=not search_ready) and user_question:
+            with st.spinner("Analyzing your financial data..."):
+                # Get response from conversation handler
+                response = st.session_state.conversation_handler.get_response(
+                    user_question, 
+                    vector_store,
+                    df
+                )
                 
-                # Month statistics
-                st.subheader("📊 Month Statistics")
-                month_stats = calendar_data['month_stats']
-                st.metric("Total Spending", format_currency(month_stats['total_spending']))
-                st.metric("Total Income", format_currency(month_stats['total_income']))
-                st.metric("Net Flow", format_currency(month_stats['net_flow']))
-                st.metric("Transaction Count", month_stats['transaction_count'])
-                st.metric("Most Active Day", month_stats['most_active_day'])
+                # Add to chat history
+                st.session_state.chat_history.append({
+                    "question": user_question,
+                    "answer": response,
+                    "timestamp": datetime.now()
+                })
+        
+        # Display chat history
+        if st.session_state.chat_history:
+            st.subheader("💭 Conversation History")
+            for i, chat in enumerate(reversed(st.session_state.chat_history[-5:])):  # Show last 5
+                with st.expander(f"Q: {chat['question'][:50]}...", expanded=(i==0)):
+                    st.write(f"**Question:** {chat['question']}")
+                    st.write(f"**Answer:** {chat['answer']}")
+                    st.write(f"*{chat['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}*")
+    
+    with tab2:
+        st.header("📈 Financial Analytics")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Spending by category pie chart
+            st.subheader("Spending by Category")
+            fig_pie = _category_pie_fig(st.session_state.agg['cat_totals'])
+            st.plotly_chart(fig_pie, use_container_width=True)
+        
+        with col2:
+            # Monthly spending trend
+            st.subheader("Monthly Spending Trend")
+            monthly_spending = _monthly_trend_fig(df)
+            st.plotly_chart(monthly_spending, use_container_width=True)
+        
+        # Top spending categories
+        st.subheader("📊 Top Spending Categories")
+        fig_bar = _top_categories_fig(st.session_state.agg['cat_totals'].head(10))
+        st.plotly_chart(fig_bar, use_container_width=True)
+    
+    with tab3:
+        st.header("🔍 Transaction Explorer")
+        
+        # Filters
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            categories = ['All'] + st.session_state.categories
+            selected_category = st.selectbox("Filter by Category", categories)
+        
+        with col2:
+            date_range = st.date_input(
+                "Date Range",
+                value=(df['date'].min(), df['date'].max()),
+                min_value=df['date'].min(),
+                max_value=df['date'].max()
+            )
+        
+        with col3:
+            amount_range = st.slider(
+                "Amount Range",
+                float(df['amount'].min()),
+                float(df['amount'].max()),
+                (float(df['amount'].min()), float(df['amount'].max()))
+            )
+        
+        # Filter data with a single combined mask
+        mask = np.ones(len(df), dtype=bool)
+        
+        if selected_category != 'All':
+            mask &= np.asarray(df['category'].values == selected_category)
+        
+        if len(date_range) == 2:
+            start_day = np.datetime64(date_range[0], 'D')
+            end_day = np.datetime64(date_range[1], 'D')
+            dates = df['date'].values
+            mask &= (dates >= start_day) & (dates <= end_day)
+        
+        amounts = df['amount'].values
+        mask &= (amounts >= amount_range[0]) & (amounts <= amount_range[1])
+        
+        filtered_df = df.loc[mask]
+        
+        # Display filtered transactions
+        st.subheader(f"📋 Transactions ({len(filtered_df)} found)")
+        
+        if len(filtered_df) > 0:
+            # Format for display, building only the columns that are shown;
+            # amounts stay numeric and are formatted as currency by the frontend
+            display_df = pd.DataFrame({
+                'date': filtered_df['date'].dt.strftime('%Y-%m-%d'),
+                'description': filtered_df['description'],
+                'amount': filtered_df['amount'],
+                'category': filtered_df['category']
+            })
             
-            with col2:
-                # Spending patterns
-                if calendar_data['patterns']:
-                    pattern_fig = st.session_state.financial_calendar.create_spending_pattern_chart(calendar_data['patterns'])
-                    st.plotly_chart(pattern_fig, use_container_width=True)
-                
-                # Calendar insights
-                insights = st.session_state.financial_calendar.get_calendar_insights(calendar_data)
-                st.subheader("💡 Calendar Insights")
-                for insight in insights:
-                    st.info(insight)
+            st.dataframe(
+                display_df,
+                use_container_width=True,
+                column_config={'amount': st.column_config.NumberColumn(format="dollar")}
+            )
             
-            # Daily cash flow
-            st.subheader("💰 Daily Cash Flow")
-            flow_fig = st.session_state.financial_calendar.create_monthly_flow_chart(df)
-            st.plotly_chart(flow_fig, use_container_width=True)
+            # Download filtered data
+            st.download_button(
+                label="📥 Download Filtered Data",
+                data=_to_csv_bytes(filtered_df),
+                file_name=f"filtered_transactions_{datetime.now().strftime('%Y%m%d')}.csv",
+                mime="text/csv"
+            )
+        else:
+            st.info("No transactions found matching the selected filters.")
     
-    else:
-        # Enhanced welcome screen with proper branding
+    with tab4:
+        # Enhanced Health Score Layout
         st.markdown("""
-        <div style='text-align: center; padding: 50px 20px; margin: 50px 0;'>
-            <h1 style='color: #667eea; font-size: 4em; margin: 0; font-weight: 300;'>🚀 AI FinancePilot</h1>
-            <h2 style='color: #764ba2; margin: 30px 0; font-weight: 300; font-size: 2em;'>Your Intelligent Financial Co-Pilot</h2>
-            <p style='color: #666; font-size: 1.4em; margin: 40px 0; max-width: 800px; margin-left: auto; margin-right: auto; line-height: 1.6;'>
-                Transform your financial data into actionable insights with revolutionary AI-powered analytics
-            </p>
+        <div style='text-align: center; margin-bottom: 30px;'>
+            <h2 style='color: #667eea;'>🏥 Financial Health Analysis</h2>
+            <p style='color: #666; font-size: 1.1em;'>Comprehensive assessment of your financial wellness</p>
         </div>
         """, unsafe_allow_html=True)
         
-        # Getting Started Card
-        st.markdown("""
-        <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; border-radius: 15px; margin: 40px 0; text-align: center;'>
-            <h3 style='margin: 0 0 20px 0; font-size: 1.8em;'>👆 Get Started</h3>
-            <p style='margin: 0; opacity: 0.9; font-size: 1.2em;'>Upload your bank statement using the sidebar to unlock powerful financial insights</p>
-        </div>
-        """, unsafe_allow_html=True)
+        # Calculate health score
+        health_data = _compute_health(df)
         
-        # Requirements and Features
         col1, col2 = st.columns(2)
         
         with col1:
+            # Health Score Card
             st.markdown("""
-            <div style='background: white; border: 1px solid #e0e0e0; border-radius: 15px; padding: 25px; margin: 20px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
-                <h4 style='color: #667eea; margin-top: 0;'>📋 File Requirements</h4>
-                <p style='margin: 0; color: #333;'>Your CSV/Excel file should contain:</p>
-                <ul style='color: #666; margin: 15px 0;'>
-                    <li><strong>Date</strong> column (transaction dates)</li>
-                    <li><strong>Description</strong> column (transaction details)</li>
-                    <li><strong>Amount</strong> column (transaction amounts)</li>
-                </ul>
+            <div style='background: white; border: 1px solid #e0e0e0; border-radius: 15px; padding: 25px; margin: 10px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
+                <h4 style='color: #667eea; margin-top: 0; text-align: center;'>📊 Overall Health Score</h4>
             </div>
             """, unsafe_allow_html=True)
+            
+            health_fig = _health_fig(health_data)
+            st.plotly_chart(health_fig, use_container_width=True, config=STATIC_CHART_CONFIG)
+            
+            # Health insights in cards
+            st.markdown("""
+            <div style='background: white; border: 1px solid #e0e0e0; border-radius: 15px; padding: 25px; margin: 15px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
+                <h4 style='color: #4facfe; margin-top: 0;'>💡 Key Insights</h4>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            for insight in health_data['insights']:
+                st.markdown(f"""
+                <div style='background: #f8f9fa; border-left: 4px solid #4facfe; padding: 15px; margin: 10px 0; border-radius: 5px;'>
+                    <p style='margin: 0; color: #333;'>{insight}</p>
+                </div>
+                """, unsafe_allow_html=True)
         
         with col2:
+            # Component scores card
             st.markdown("""
-            <div style='background: white; border: 1px solid #e0e0e0; border-radius: 15px; padding: 25px; margin: 20px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
-                <h4 style='color: #43a047; margin-top: 0;'>🎯 What You Can Do</h4>
-                <ul style='color: #666; margin: 15px 0;'>
-                    <li>🤖 <strong>AI Chat</strong>: Natural language queries</li>
-                    <li>📊 <strong>Analytics</strong>: Beautiful charts & insights</li>
-                    <li>🏥 <strong>Health Score</strong>: Financial wellness rating</li>
-                    <li>🔮 <strong>Predictions</strong>: Future spending forecasts</li>
-                    <li>🚨 <strong>Smart Alerts</strong>: Proactive notifications</li>
-                    <li>🎯 <strong>Goals</strong>: Savings strategy recommendations</li>
-                </ul>
+            <div style='background: white; border: 1px solid #e0e0e0; border-radius: 15px; padding: 25px; margin: 10px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
+                <h4 style='color: #667eea; margin-top: 0; text-align: center;'>🎯 Component Analysis</h4>
             </div>
             """, unsafe_allow_html=True)
-        
-        # Example Questions Card
-        st.markdown("""
-        <div style='background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%); color: white; padding: 25px; border-radius: 15px; margin: 30px 0;'>
-            <h4 style='margin: 0 0 20px 0; text-align: center;'>💬 Example Questions You Can Ask</h4>
-            <div style='display: grid; grid-template-columns: 1fr 1fr; gap: 15px; margin: 0;'>
-                <div style='background: rgba(255,255,255,0.1); padding: 15px; border-radius: 8px;'>
-                    <p style='margin: 0; opacity: 0.9;'>"How much did I spend on food last month?"</p>
-                </div>
-                <div style='background: rgba(255,255,255,0.1); padding: 15px; border-radius: 8px;'>
-                    <p style='margin: 0; opacity: 0.9;'>"What's my biggest expense category?"</p>
-                </div>
-                <div style='background: rgba(255,255,255,0.1); padding: 15px; border-radius: 8px;'>
-                    <p style='margin: 0; opacity: 0.9;'>"Show me my travel expenses for the last 6 months"</p>
-                </div>
-                <div style='background: rgba(255,255,255,0.1); padding: 15px; border-radius: 8px;'>
-                    <p style='margin: 0; opacity: 0.9;'>"How does my spending compare to last year?"</p>
-                </div>
+            
+            component_fig = _component_fig(health_data['component_scores'])
+            st.plotly_chart(component_fig, use_container_width=True)
+            
+            # Improvement tips in cards
+            st.markdown("""
+            <div style='background: white; border: 1px solid #e0e0e0; border-radius: 15px; padding: 25px; margin: 15px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
+                <h4 style='color: #43a047; margin-top: 0;'>🚀 Improvement Tips</h4>
             </div>
-        </div>
-        """, unsafe_allow_html=True)
+            """, unsafe_allow_html=True)
+            
+            render_items(TIP_ITEM_TPL, [{'tip': tip} for tip in health_data['improvement_tips']])
+    
+    with tab5:
+        _render_predictions(df)
+    
+    with tab6:
+        _render_alerts(df)
+    
+    with tab7:
+        _render_goals(df)
+    
+    with tab8:
+        _render_calendar(df)
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,24 @@
 import streamlit as st
 import pandas as pd
-from typing import List, Dict, Any, Optional
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
 import json
 import os
 from datetime import datetime, timedelta
 import re
 from openai import OpenAI
+from utils import income_expense_totals
+
+# Prompt text shared by every request, kept constant so the message prefix is cacheable
+SYSTEM_PROMPT = """You are a knowledgeable personal finance assistant. 
+Analyze the provided financial data and answer the user's question accurately.
+Provide specific numbers, dates, and actionable insights.
+Format your response in a clear, conversational manner.
+If calculations are needed, show the math.
+Always be helpful and encouraging about financial management."""
+
+DATA_INSTRUCTIONS = """You will receive a financial data context followed by a user question.
+Please provide a comprehensive answer based on the data provided."""
 
 class ConversationHandler:
     """Handles conversational AI interactions for financial queries."""
@@ -21,6 +34,24 @@ class ConversationHandler:
         
         self.conversation_memory = []
         
+        # Query phrases mapped to time periods, matched with a single regex search
+        self.time_patterns = {
+            "last month": "last_month",
+            "this month": "current_month",
+            "last year": "last_year",
+            "this year": "current_year",
+            "last 6 months": "last_6_months",
+            "last week": "last_week"
+        }
+        self._time_regex = re.compile('|'.join(re.escape(pattern) for pattern in self.time_patterns))
+        
+        # Category alternations, built once per distinct set of categories
+        self._category_regex_cache = {}
+        
+        # Whole-dataframe aggregates, reused across queries until a different dataframe arrives
+        self._agg_df: Optional[pd.DataFrame] = None
+        self._aggs: Dict[str, Any] = {}
+        
     def get_response(self, user_query: str, vector_store, df: pd.DataFrame) -> str:
         """Generate a response to user's financial query."""
         try:
@@ -78,60 +109,41 @@ class ConversationHandler:
             analysis["intent"] = "recommendation"
         
         # Extract time periods
-        time_patterns = {
-            "last month": "last_month",
-            "this month": "current_month",
-            "last year": "last_year",
-            "this year": "current_year",
-            "last 6 months": "last_6_months",
-            "last week": "last_week"
-        }
-        
-        for pattern, period in time_patterns.items():
-            if pattern in query_lower:
-                analysis["time_period"] = period
-                break
+        time_match = self._time_regex.search(query_lower)
+        if time_match:
+            analysis["time_period"] = self.time_patterns[time_match.group(0)]
         
         # Extract categories
-        categories = df['category'].unique() if 'category' in df.columns else []
-        for category in categories:
-            if category.lower() in query_lower:
-                analysis["category"] = category
-                break
+        if 'category' in df.columns:
+            category_regex, category_names = self._category_matcher(df['category'])
+            category_match = category_regex.search(query_lower)
+            if category_match:
+                analysis["category"] = category_names[category_match.group(0)]
         
         return analysis
     
+    def _category_matcher(self, categories: pd.Series) -> Tuple[re.Pattern, Dict[str, Any]]:
+        """Compiled alternation of lowercased category names (longest first) and a map back to the originals."""
+        if isinstance(categories.dtype, pd.CategoricalDtype):
+            names = tuple(categories.cat.categories)
+        else:
+            names = tuple(categories.unique())
+        
+        if names not in self._category_regex_cache:
+            lowered = {str(name).lower(): name for name in names}
+            pattern = '|'.join(re.escape(name) for name in sorted(lowered, key=len, reverse=True))
+            # An empty alternation would match everywhere, so use a pattern that never matches
+            self._category_regex_cache[names] = (re.compile(pattern or r'(?!)'), lowered)
+        
+        return self._category_regex_cache[names]
+    
     def _generate_response(self, query: str, relevant_transactions: List[Dict], 
                           analysis: Dict[str, Any], df: pd.DataFrame) -> str:
         """Generate AI response based on query analysis and relevant data."""
-        
-        # Prepare context for the AI
-        context = self._prepare_context(relevant_transactions, analysis, df)
-        
-        # Create the prompt
-        system_prompt = """You are a knowledgeable personal finance assistant. 
-        Analyze the provided financial data and answer the user's question accurately.
-        Provide specific numbers, dates, and actionable insights.
-        Format your response in a clear, conversational manner.
-        If calculations are needed, show the math.
-        Always be helpful and encouraging about financial management."""
-        
-        user_prompt = f"""
-        User Question: {query}
-        
-        Financial Data Context:
-        {context}
-        
-        Please provide a comprehensive answer based on the data provided.
-        """
-        
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=self._build_messages(query, relevant_transactions, analysis, df),
                 max_tokens=500,
                 temperature=0.3
             )
@@ -142,6 +154,21 @@ class ConversationHandler:
             # Fallback to rule-based response
             return self._generate_fallback_response(query, analysis, df)
     
+    def _build_messages(self, query: str, relevant_transactions: List[Dict],
+                        analysis: Dict[str, Any], df: pd.DataFrame) -> List[Dict[str, str]]:
+        """Build the chat messages for a query."""
+        
+        # Prepare context for the AI
+        context = self._prepare_context(relevant_transactions, analysis, df)
+        
+        # Static messages come first so every request shares a byte-identical
+        # prefix that the API's prompt caching can reuse; only the last one varies
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": DATA_INSTRUCTIONS},
+            {"role": "user", "content": f"Financial Data Context:\n{context}\n\nUser Question: {query}"}
+        ]
+    
     def _prepare_context(self, relevant_transactions: List[Dict], 
                         analysis: Dict[str, Any], df: pd.DataFrame) -> str:
         """Prepare context string for AI prompt."""
@@ -179,22 +206,42 @@ class ConversationHandler:
             filtered_df = filtered_df[filtered_df['category'] == analysis["category"]]
         
         # Calculate totals
-        total_spent = filtered_df[filtered_df['amount'] < 0]['amount'].sum()
-        total_income = filtered_df[filtered_df['amount'] > 0]['amount'].sum()
+        total_income, total_spent = income_expense_totals(filtered_df['amount'])
         
-        summary_parts.append(f"Total Expenses: ${abs(total_spent):.2f}")
+        summary_parts.append(f"Total Expenses: ${total_spent:.2f}")
         summary_parts.append(f"Total Income: ${total_income:.2f}")
-        summary_parts.append(f"Net: ${total_income + total_spent:.2f}")
+        summary_parts.append(f"Net: ${total_income - total_spent:.2f}")
         summary_parts.append(f"Number of transactions: {len(filtered_df)}")
         
         return "\n".join(summary_parts)
     
+    def _get_aggs(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Spending aggregates for df, computed once per dataframe."""
+        # Holding a reference to the dataframe keeps its identity from being reused
+        if df is not self._agg_df:
+            is_expense = df['is_expense'] if 'is_expense' in df.columns else df['amount'] < 0
+            expenses = df[is_expense]
+            self._aggs = {
+                'category_spending': (
+                    expenses.groupby('category', observed=True)['amount'].sum().abs().sort_values(ascending=False)
+                    if 'category' in df.columns else pd.Series(dtype=float)
+                ),
+                'monthly_spending': (
+                    expenses.groupby('month_year', observed=True)['amount'].sum().abs()
+                    if 'month_year' in df.columns else pd.Series(dtype=float)
+                ),
+                'newest_first': df['date'].is_monotonic_decreasing
+            }
+            self._agg_df = df
+        
+        return self._aggs
+    
     def _get_category_summary(self, df: pd.DataFrame) -> str:
         """Generate category breakdown summary."""
         if 'category' not in df.columns:
             return "Category information not available."
         
-        category_spending = df[df['amount'] < 0].groupby('category')['amount'].sum().abs().sort_values(ascending=False)
+        category_spending = self._get_aggs(df)['category_spending']
         
         summary_parts = ["Category Breakdown:"]
         for category, amount in category_spending.head(5).items():
@@ -204,7 +251,7 @@ class ConversationHandler:
     
     def _get_trend_summary(self, df: pd.DataFrame) -> str:
         """Generate trend analysis summary."""
-        monthly_spending = df[df['amount'] < 0].groupby('month_year')['amount'].sum().abs()
+        monthly_spending = self._get_aggs(df)['monthly_spending']
         
         summary_parts = ["Monthly Spending Trend:"]
         for month, amount in monthly_spending.tail(6).items():
@@ -246,7 +293,18 @@ class ConversationHandler:
         else:
             return df
         
-        return df[(df['date'] >= start_date) & (df['date'] <= end_date)]
+        return self._slice_dates(df, start_date, end_date)
+    
+    def _slice_dates(self, df: pd.DataFrame, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """Rows dated within [start_date, end_date], by binary search when sorted newest first."""
+        if not self._get_aggs(df)['newest_first']:
+            return df[(df['date'] >= start_date) & (df['date'] <= end_date)]
+        
+        # Search the ascending (reversed) view, then map the bounds back to positions in df
+        ascending_dates = df['date'].to_numpy()[::-1]
+        lo = ascending_dates.searchsorted(np.datetime64(start_date), side='left')
+        hi = ascending_dates.searchsorted(np.datetime64(end_date), side='right')
+        return df.iloc[len(df) - hi:len(df) - lo]
     
     def _generate_fallback_response(self, query: str, analysis: Dict[str, Any], df: pd.DataFrame) -> str:
         """Generate a basic response when AI is not available."""
@@ -264,7 +322,7 @@ class ConversationHandler:
         
         elif analysis["intent"] == "category_analysis":
             if 'category' in df.columns:
-                top_category = df[df['amount'] < 0].groupby('category')['amount'].sum().abs().idxmax()
+                top_category = self._get_aggs(df)['category_spending'].idxmax()
                 return f"Your highest spending category is {top_category}."
         
         return "I can help you analyze your financial data. Please try rephrasing your question or upload your transaction data first."
@@ -277,8 +335,9 @@ class ConversationHandler:
             return ["Upload transaction data to get personalized budget recommendations."]
         
         # Analyze spending patterns
-        monthly_spending = df[df['amount'] < 0].groupby('month_year')['amount'].sum().abs()
-        category_spending = df[df['amount'] < 0].groupby('category')['amount'].sum().abs()
+        aggs = self._get_aggs(df)
+        monthly_spending = aggs['monthly_spending']
+        category_spending = aggs['category_spending']
         
         # High spending categories
         if len(category_spending) > 0:
@@ -4,6 +4,17 @@ from datetime import datetime
 import numpy as np
 from typing import Optional, Dict, Any
 import io
+from utils import income_expense_totals, NON_NUMERIC_PATTERN
+
+# Arrow-backed strings are far more compact than per-cell Python objects,
+# and Arrow's multithreaded CSV reader outpaces the C engine
+try:
+    import pyarrow  # noqa: F401
+    DESCRIPTION_DTYPE = 'string[pyarrow]'
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    DESCRIPTION_DTYPE = 'string'
+    CSV_ENGINE = 'c'
 
 class DataProcessor:
     """Handles loading and preprocessing of financial data files."""
@@ -16,15 +27,23 @@ class DataProcessor:
             'description': ['description', 'desc', 'memo', 'Description', 'Memo', 'Transaction Description'],
             'amount': ['amount', 'Amount', 'transaction_amount', 'debit', 'credit', 'Transaction Amount']
         }
+        self.optional_columns = ['category', 'type', 'account', 'balance']
+        
+        # Inverted lookup: lowercased alias -> standard field name
+        self.alias_to_field = {
+            alias.lower(): field
+            for field, aliases in self.column_mappings.items()
+            for alias in aliases
+        }
     
     def load_file(self, uploaded_file) -> Optional[pd.DataFrame]:
         """Load and preprocess uploaded financial data file."""
         try:
             # Determine file type and read accordingly
             if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
+                df = self._read_table(pd.read_csv, uploaded_file, engine=CSV_ENGINE)
             elif uploaded_file.name.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(uploaded_file)
+                df = self._read_table(pd.read_excel, uploaded_file)
             else:
                 st.error("Unsupported file format. Please upload CSV or Excel files.")
                 return None
@@ -42,6 +61,34 @@ class DataProcessor:
             st.error(f"Error reading file: {str(e)}")
             return None
     
+    def _read_table(self, reader, uploaded_file, **read_kwargs) -> pd.DataFrame:
+        """Read only the columns we can map, using the header to pick them.
+        
+        read_kwargs apply to the full read only, since the header sniff needs nrows.
+        """
+        header = reader(uploaded_file, nrows=0).columns
+        uploaded_file.seek(0)
+        
+        wanted = {}
+        for col in header:
+            name = str(col).lower().strip()
+            if name in self.alias_to_field:
+                wanted[col] = self.alias_to_field[name]
+            elif name in self.optional_columns:
+                wanted[col] = name
+        
+        # Fall back to a full read so column mapping can report what is missing
+        if not set(self.required_columns).issubset(wanted.values()):
+            return reader(uploaded_file, **read_kwargs)
+        
+        # Descriptions are always text; skip type inference for them
+        text_columns = {col: str for col, field in wanted.items() if field == 'description'}
+        
+        # Parse dates while reading so cleaning only has to coerce leftovers
+        date_columns = [col for col, field in wanted.items() if field == 'date']
+        return reader(uploaded_file, usecols=list(wanted), dtype=text_columns, parse_dates=date_columns,
+                      **read_kwargs)
+    
     def _clean_dataframe(self, df: pd.DataFrame) -> Optional[pd.DataFrame]:
         """Clean and standardize the dataframe structure."""
         try:
@@ -68,26 +115,21 @@ class DataProcessor:
     
     def _map_columns(self, df: pd.DataFrame) -> Optional[pd.DataFrame]:
         """Map column names to standard format."""
-        df_copy = df.copy()
         column_mapping = {}
         
-        # Find matching columns for each required field
+        # Single pass over the columns; the first column matching a field wins
+        for col in df.columns:
+            field = self.alias_to_field.get(col.lower().strip())
+            if field is not None and field not in column_mapping.values():
+                column_mapping[col] = field
+        
         for required_col in self.required_columns:
-            found_column = None
-            
-            for col in df_copy.columns:
-                if col.lower().strip() in [mapping.lower() for mapping in self.column_mappings[required_col]]:
-                    found_column = col
-                    break
-            
-            if found_column:
-                column_mapping[found_column] = required_col
-            else:
-                st.error(f"Required column '{required_col}' not found. Available columns: {list(df_copy.columns)}")
+            if required_col not in column_mapping.values():
+                st.error(f"Required column '{required_col}' not found. Available columns: {list(df.columns)}")
                 return None
         
-        # Rename columns
-        df_copy = df_copy.rename(columns=column_mapping)
+        # Rename columns (returns a new frame, so no upfront copy is needed)
+        df_copy = df.rename(columns=column_mapping)
         
         # Keep only required columns and any additional useful columns
         columns_to_keep = self.required_columns.copy()
@@ -100,26 +142,27 @@ class DataProcessor:
         return df_copy[columns_to_keep]
     
     def _clean_data_types(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Clean and convert data types."""
-        df_copy = df.copy()
-        
+        """Clean and convert data types in place."""
         # Clean and convert date column
         try:
-            df_copy['date'] = pd.to_datetime(df_copy['date'], errors='coerce')
+            df['date'] = pd.to_datetime(df['date'], errors='coerce')
         except Exception as e:
             st.warning(f"Date conversion issues: {str(e)}")
-            df_copy['date'] = pd.to_datetime(df_copy['date'], errors='coerce', infer_datetime_format=True)
+            df['date'] = pd.to_datetime(df['date'], errors='coerce', infer_datetime_format=True)
+        
+        # Transactions are day-granular; drop any time-of-day component once here
+        df['date'] = df['date'].dt.normalize()
         
         # Clean and convert amount column
-        if df_copy['amount'].dtype == 'object':
+        if df['amount'].dtype == 'object':
             # Remove currency symbols and convert to numeric
-            df_copy['amount'] = df_copy['amount'].astype(str).str.replace(r'[^\d.-]', '', regex=True)
-            df_copy['amount'] = pd.to_numeric(df_copy['amount'], errors='coerce')
+            df['amount'] = df['amount'].astype(str).str.replace(NON_NUMERIC_PATTERN, '', regex=True)
+            df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
         
-        # Clean description column
-        df_copy['description'] = df_copy['description'].astype(str).str.strip()
+        # Clean description column; missing values stay NA so invalid rows are dropped
+        df['description'] = df['description'].astype(DESCRIPTION_DTYPE).str.strip()
         
-        return df_copy
+        return df
     
     def _remove_invalid_transactions(self, df: pd.DataFrame) -> pd.DataFrame:
         """Remove transactions with invalid or missing data."""
@@ -141,37 +184,38 @@ class DataProcessor:
         return df_clean
     
     def _add_derived_columns(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Add useful derived columns."""
-        df_copy = df.copy()
-        
-        # Add transaction type (debit/credit)
-        df_copy['transaction_type'] = df_copy['amount'].apply(
-            lambda x: 'credit' if x > 0 else 'debit'
+        """Add useful derived columns in place."""
+        # Add transaction type (debit/credit) in one vectorized pass; two labels fit int8 codes
+        df['transaction_type'] = pd.Categorical(
+            np.where(df['amount'].to_numpy() > 0, 'credit', 'debit'), categories=['credit', 'debit']
         )
         
-        # Add absolute amount for easier analysis
-        df_copy['abs_amount'] = df_copy['amount'].abs()
+        # Add absolute amount and expense flag for easier analysis
+        df['abs_amount'] = df['amount'].abs()
+        df['is_expense'] = df['amount'] < 0
         
-        # Add month and year columns
-        df_copy['month'] = df_copy['date'].dt.month
-        df_copy['year'] = df_copy['date'].dt.year
-        df_copy['month_year'] = df_copy['date'].dt.to_period('M')
+        # Add month and year columns (small integers, so store them narrow)
+        df['month'] = df['date'].dt.month.astype('int8')
+        df['year'] = df['date'].dt.year.astype('int16')
+        # Categorical month keys make the many per-month groupbys work on integer codes
+        df['month_year'] = df['date'].dt.to_period('M').astype('category')
         
         # Add day of week
-        df_copy['day_of_week'] = df_copy['date'].dt.day_name()
+        df['day_of_week'] = df['date'].dt.day_name()
         
-        return df_copy
+        return df
     
     def get_summary_stats(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Generate summary statistics for the dataset."""
+        total_credits, total_debits = income_expense_totals(df['amount'])
         return {
             'total_transactions': len(df),
             'date_range': {
                 'start': df['date'].min(),
                 'end': df['date'].max()
             },
-            'total_debits': df[df['amount'] < 0]['amount'].sum(),
-            'total_credits': df[df['amount'] > 0]['amount'].sum(),
+            'total_debits': -total_debits,
+            'total_credits': total_credits,
             'net_amount': df['amount'].sum(),
             'avg_transaction': df['amount'].mean(),
             'unique_descriptions': df['description'].nunique()
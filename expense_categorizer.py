@@ -1,9 +1,17 @@
 import pandas as pd
 import streamlit as st
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 import re
 import os
+from collections import Counter
+
+# Word tokenizer and stop words for custom category suggestions
+WORD_PATTERN = re.compile(r'\b[a-zA-Z]{3,}\b')
+SUGGESTION_STOP_WORDS = frozenset({'the', 'and', 'for', 'with', 'from', 'payment', 'transaction'})
+
+# Marks descriptions absent from the shared category cache (a cached None means "no match")
+_MISSING = object()
 
 class ExpenseCategorizer:
     """Automatically categorizes expenses using transformer models."""
@@ -80,6 +88,22 @@ class ExpenseCategorizer:
                 "payment to", "send money"
             ]
         }
+        
+        # Precompiled alternations used by the vectorized categorization pass
+        self.income_keywords = ["salary", "payroll", "deposit", "refund", "cashback", "dividend"]
+        self.income_pattern = '|'.join(re.escape(keyword) for keyword in self.income_keywords)
+        self.category_patterns = {
+            category: '|'.join(re.escape(keyword) for keyword in keywords)
+            for category, keywords in self.keyword_mappings.items()
+        }
+        
+        # Keyword category per lowercased description, reused across categorization runs
+        # (None marks descriptions that matched no keyword)
+        self.description_categories: Dict[str, Any] = {}
+        self.max_cached_descriptions = 50000
+        
+        # Single-transaction results (including classifier calls) by description and sign
+        self.single_transaction_categories: Dict[Tuple[str, bool], str] = {}
     
     def _initialize_classifier(self):
         """Initialize the transformer-based classifier."""
@@ -89,37 +113,80 @@ class ExpenseCategorizer:
         st.info("🔍 Using keyword-based categorization (AI categorization coming soon!)")
     
     def categorize_transactions(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Categorize all transactions in the dataframe."""
-        df_copy = df.copy()
-        
+        """Categorize all transactions, adding the category column to df in place."""
         # Add category column if it doesn't exist
-        if 'category' not in df_copy.columns:
-            df_copy['category'] = 'Other'
-        
-        total_transactions = len(df_copy)
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        for i, (idx, row) in enumerate(df_copy.iterrows()):
-            # Update progress
-            progress = min(1.0, (i + 1) / total_transactions)
-            progress_bar.progress(progress)
-            status_text.text(f"Categorizing transaction {i + 1} of {total_transactions}")
+        if 'category' not in df.columns:
+            df['category'] = 'Other'
+        
+        descriptions = df['description'].astype(str).str.lower()
+        amounts = df['amount'] if 'amount' in df.columns else pd.Series(0, index=df.index)
+        
+        # Statements repeat the same merchants, so match each distinct description once
+        codes, unique_descriptions = pd.factorize(descriptions)
+        unique_descriptions = pd.Series(unique_descriptions, dtype=object)
+        
+        # Only descriptions not seen in an earlier run need regex matching
+        # One lookup per description, so another session clearing the shared cache
+        # can't leave a description both unmatched and marked as seen
+        cache = self.description_categories
+        looked_up = [cache.get(description, _MISSING) for description in unique_descriptions]
+        unseen = np.array([category is _MISSING for category in looked_up], dtype=bool)
+        known = pd.Series([None if category is _MISSING else category for category in looked_up], dtype=object)
+        if unseen.any():
+            new_descriptions = unique_descriptions[unseen]
+            
+            # One regex mask per category; np.select takes the first matching category
+            # in dict order, the same precedence as the per-row keyword check
+            masks = [new_descriptions.str.contains(pattern, regex=True).to_numpy()
+                     for pattern in self.category_patterns.values()]
+            matched = np.select(masks, list(self.category_patterns.keys()), default=None)
+            known[unseen] = matched
             
-            # Categorize the transaction
-            category = self._categorize_single_transaction(row['description'], row.get('amount', 0))
-            df_copy.at[idx, 'category'] = category
+            if len(cache) + len(new_descriptions) > self.max_cached_descriptions:
+                cache.clear()
+            cache.update(zip(new_descriptions, matched))
         
-        # Clean up progress indicators
-        progress_bar.empty()
-        status_text.empty()
+        unique_categories = known
         
-        return df_copy
+        # If keyword categorization fails and transformer is available, use AI
+        remaining = unique_categories.isna()
+        if self.classifier is not None and remaining.any():
+            unique_categories[remaining] = [
+                self._categorize_single_transaction(description)
+                for description in unique_descriptions[remaining]
+            ]
+        
+        categories = unique_categories.fillna("Other").to_numpy()[codes]
+        
+        # Special handling for income (positive amounts with specific keywords)
+        income_hits = unique_descriptions.str.contains(self.income_pattern, regex=True).to_numpy()[codes]
+        categories[(amounts.to_numpy() > 0) & income_hits] = "Income"
+        
+        # Fixed category set, alphabetical so grouped output keeps a stable order
+        df['category'] = pd.Categorical(categories, categories=sorted(self.categories))
+        
+        return df
     
     def _categorize_single_transaction(self, description: str, amount: float = 0) -> str:
         """Categorize a single transaction."""
         description = str(description).lower().strip()
         
+        # Repeated merchants hit the memo instead of re-running matching
+        key = (description, amount > 0)
+        cached = self.single_transaction_categories.get(key)
+        if cached is not None:
+            return cached
+        
+        category = self._match_single_transaction(description, amount)
+        
+        if len(self.single_transaction_categories) >= self.max_cached_descriptions:
+            self.single_transaction_categories.clear()
+        self.single_transaction_categories[key] = category
+        
+        return category
+    
+    def _match_single_transaction(self, description: str, amount: float) -> str:
+        """Run keyword matching, then the classifier, for one normalized description."""
         # First, try keyword-based categorization for speed
         keyword_category = self._categorize_by_keywords(description, amount)
         
@@ -145,8 +212,7 @@ class ExpenseCategorizer:
         
         # Special handling for income (positive amounts with specific keywords)
         if amount > 0:
-            income_keywords = ["salary", "payroll", "deposit", "refund", "cashback", "dividend"]
-            if any(keyword in description_lower for keyword in income_keywords):
+            if any(keyword in description_lower for keyword in self.income_keywords):
                 return "Income"
         
         # Check each category's keywords
@@ -162,7 +228,8 @@ class ExpenseCategorizer:
             return {}
         
         category_counts = df['category'].value_counts()
-        category_amounts = df.groupby('category')['amount'].sum().abs()
+        category_counts = category_counts[category_counts > 0]
+        category_amounts = df.groupby('category', observed=True)['amount'].sum().abs()
         
         return {
             'counts': category_counts.to_dict(),
@@ -175,21 +242,18 @@ class ExpenseCategorizer:
         if 'description' not in df.columns:
             return []
         
-        # Extract common words from descriptions
-        all_descriptions = ' '.join(df['description'].astype(str).str.lower())
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', all_descriptions)
-        
-        # Count word frequency
-        from collections import Counter
-        word_counts = Counter(words)
+        # Count words once per distinct description, weighted by how often it occurs
+        word_counts = Counter()
+        for description, occurrences in df['description'].astype(str).str.lower().value_counts(sort=False).items():
+            for word in WORD_PATTERN.findall(description):
+                word_counts[word] += occurrences
         
         # Get most common words that aren't already in our categories
         common_words = [word for word, count in word_counts.most_common(20) 
                        if count > 5 and len(word) > 3]
         
         # Filter out common stop words and already categorized terms
-        stop_words = {'the', 'and', 'for', 'with', 'from', 'payment', 'transaction'}
         suggestions = [word.title() for word in common_words 
-                      if word not in stop_words]
+                      if word not in SUGGESTION_STOP_WORDS]
         
         return suggestions[:10]  # Return top 10 suggestions
@@ -6,6 +6,32 @@ import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
 import calendar
+import re
+from functools import lru_cache
+from utils import income_expense_totals
+
+# Description keywords that mark a day as a bills day, matched as one regex. Kept as a
+# pattern string so string[pyarrow] descriptions are scanned by Arrow's regex kernel
+RECURRING_KEYWORDS = ['bill', 'payment', 'subscription', 'rent', 'mortgage', 'insurance']
+RECURRING_PATTERN = '|'.join(re.escape(keyword) for keyword in RECURRING_KEYWORDS)
+
+@lru_cache(maxsize=256)
+def _month_layout(year: int, month: int) -> Tuple[Tuple[int, ...], ...]:
+    """Week rows of day numbers (0 outside the month), memoized per month."""
+    return tuple(tuple(week) for week in calendar.monthcalendar(year, month))
+
+def _top_days(totals: pd.Series, n: int = 3) -> Dict[Any, Any]:
+    """Largest n totals by day, descending; ties keep the earlier day, like nlargest(keep='first')."""
+    values = totals.to_numpy()
+    if len(values) > n:
+        # Linear-time selection of everything at or above the n-th largest value
+        nth_largest = np.partition(values, len(values) - n)[len(values) - n]
+        candidates = np.flatnonzero(values >= nth_largest)
+    else:
+        candidates = np.arange(len(values))
+    
+    top = candidates[np.lexsort((candidates, -values[candidates]))][:n]
+    return dict(zip(totals.index[top].tolist(), values[top].tolist()))
 
 class FinancialCalendar:
     """Interactive financial calendar with spending patterns and insights."""
@@ -26,11 +52,11 @@ class FinancialCalendar:
         if month is None:
             month = datetime.now().month
         
-        # Filter data for the specified month/year
+        # Filter data for the specified month/year (read-only below, so no copy)
         calendar_data = df[
             (df['date'].dt.year == year) & 
             (df['date'].dt.month == month)
-        ].copy()
+        ]
         
         # Group transactions by day
         daily_summary = self._create_daily_summary(calendar_data)
@@ -45,7 +71,7 @@ class FinancialCalendar:
             'calendar_matrix': calendar_matrix,
             'daily_summary': daily_summary,
             'patterns': patterns,
-            'month_stats': self._calculate_month_stats(calendar_data),
+            'month_stats': self._calculate_month_stats(calendar_data, year, month),
             'year': year,
             'month': month
         }
@@ -53,40 +79,69 @@ class FinancialCalendar:
     def _create_daily_summary(self, df: pd.DataFrame) -> Dict[int, Dict[str, Any]]:
         """Create summary for each day of the month."""
         daily_summary = {}
-        
-        for day in range(1, 32):  # Maximum days in a month
-            day_data = df[df['date'].dt.day == day]
+        days = df['date'].dt.day
+        amounts = df['amount']
+        has_category = 'category' in df.columns
+        
+        # Income/expense totals for every day in one grouped pass
+        flows = pd.DataFrame({'income': amounts.clip(lower=0), 'expense': (-amounts).clip(lower=0)})
+        day_totals = flows.groupby(days).sum()
+        
+        # Day-type signals, scanned once for the month and reduced per day
+        signals = pd.DataFrame({
+            'has_income': amounts > 0,
+            'has_bill': df['description'].str.contains(RECURRING_PATTERN, case=False, na=False)
+        })
+        day_signals = signals.groupby(days).any()
+        
+        # Expense totals per (day, category), regrouped into one dict per day
+        day_categories = {}
+        if has_category:
+            is_expense = amounts < 0
+            category_spending = df[is_expense].groupby([days[is_expense], 'category'], observed=True)['amount'].sum().abs()
+            for (day, category), amount in category_spending.items():
+                day_categories.setdefault(day, {})[category] = amount
+        
+        # Row labels per day; records are only built on request by get_day_transactions
+        day_positions = days.groupby(days).indices
+        
+        for day in day_totals.index:
+            total_income = day_totals.at[day, 'income']
+            total_expense = day_totals.at[day, 'expense']
+            row_index = df.index[day_positions[day]].to_numpy()
             
-            if len(day_data) > 0:
-                total_income = day_data[day_data['amount'] > 0]['amount'].sum()
-                total_expense = abs(day_data[day_data['amount'] < 0]['amount'].sum())
-                net_flow = total_income - total_expense
-                
-                # Categorize transactions
-                categories = {}
-                if 'category' in day_data.columns:
-                    categories = day_data[day_data['amount'] < 0].groupby('category')['amount'].sum().abs().to_dict()
-                
-                daily_summary[day] = {
-                    'total_income': total_income,
-                    'total_expense': total_expense,
-                    'net_flow': net_flow,
-                    'transaction_count': len(day_data),
-                    'categories': categories,
-                    'transactions': day_data[['description', 'amount', 'category']].to_dict('records') if 'category' in day_data.columns else day_data[['description', 'amount']].to_dict('records'),
-                    'day_type': self._classify_day_type(day_data, total_expense)
-                }
+            daily_summary[day] = {
+                'total_income': total_income,
+                'total_expense': total_expense,
+                'net_flow': total_income - total_expense,
+                'transaction_count': len(row_index),
+                'categories': day_categories.get(day, {}),
+                'row_index': row_index,
+                'day_type': self._classify_day_type(
+                    len(row_index), day_signals.at[day, 'has_income'], day_signals.at[day, 'has_bill'], total_expense
+                )
+            }
         
         return daily_summary
     
-    def _classify_day_type(self, day_data: pd.DataFrame, total_expense: float) -> str:
+    def get_day_transactions(self, df: pd.DataFrame, calendar_data: Dict[str, Any], day: int) -> List[Dict[str, Any]]:
+        """Transaction records for one day of a calendar view built from df."""
+        day_info = calendar_data['daily_summary'].get(day)
+        if day_info is None:
+            return []
+        
+        columns = ['description', 'amount', 'category'] if 'category' in df.columns else ['description', 'amount']
+        return df.loc[day_info['row_index'], columns].to_dict('records')
+    
+    def _classify_day_type(self, transaction_count: int, has_income: bool, has_bill: bool,
+                           total_expense: float) -> str:
         """Classify the type of spending day."""
         
-        if len(day_data) == 0:
+        if transaction_count == 0:
             return 'inactive'
         
         # Check for income
-        if any(day_data['amount'] > 0):
+        if has_income:
             return 'income_day'
         
         # Check for high spending
@@ -94,8 +149,7 @@ class FinancialCalendar:
             return 'high_spending'
         
         # Check for recurring bills
-        recurring_keywords = ['bill', 'payment', 'subscription', 'rent', 'mortgage', 'insurance']
-        if any(keyword in desc.lower() for desc in day_data['description'].astype(str) for keyword in recurring_keywords):
+        if has_bill:
             return 'bills_day'
         
         # Regular spending
@@ -111,7 +165,7 @@ class FinancialCalendar:
             'highest_spending_days': [],
             'recurring_patterns': [],
             'weekend_vs_weekday': {},
-            'category_patterns': {}
+            'category_patterns': pd.DataFrame()
         }
         
         if len(df) == 0:
@@ -119,16 +173,19 @@ class FinancialCalendar:
         
         # Busiest days (most transactions)
         daily_counts = df.groupby(df['date'].dt.day).size()
-        patterns['busiest_days'] = daily_counts.nlargest(3).to_dict()
+        patterns['busiest_days'] = _top_days(daily_counts)
         
         # Highest spending days
         daily_spending = df[df['amount'] < 0].groupby(df['date'].dt.day)['amount'].sum().abs()
-        patterns['highest_spending_days'] = daily_spending.nlargest(3).to_dict()
-        
-        # Weekend vs Weekday analysis
-        df['is_weekend'] = df['date'].dt.weekday >= 5
-        weekend_spending = abs(df[(df['amount'] < 0) & (df['is_weekend'])]['amount'].sum())
-        weekday_spending = abs(df[(df['amount'] < 0) & (~df['is_weekend'])]['amount'].sum())
+        patterns['highest_spending_days'] = _top_days(daily_spending)
+        
+        # Weekend vs Weekday analysis: one weighted bincount over the expenses (bin 1 = weekend)
+        amounts = df['amount'].to_numpy()
+        is_expense = amounts < 0
+        is_weekend = (df['date'].dt.weekday.to_numpy() >= 5).astype(np.intp)
+        weekday_spending, weekend_spending = np.bincount(
+            is_weekend[is_expense], weights=-amounts[is_expense], minlength=2
+        )
         
         patterns['weekend_vs_weekday'] = {
             'weekend_total': weekend_spending,
@@ -136,10 +193,10 @@ class FinancialCalendar:
             'weekend_preference': weekend_spending > weekday_spending
         }
         
-        # Category patterns by day of week
+        # Category patterns by day of week, as a weekday x category table (NaN where nothing was spent)
         if 'category' in df.columns:
-            category_by_day = df[df['amount'] < 0].groupby([df['date'].dt.day_name(), 'category'])['amount'].sum().abs()
-            patterns['category_patterns'] = category_by_day.to_dict()
+            category_by_day = df[df['amount'] < 0].groupby([df['date'].dt.day_name(), 'category'], observed=True)['amount'].sum().abs()
+            patterns['category_patterns'] = category_by_day.unstack('category').rename_axis('weekday')
         
         return patterns
     
@@ -147,7 +204,7 @@ class FinancialCalendar:
         """Create matrix representation of calendar for visualization."""
         
         # Get calendar layout
-        cal = calendar.monthcalendar(year, month)
+        cal = _month_layout(year, month)
         calendar_matrix = []
         
         for week in cal:
@@ -179,15 +236,18 @@ class FinancialCalendar:
         
         return calendar_matrix
     
-    def _calculate_month_stats(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _calculate_month_stats(self, df: pd.DataFrame, year: int, month: int) -> Dict[str, Any]:
         """Calculate monthly statistics."""
         
-        total_income = df[df['amount'] > 0]['amount'].sum()
-        total_expense = abs(df[df['amount'] < 0]['amount'].sum())
+        total_income, total_expense = income_expense_totals(df['amount'])
         transaction_count = len(df)
         
+        # Day numbers extracted once and shared by the active/spending/income day counts
+        days = df['date'].dt.day.to_numpy()
+        amounts = df['amount'].to_numpy()
+        
         # Day-wise breakdown
-        daily_avg_expense = total_expense / max(1, len(df['date'].dt.day.unique())) if len(df) > 0 else 0
+        daily_avg_expense = total_expense / max(1, len(np.unique(days))) if len(df) > 0 else 0
         
         # Most active day
         most_active_day = df['date'].dt.day_name().value_counts().index[0] if len(df) > 0 else 'N/A'
@@ -199,8 +259,9 @@ class FinancialCalendar:
             'transaction_count': transaction_count,
             'daily_avg_expense': daily_avg_expense,
             'most_active_day': most_active_day,
-            'spending_days': len(df[df['amount'] < 0]['date'].dt.day.unique()),
-            'income_days': len(df[df['amount'] > 0]['date'].dt.day.unique())
+            'spending_days': len(np.unique(days[amounts < 0])),
+            'income_days': len(np.unique(days[amounts > 0])),
+            'days_in_month': calendar.monthrange(year, month)[1]
         }
     
     def create_calendar_heatmap(self, calendar_data: Dict[str, Any]) -> go.Figure:
@@ -210,35 +271,26 @@ class FinancialCalendar:
         year = calendar_data['year']
         month = calendar_data['month']
         
-        # Prepare data for heatmap
-        spending_values = []
-        day_labels = []
-        hover_text = []
+        # Prepare data for heatmap as (weeks, 7) arrays Plotly can serialize directly
+        n_weeks = len(calendar_matrix)
+        spending_values = np.zeros((n_weeks, 7), dtype=np.float64)
+        day_labels = np.full((n_weeks, 7), '', dtype=object)
+        hover_text = np.full((n_weeks, 7), '', dtype=object)
         
         for week_idx, week in enumerate(calendar_matrix):
-            week_spending = []
-            week_labels = []
-            week_hover = []
-            
-            for day_data in week:
+            for weekday, day_data in enumerate(week):
                 if day_data['empty']:
-                    week_spending.append(0)
-                    week_labels.append('')
-                    week_hover.append('')
-                else:
-                    week_spending.append(day_data['spending'])
-                    week_labels.append(str(day_data['day']))
-                    
-                    hover_info = f"Day {day_data['day']}<br>"
-                    hover_info += f"Spending: ${day_data['spending']:.2f}<br>"
-                    hover_info += f"Income: ${day_data['income']:.2f}<br>"
-                    hover_info += f"Net: ${day_data['net']:.2f}<br>"
-                    hover_info += f"Transactions: {day_data['transactions']}"
-                    week_hover.append(hover_info)
-            
-            spending_values.append(week_spending)
-            day_labels.append(week_labels)
-            hover_text.append(week_hover)
+                    continue
+                
+                spending_values[week_idx, weekday] = day_data['spending']
+                day_labels[week_idx, weekday] = str(day_data['day'])
+                hover_text[week_idx, weekday] = (
+                    f"Day {day_data['day']}<br>"
+                    f"Spending: ${day_data['spending']:.2f}<br>"
+                    f"Income: ${day_data['income']:.2f}<br>"
+                    f"Net: ${day_data['net']:.2f}<br>"
+                    f"Transactions: {day_data['transactions']}"
+                )
         
         # Create heatmap
         fig = go.Figure(data=go.Heatmap(
@@ -262,8 +314,8 @@ class FinancialCalendar:
                 title='Day of Week'
             ),
             yaxis=dict(
-                tickvals=list(range(len(calendar_matrix))),
-                ticktext=[f'Week {i+1}' for i in range(len(calendar_matrix))],
+                tickvals=list(range(n_weeks)),
+                ticktext=[f'Week {i+1}' for i in range(n_weeks)],
                 title='Week'
             ),
             height=400,
@@ -350,8 +402,7 @@ class FinancialCalendar:
         
         # Spending frequency
         spending_days = month_stats['spending_days']
-        total_days_in_month = 31  # Approximate
-        spending_frequency = (spending_days / total_days_in_month) * 100
+        spending_frequency = (spending_days / month_stats['days_in_month']) * 100
         
         if spending_frequency > 80:
             insights.append(f"🛍️ You make purchases almost daily ({spending_frequency:.0f}% of days)")
@@ -370,14 +421,16 @@ class FinancialCalendar:
     def create_monthly_flow_chart(self, df: pd.DataFrame) -> go.Figure:
         """Create monthly cash flow visualization."""
         
-        daily_flow = df.groupby(df['date'].dt.day).agg({
-            'amount': lambda x: [x[x > 0].sum(), x[x < 0].sum()]
-        })
+        # Pre-signed columns keep both sums on the built-in groupby kernel
+        daily_flow = pd.DataFrame({
+            'income': df['amount'].clip(lower=0),
+            'expense': (-df['amount']).clip(lower=0)
+        }).groupby(df['date'].dt.day).sum()
         
         days = daily_flow.index
-        income_values = [flow[0] for flow in daily_flow['amount']]
-        expense_values = [abs(flow[1]) for flow in daily_flow['amount']]
-        net_values = [income - expense for income, expense in zip(income_values, expense_values)]
+        income_values = daily_flow['income'].to_numpy()
+        expense_values = daily_flow['expense'].to_numpy()
+        net_values = income_values - expense_values
         
         fig = go.Figure()
         
@@ -393,7 +446,7 @@ class FinancialCalendar:
         # Expense bars (negative)
         fig.add_trace(go.Bar(
             x=days,
-            y=[-exp for exp in expense_values],
+            y=-expense_values,
             name='Expenses',
             marker_color='red',
             opacity=0.7
@@ -1,8 +1,43 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional
 import streamlit as st
+import re
+
+# Keyword alternations for description matching, built once. Kept as pattern strings
+# (not compiled) so string[pyarrow] columns can match them with Arrow's regex kernel
+DEBT_PATTERN = '|'.join(re.escape(keyword) for keyword in ['loan', 'credit card', 'mortgage', 'debt', 'interest'])
+SAVINGS_PATTERN = '|'.join(re.escape(keyword) for keyword in ['savings', 'emergency', 'fund', 'investment'])
+
+# Recommended share of total expenses per category
+RECOMMENDED_RATIOS = pd.Series({
+    'Food & Dining': 0.15,
+    'Transportation': 0.15,
+    'Bills & Utilities': 0.25,
+    'Entertainment': 0.05,
+    'Shopping': 0.10,
+    'Health & Medical': 0.05
+})
+
+# Lower-is-better score ladders: (upper bounds, scores); the extra last score applies past every bound
+CONSISTENCY_BANDS = (np.array([0.1, 0.2, 0.3, 0.5]), np.array([100.0, 85.0, 70.0, 55.0, 40.0]))
+DEBT_RATIO_BANDS = (np.array([0.1, 0.2, 0.3, 0.4]), np.array([100.0, 85.0, 70.0, 55.0, 40.0]))
+INCOME_STABILITY_BANDS = (np.array([0.05, 0.1, 0.2, 0.3]), np.array([100.0, 85.0, 70.0, 55.0, 40.0]))
+
+# Higher-is-better ladders are scored on the negated value, so NaN still gets the lowest score
+SAVINGS_RATE_BANDS = (np.array([-20.0, -15.0, -10.0, -5.0, 0.0]), np.array([100.0, 85.0, 70.0, 55.0, 40.0, 20.0]))
+EMERGENCY_FUND_BANDS = (np.array([-6.0, -3.0, -1.0, -0.5]), np.array([100.0, 80.0, 60.0, 40.0, 20.0]))
+
+def _banded_score(value: float, bands: Tuple[np.ndarray, np.ndarray]) -> float:
+    """Score of the first band whose upper bound is >= value (NaN falls in the last band)."""
+    bounds, scores = bands
+    return float(scores[np.searchsorted(bounds, value, side='left')])
+
+def _coefficient_of_variation(values: pd.Series) -> float:
+    """Sample standard deviation over mean, computed on the raw array."""
+    array = values.to_numpy(dtype=float)
+    return array.std(ddof=1) / array.mean()
 
 class FinancialHealthAnalyzer:
     """Calculates personalized financial health scores and provides insights."""
@@ -21,23 +56,33 @@ class FinancialHealthAnalyzer:
         """Calculate comprehensive financial health score (0-100)."""
         scores = {}
         
+        # One grouped pass yields every monthly total the components need
+        monthly = self._monthly_totals(df)
+        
+        # Months without any expenses don't count towards spending statistics
+        monthly_expenses = monthly.loc[monthly['expenses'] > 0, 'expenses']
+        category_spending = (
+            df.loc[df['amount'] < 0].groupby('category', observed=True)['amount'].sum().abs()
+            if 'category' in df.columns else None
+        )
+        
         # 1. Savings Rate Score (25%)
-        scores['savings_rate'] = self._calculate_savings_rate_score(df)
+        scores['savings_rate'] = self._calculate_savings_rate_score(monthly)
         
         # 2. Spending Consistency Score (20%)
-        scores['spending_consistency'] = self._calculate_consistency_score(df)
+        scores['spending_consistency'] = self._calculate_consistency_score(monthly_expenses)
         
         # 3. Category Balance Score (15%)
-        scores['category_balance'] = self._calculate_category_balance_score(df)
+        scores['category_balance'] = self._calculate_category_balance_score(category_spending)
         
         # 4. Debt Management Score (15%)
-        scores['debt_management'] = self._calculate_debt_management_score(df)
+        scores['debt_management'] = self._calculate_debt_management_score(monthly)
         
         # 5. Income Stability Score (15%)
-        scores['income_stability'] = self._calculate_income_stability_score(df)
+        scores['income_stability'] = self._calculate_income_stability_score(monthly)
         
         # 6. Emergency Fund Score (10%)
-        scores['emergency_fund'] = self._calculate_emergency_fund_score(df)
+        scores['emergency_fund'] = self._calculate_emergency_fund_score(monthly, monthly_expenses)
         
         # Calculate weighted total
         total_score = sum(scores[key] * self.score_weights[key] for key in scores.keys())
@@ -46,104 +91,72 @@ class FinancialHealthAnalyzer:
             'total_score': round(total_score, 1),
             'component_scores': scores,
             'grade': self._get_grade(total_score),
-            'insights': self._generate_health_insights(scores, df),
+            'insights': self._generate_health_insights(scores, category_spending, monthly_expenses),
             'improvement_tips': self._generate_improvement_tips(scores)
         }
     
-    def _calculate_savings_rate_score(self, df: pd.DataFrame) -> float:
+    def _monthly_totals(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Monthly income, expenses, debt payments and savings deposits from one groupby."""
+        income = df['amount'].clip(lower=0)
+        expenses = (-df['amount']).clip(lower=0)
+        is_debt = df['description'].str.contains(DEBT_PATTERN, case=False, na=False)
+        is_savings = df['description'].str.contains(SAVINGS_PATTERN, case=False, na=False)
+        
+        # Pre-signed, pre-masked columns keep every sum on the built-in groupby kernel
+        return pd.DataFrame({
+            'income': income,
+            'expenses': expenses,
+            'debt_payments': expenses.where(is_debt, 0.0),
+            'savings': income.where(is_savings, 0.0)
+        }).groupby(df['month_year'], observed=True).sum()
+    
+    def _calculate_savings_rate_score(self, monthly: pd.DataFrame) -> float:
         """Calculate savings rate score based on income vs expenses."""
-        monthly_data = df.groupby('month_year').agg({
-            'amount': lambda x: [x[x > 0].sum(), x[x < 0].sum()]
-        })
-        
-        savings_rates = []
-        for month_data in monthly_data['amount']:
-            income = month_data[0]
-            expenses = abs(month_data[1])
-            if income > 0:
-                savings_rate = (income - expenses) / income * 100
-                savings_rates.append(max(0, savings_rate))
-        
-        if not savings_rates:
+        # Only months with income have a savings rate
+        monthly_data = monthly[monthly['income'] > 0]
+        if monthly_data.empty:
             return 50.0
         
-        avg_savings_rate = np.mean(savings_rates)
+        savings_rates = ((monthly_data['income'] - monthly_data['expenses']) / monthly_data['income'] * 100).clip(lower=0)
+        avg_savings_rate = savings_rates.mean()
         
         # Score based on savings rate
-        if avg_savings_rate >= 20:
-            return 100.0
-        elif avg_savings_rate >= 15:
-            return 85.0
-        elif avg_savings_rate >= 10:
-            return 70.0
-        elif avg_savings_rate >= 5:
-            return 55.0
-        elif avg_savings_rate >= 0:
-            return 40.0
-        else:
-            return 20.0
+        return _banded_score(-avg_savings_rate, SAVINGS_RATE_BANDS)
     
-    def _calculate_consistency_score(self, df: pd.DataFrame) -> float:
+    def _calculate_consistency_score(self, monthly_expenses: pd.Series) -> float:
         """Calculate spending consistency score."""
-        monthly_expenses = df[df['amount'] < 0].groupby('month_year')['amount'].sum().abs()
-        
         if len(monthly_expenses) < 2:
             return 75.0
         
         # Calculate coefficient of variation
-        cv = monthly_expenses.std() / monthly_expenses.mean()
+        cv = _coefficient_of_variation(monthly_expenses)
         
         # Score based on consistency (lower CV = higher score)
-        if cv <= 0.1:
-            return 100.0
-        elif cv <= 0.2:
-            return 85.0
-        elif cv <= 0.3:
-            return 70.0
-        elif cv <= 0.5:
-            return 55.0
-        else:
-            return 40.0
+        return _banded_score(cv, CONSISTENCY_BANDS)
     
-    def _calculate_category_balance_score(self, df: pd.DataFrame) -> float:
+    def _calculate_category_balance_score(self, category_spending: Optional[pd.Series]) -> float:
         """Calculate category balance score based on recommended spending ratios."""
-        if 'category' not in df.columns:
+        if category_spending is None:
             return 70.0
         
-        category_spending = df[df['amount'] < 0].groupby('category')['amount'].sum().abs()
         total_expenses = category_spending.sum()
         
         if total_expenses == 0:
             return 70.0
         
-        # Recommended spending ratios
-        recommended_ratios = {
-            'Food & Dining': 0.15,
-            'Transportation': 0.15,
-            'Bills & Utilities': 0.25,
-            'Entertainment': 0.05,
-            'Shopping': 0.10,
-            'Health & Medical': 0.05
-        }
+        # Actual share of each recommended category; categories with no spending stay NaN
+        actual_ratios = category_spending.reindex(RECOMMENDED_RATIOS.index).to_numpy(dtype=float) / total_expenses
+        deviations = np.abs(actual_ratios - RECOMMENDED_RATIOS.to_numpy())
         
-        balance_score = 100.0
-        for category, recommended in recommended_ratios.items():
-            if category in category_spending:
-                actual_ratio = category_spending[category] / total_expenses
-                deviation = abs(actual_ratio - recommended)
-                # Penalize deviations
-                balance_score -= min(30, deviation * 200)
+        # Penalize deviations of the categories that were spent on
+        penalty = np.minimum(30, deviations[~np.isnan(deviations)] * 200).sum()
         
-        return max(40.0, balance_score)
+        return max(40.0, 100.0 - penalty)
     
-    def _calculate_debt_management_score(self, df: pd.DataFrame) -> float:
+    def _calculate_debt_management_score(self, monthly: pd.DataFrame) -> float:
         """Calculate debt management score."""
-        # Look for debt-related transactions
-        debt_keywords = ['loan', 'credit card', 'mortgage', 'debt', 'interest']
-        debt_transactions = df[df['description'].str.lower().str.contains('|'.join(debt_keywords), na=False)]
-        
-        total_debt_payments = abs(debt_transactions[debt_transactions['amount'] < 0]['amount'].sum())
-        total_expenses = abs(df[df['amount'] < 0]['amount'].sum())
+        total_debt_payments = monthly['debt_payments'].sum()
+        total_expenses = monthly['expenses'].sum()
         
         if total_expenses == 0:
             return 80.0
@@ -151,65 +164,34 @@ class FinancialHealthAnalyzer:
         debt_ratio = total_debt_payments / total_expenses
         
         # Score based on debt-to-expense ratio
-        if debt_ratio <= 0.1:
-            return 100.0
-        elif debt_ratio <= 0.2:
-            return 85.0
-        elif debt_ratio <= 0.3:
-            return 70.0
-        elif debt_ratio <= 0.4:
-            return 55.0
-        else:
-            return 40.0
+        return _banded_score(debt_ratio, DEBT_RATIO_BANDS)
     
-    def _calculate_income_stability_score(self, df: pd.DataFrame) -> float:
+    def _calculate_income_stability_score(self, monthly: pd.DataFrame) -> float:
         """Calculate income stability score."""
-        income_data = df[df['amount'] > 0].groupby('month_year')['amount'].sum()
+        income_data = monthly.loc[monthly['income'] > 0, 'income']
         
         if len(income_data) < 2:
             return 75.0
         
         # Calculate coefficient of variation for income
-        cv = income_data.std() / income_data.mean()
+        cv = _coefficient_of_variation(income_data)
         
         # Score based on income stability
-        if cv <= 0.05:
-            return 100.0
-        elif cv <= 0.1:
-            return 85.0
-        elif cv <= 0.2:
-            return 70.0
-        elif cv <= 0.3:
-            return 55.0
-        else:
-            return 40.0
+        return _banded_score(cv, INCOME_STABILITY_BANDS)
     
-    def _calculate_emergency_fund_score(self, df: pd.DataFrame) -> float:
+    def _calculate_emergency_fund_score(self, monthly: pd.DataFrame, monthly_expenses: pd.Series) -> float:
         """Calculate emergency fund score based on savings patterns."""
-        # Look for savings-related transactions
-        savings_keywords = ['savings', 'emergency', 'fund', 'investment']
-        savings_transactions = df[df['description'].str.lower().str.contains('|'.join(savings_keywords), na=False)]
+        average_monthly_expenses = monthly_expenses.mean()
+        total_savings = monthly['savings'].sum()
         
-        monthly_expenses = abs(df[df['amount'] < 0].groupby('month_year')['amount'].sum().mean())
-        total_savings = savings_transactions[savings_transactions['amount'] > 0]['amount'].sum()
-        
-        if monthly_expenses == 0:
+        if average_monthly_expenses == 0:
             return 70.0
         
         # Calculate months of expenses covered
-        months_covered = total_savings / monthly_expenses
+        months_covered = total_savings / average_monthly_expenses
         
         # Score based on emergency fund coverage
-        if months_covered >= 6:
-            return 100.0
-        elif months_covered >= 3:
-            return 80.0
-        elif months_covered >= 1:
-            return 60.0
-        elif months_covered >= 0.5:
-            return 40.0
-        else:
-            return 20.0
+        return _banded_score(-months_covered, EMERGENCY_FUND_BANDS)
     
     def _get_grade(self, score: float) -> str:
         """Convert numerical score to letter grade."""
@@ -232,7 +214,8 @@ class FinancialHealthAnalyzer:
         else:
             return "F"
     
-    def _generate_health_insights(self, scores: Dict[str, float], df: pd.DataFrame) -> List[str]:
+    def _generate_health_insights(self, scores: Dict[str, float], category_spending: Optional[pd.Series],
+                                  monthly_expenses: pd.Series) -> List[str]:
         """Generate personalized financial health insights."""
         insights = []
         
@@ -245,14 +228,13 @@ class FinancialHealthAnalyzer:
         insights.append(f"⚠️ Your weakest area is {weakest[0].replace('_', ' ').title()} ({weakest[1]:.1f}/100)")
         
         # Specific insights based on data
-        if 'category' in df.columns:
-            top_expense = df[df['amount'] < 0].groupby('category')['amount'].sum().abs().idxmax()
+        if category_spending is not None:
+            top_expense = category_spending.idxmax()
             insights.append(f"📊 Your largest expense category is {top_expense}")
         
         # Trend insights
-        monthly_spending = df[df['amount'] < 0].groupby('month_year')['amount'].sum().abs()
-        if len(monthly_spending) >= 2:
-            trend = "increasing" if monthly_spending.iloc[-1] > monthly_spending.iloc[0] else "decreasing"
+        if len(monthly_expenses) >= 2:
+            trend = "increasing" if monthly_expenses.iloc[-1] > monthly_expenses.iloc[0] else "decreasing"
             insights.append(f"📈 Your spending trend is {trend} over time")
         
         return insights
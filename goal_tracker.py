@@ -2,10 +2,15 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta, date
 from typing import Dict, List, Tuple, Any, Optional
+import uuid
+import heapq
 import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
 
+# Ease of each strategy difficulty; among equal savings the harder strategy ranks first
+DIFFICULTY_SCORES = {'Easy': 3, 'Medium': 2, 'Hard': 1}
+
 class GoalTracker:
     """Advanced goal tracking and financial recommendations system."""
     
@@ -21,6 +26,10 @@ class GoalTracker:
             'Wedding',
             'Custom Goal'
         ]
+        
+        # (dataframe, stats) for the last summarized dataframe, swapped as one tuple so
+        # sessions sharing this tracker never see a mismatched pair
+        self._stats_cache: Optional[Tuple[pd.DataFrame, Dict[str, Any]]] = None
     
     def create_goal(self, name: str, target_amount: float, target_date: date, 
                    goal_type: str = 'Custom Goal', current_amount: float = 0) -> Dict[str, Any]:
@@ -31,6 +40,7 @@ class GoalTracker:
         monthly_savings_needed = max(0, (target_amount - current_amount) / months_remaining)
         
         return {
+            'id': str(uuid.uuid4()),
             'name': name,
             'type': goal_type,
             'target_amount': target_amount,
@@ -44,12 +54,43 @@ class GoalTracker:
             'created_date': date.today()
         }
     
-    def analyze_goal_feasibility(self, goal: Dict[str, Any], df: pd.DataFrame) -> Dict[str, Any]:
-        """Analyze if a goal is achievable based on current financial patterns."""
+    def precompute_df_stats(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Summarize the transaction data once so every goal can be analyzed without rescanning it."""
+        # Holding a reference to the dataframe keeps its identity from being reused
+        cached = self._stats_cache
+        if cached is not None and cached[0] is df:
+            return cached[1]
+        
+        # Monthly income and expense totals from one grouped pass over pre-signed columns
+        monthly = pd.DataFrame({
+            'income': df['amount'].clip(lower=0),
+            'expenses': (-df['amount']).clip(lower=0)
+        }).groupby(df['month_year'], observed=True).sum()
+        
+        n_months = max(1, len(monthly))
+        category_monthly = None
+        if 'category' in df.columns:
+            expenses = df[df['amount'] < 0]
+            category_monthly = expenses.groupby('category', observed=True)['amount'].sum().abs() / n_months
+        
+        stats = {
+            # Averages only cover months that had income (or expenses), as before
+            'monthly_income': monthly.loc[monthly['income'] > 0, 'income'].mean(),
+            'monthly_expenses': monthly.loc[monthly['expenses'] > 0, 'expenses'].mean(),
+            # Average monthly spend per category over the whole period
+            'category_monthly': category_monthly,
+            'n_months': n_months
+        }
+        
+        self._stats_cache = (df, stats)
+        return stats
+    
+    def analyze_goal_feasibility(self, goal: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Analyze if a goal is achievable based on current financial patterns (see precompute_df_stats)."""
         
         # Calculate current financial capacity
-        monthly_income = df[df['amount'] > 0].groupby('month_year')['amount'].sum().mean()
-        monthly_expenses = abs(df[df['amount'] < 0].groupby('month_year')['amount'].sum().mean())
+        monthly_income = stats['monthly_income']
+        monthly_expenses = stats['monthly_expenses']
         current_savings_rate = max(0, (monthly_income - monthly_expenses) / monthly_income) if monthly_income > 0 else 0
         current_monthly_savings = monthly_income * current_savings_rate
         
@@ -82,18 +123,17 @@ class GoalTracker:
             'success_probability': min(100, max(10, (current_monthly_savings / required_monthly_savings) * 100))
         }
     
-    def generate_savings_strategies(self, goal: Dict[str, Any], df: pd.DataFrame) -> List[Dict[str, Any]]:
-        """Generate personalized savings strategies to reach the goal."""
+    def generate_savings_strategies(self, goal: Dict[str, Any], stats: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Generate personalized savings strategies to reach the goal (see precompute_df_stats)."""
         strategies = []
         
-        if 'category' not in df.columns:
+        if stats['category_monthly'] is None:
             return self._get_default_strategies(goal)
         
         # Analyze spending categories for optimization opportunities
-        category_spending = df[df['amount'] < 0].groupby('category')['amount'].sum().abs()
-        total_expenses = category_spending.sum()
+        category_monthly = stats['category_monthly']
         
-        monthly_shortage = goal['monthly_savings_needed'] - self._calculate_current_savings(df)
+        monthly_shortage = goal['monthly_savings_needed'] - self._savings_capacity(stats)
         
         if monthly_shortage <= 0:
             strategies.append({
@@ -106,8 +146,7 @@ class GoalTracker:
             return strategies
         
         # Strategy 1: Reduce largest expense categories
-        for category, amount in category_spending.head(3).items():
-            monthly_amount = amount / max(1, len(df['month_year'].unique()))
+        for category, monthly_amount in category_monthly.nlargest(3).items():
             potential_reduction = monthly_amount * 0.15  # 15% reduction
             
             if potential_reduction >= monthly_shortage * 0.3:  # Could cover 30% of shortage
@@ -122,8 +161,8 @@ class GoalTracker:
         # Strategy 2: Target discretionary spending
         discretionary_categories = ['Entertainment', 'Shopping', 'Dining']
         for category in discretionary_categories:
-            if category in category_spending:
-                monthly_amount = category_spending[category] / max(1, len(df['month_year'].unique()))
+            if category in category_monthly:
+                monthly_amount = category_monthly[category]
                 potential_reduction = monthly_amount * 0.25  # 25% reduction
                 
                 strategies.append({
@@ -135,7 +174,6 @@ class GoalTracker:
                 })
         
         # Strategy 3: Increase income
-        current_monthly_income = df[df['amount'] > 0].groupby('month_year')['amount'].sum().mean()
         income_increase_needed = monthly_shortage / 0.7  # Assume 30% goes to taxes/expenses
         
         strategies.append({
@@ -158,10 +196,10 @@ class GoalTracker:
                     'category': 'Mixed'
                 })
         
-        # Sort by potential impact and difficulty
-        strategies.sort(key=lambda x: (x['potential_savings'], -self._get_difficulty_score(x['difficulty'])), reverse=True)
-        
-        return strategies[:5]  # Return top 5 strategies
+        # Top 5 strategies by potential impact and difficulty, without sorting the rest
+        return heapq.nlargest(
+            5, strategies, key=lambda x: (x['potential_savings'], -DIFFICULTY_SCORES.get(x['difficulty'], 1))
+        )
     
     def track_goal_progress(self, goal: Dict[str, Any], transactions_df: pd.DataFrame) -> Dict[str, Any]:
         """Track progress towards a specific goal."""
@@ -196,27 +234,33 @@ class GoalTracker:
             recommendations.append("💡 Start by setting your first financial goal! Emergency funds are usually a great place to begin.")
             return recommendations
         
-        # Analyze goal priorities
-        urgent_goals = [g for g in goals if g['days_remaining'] < 90]
-        large_goals = [g for g in goals if g['target_amount'] > 10000]
+        # Gather everything the checks below need in a single pass over the goals
+        urgent_goals = []
+        goal_types = set()
+        total_monthly_needed = 0.0
+        has_emergency_goal = False
+        for g in goals:
+            if g['days_remaining'] < 90:
+                urgent_goals.append(g)
+            goal_types.add(g['type'])
+            total_monthly_needed += g['monthly_savings_needed']
+            has_emergency_goal = has_emergency_goal or 'emergency' in g['name'].lower()
         
+        # Analyze goal priorities
         if urgent_goals:
             recommendations.append(f"⏰ Focus on urgent goals: {', '.join([g['name'] for g in urgent_goals[:2]])}")
         
         # Check for conflicting goals
-        total_monthly_needed = sum(g['monthly_savings_needed'] for g in goals)
         current_capacity = self._calculate_current_savings(df)
         
         if total_monthly_needed > current_capacity * 1.2:
             recommendations.append("⚖️ You have conflicting goals. Consider prioritizing or extending timelines for some goals.")
         
         # Emergency fund recommendation
-        emergency_goals = [g for g in goals if 'emergency' in g['name'].lower()]
-        if not emergency_goals:
+        if not has_emergency_goal:
             recommendations.append("🚨 Consider adding an emergency fund goal (3-6 months of expenses).")
         
         # Diversification recommendation
-        goal_types = set(g['type'] for g in goals)
         if len(goal_types) == 1 and len(goals) > 1:
             recommendations.append("🎯 Consider diversifying your goals across different categories (savings, investment, debt payoff).")
         
@@ -241,14 +285,11 @@ class GoalTracker:
     
     def _calculate_current_savings(self, df: pd.DataFrame) -> float:
         """Calculate current monthly savings capacity."""
-        monthly_income = df[df['amount'] > 0].groupby('month_year')['amount'].sum().mean()
-        monthly_expenses = abs(df[df['amount'] < 0].groupby('month_year')['amount'].sum().mean())
-        return max(0, monthly_income - monthly_expenses)
+        return self._savings_capacity(self.precompute_df_stats(df))
     
-    def _get_difficulty_score(self, difficulty: str) -> int:
-        """Convert difficulty to numeric score."""
-        scores = {'Easy': 3, 'Medium': 2, 'Hard': 1}
-        return scores.get(difficulty, 1)
+    def _savings_capacity(self, stats: Dict[str, Any]) -> float:
+        """Monthly savings capacity from precomputed stats."""
+        return max(0, stats['monthly_income'] - stats['monthly_expenses'])
     
     def _project_completion_date(self, goal: Dict[str, Any], current_monthly_savings: float) -> date:
         """Project when goal will be completed at current savings rate."""
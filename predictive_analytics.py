@@ -1,58 +1,59 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta, date
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
+from utils import linear_fit
+
+# Basic seasonal spending factors for January..December (could be data-driven)
+SEASONAL_FACTORS = np.array([
+    0.9,   # January (post-holiday)
+    0.95,  # February
+    1.0,   # March
+    1.05,  # April
+    1.0,   # May
+    1.1,   # June (summer activities)
+    1.15,  # July (vacation)
+    1.1,   # August
+    1.0,   # September
+    1.05,  # October
+    1.2,   # November (holiday prep)
+    1.3    # December (holidays)
+])
 
 class PredictiveAnalytics:
     """Advanced predictive analytics for financial forecasting."""
     
     def __init__(self):
-        pass
+        # (dataframe, spending tables) for the last dataframe seen, swapped as one
+        # tuple so sessions sharing this instance never see a mismatched pair
+        self._spending_cache: Optional[Tuple[pd.DataFrame, Dict[str, Optional[pd.Series]]]] = None
     
     def predict_future_spending(self, df: pd.DataFrame, months_ahead: int = 3) -> Dict[str, Any]:
         """Predict future spending patterns using trend analysis."""
         
         # Prepare monthly spending data
-        monthly_data = df[df['amount'] < 0].groupby('month_year')['amount'].sum().abs()
+        monthly_data = self._spending_tables(df)['monthly']
         
         if len(monthly_data) < 2:
             return self._default_prediction(months_ahead)
         
         # Simple linear trend analysis
-        months = list(range(len(monthly_data)))
-        spending_values = monthly_data.values
+        trend_slope, trend_intercept = linear_fit(monthly_data.to_numpy(dtype=float))
         
-        # Calculate trend
-        trend_slope = np.polyfit(months, spending_values, 1)[0]
-        trend_intercept = np.polyfit(months, spending_values, 1)[1]
+        # Generate predictions for every future month at once
+        future_month_idx = len(monthly_data) + np.arange(1, months_ahead + 1)
+        predicted_values = trend_slope * future_month_idx + trend_intercept
         
-        # Generate predictions
-        future_months = []
-        predictions = []
-        last_month_idx = len(monthly_data)
+        # Add seasonal adjustment (simple)
+        seasonal_factors = self._get_seasonal_factors(monthly_data, months_ahead)
+        predictions = np.maximum(0, predicted_values * seasonal_factors).tolist()
         
-        for i in range(1, months_ahead + 1):
-            future_month_idx = last_month_idx + i
-            predicted_value = trend_slope * future_month_idx + trend_intercept
-            
-            # Add seasonal adjustment (simple)
-            seasonal_factor = self._get_seasonal_factor(monthly_data, i)
-            adjusted_prediction = max(0, predicted_value * seasonal_factor)
-            
-            predictions.append(adjusted_prediction)
-            
-            # Generate future month names
-            last_date = monthly_data.index[-1]
-            if hasattr(last_date, 'to_timestamp'):
-                last_timestamp = last_date.to_timestamp()
-            else:
-                last_timestamp = pd.to_datetime(str(last_date))
-            
-            future_date = last_timestamp + pd.DateOffset(months=i)
-            future_months.append(future_date.strftime('%Y-%m'))
+        # Generate future month names
+        last_period = pd.Period(str(monthly_data.index[-1]), freq='M')
+        future_months = pd.period_range(last_period + 1, periods=months_ahead, freq='M').strftime('%Y-%m').tolist()
         
         return {
             'predictions': predictions,
@@ -67,23 +68,37 @@ class PredictiveAnalytics:
         if 'category' not in df.columns:
             return {}
         
+        # Monthly totals per category, numbered 0..k-1 over the months each category was spent in
+        monthly_category = self._spending_tables(df)['category_monthly'].reset_index(name='y')
+        monthly_category['x'] = monthly_category.groupby('category', observed=True).cumcount()
+        
+        # Month-number x category matrix; a category's column is padded past its last month
+        table = monthly_category.pivot(index='x', columns='category', values='y')
+        present = table.notna().to_numpy(dtype=float)
+        y = table.fillna(0).to_numpy()
+        x = np.arange(len(table), dtype=float)
+        
+        # Closed-form least-squares slopes for all categories at once, as matrix-vector products
+        n = present.sum(axis=0)
+        sx, sxx = x @ present, (x * x) @ present
+        sy, sxy = y.sum(axis=0), x @ y
+        fitted = n >= 2
+        slopes = (n * sxy - sx * sy)[fitted] / (n * sxx - sx * sx)[fitted]
+        last_values = y[n[fitted].astype(int) - 1, np.flatnonzero(fitted)]
+        fits = dict(zip(table.columns[fitted], zip(slopes, last_values)))
+        
+        # Report categories in order of first appearance, as before
         category_predictions = {}
-        
         for category in df['category'].unique():
-            category_data = df[(df['category'] == category) & (df['amount'] < 0)]
-            monthly_category = category_data.groupby('month_year')['amount'].sum().abs()
+            if category not in fits:
+                continue
             
-            if len(monthly_category) >= 2:
-                # Simple trend prediction
-                trend = np.polyfit(range(len(monthly_category)), monthly_category.values, 1)[0]
-                last_value = monthly_category.iloc[-1]
-                next_month_prediction = max(0, last_value + trend)
-                
-                category_predictions[category] = {
-                    'predicted_amount': next_month_prediction,
-                    'trend': 'increasing' if trend > 0 else 'decreasing',
-                    'confidence': min(100, max(50, 100 - abs(trend) / last_value * 100))
-                }
+            trend, last_value = fits[category]
+            category_predictions[category] = {
+                'predicted_amount': max(0, last_value + trend),
+                'trend': 'increasing' if trend > 0 else 'decreasing',
+                'confidence': min(100, max(50, 100 - abs(trend) / last_value * 100))
+            }
         
         return category_predictions
     
@@ -92,13 +107,14 @@ class PredictiveAnalytics:
         anomalies = []
         
         # Monthly spending anomalies
-        monthly_spending = df[df['amount'] < 0].groupby('month_year')['amount'].sum().abs()
+        monthly_spending = self._spending_tables(df)['monthly']
         
         if len(monthly_spending) >= 3:
-            mean_spending = monthly_spending.mean()
-            std_spending = monthly_spending.std()
+            amounts = monthly_spending.to_numpy(dtype=np.float64)
+            mean_spending = amounts.mean()
+            std_spending = amounts.std(ddof=1)
             
-            for month, amount in monthly_spending.items():
+            for month, amount in zip(monthly_spending.index, amounts.tolist()):
                 z_score = abs(amount - mean_spending) / std_spending if std_spending > 0 else 0
                 
                 if z_score > 2:  # More than 2 standard deviations
@@ -110,28 +126,38 @@ class PredictiveAnalytics:
                         'severity': 'high' if z_score > 3 else 'medium'
                     })
         
-        # Category spending anomalies
+        # Category spending anomalies, from one category x month table
         if 'category' in df.columns:
-            for category in df['category'].unique():
-                category_data = df[(df['category'] == category) & (df['amount'] < 0)]
-                monthly_category = category_data.groupby('month_year')['amount'].sum().abs()
-                
-                if len(monthly_category) >= 3:
-                    mean_cat = monthly_category.mean()
-                    std_cat = monthly_category.std()
-                    
-                    for month, amount in monthly_category.items():
-                        z_score = abs(amount - mean_cat) / std_cat if std_cat > 0 else 0
-                        
-                        if z_score > 2.5:
-                            anomalies.append({
-                                'type': 'category_spending',
-                                'category': category,
-                                'month': str(month),
-                                'amount': amount,
-                                'deviation': f"{z_score:.1f} std deviations",
-                                'severity': 'high' if z_score > 3 else 'medium'
-                            })
+            monthly_category = self._spending_tables(df)['category_monthly'].unstack()
+            # Rows in order of first appearance, as the per-category loop reported them
+            order = pd.Index(df['category'].unique())
+            monthly_category = monthly_category.reindex(order[order.isin(monthly_category.index)])
+            
+            mean_cat = monthly_category.mean(axis=1)
+            std_cat = monthly_category.std(axis=1)
+            eligible = (monthly_category.count(axis=1) >= 3) & (std_cat > 0)
+            
+            z_scores = monthly_category.sub(mean_cat, axis=0).abs().div(std_cat, axis=0).to_numpy()
+            
+            # Pull every flagged cell out in bulk, then build the dicts in one pass
+            rows, cols = np.nonzero((z_scores > 2.5) & eligible.to_numpy()[:, None])
+            flagged_z = z_scores[rows, cols]
+            severities = np.where(flagged_z > 3, 'high', 'medium')
+            
+            anomalies.extend(
+                {
+                    'type': 'category_spending',
+                    'category': category,
+                    'month': str(month),
+                    'amount': amount,
+                    'deviation': f"{z_score:.1f} std deviations",
+                    'severity': str(severity)
+                }
+                for category, month, amount, z_score, severity in zip(
+                    monthly_category.index[rows], monthly_category.columns[cols],
+                    monthly_category.to_numpy()[rows, cols].tolist(), flagged_z, severities
+                )
+            )
         
         return anomalies
     
@@ -142,65 +168,69 @@ class PredictiveAnalytics:
         if not budgets:
             # Create default budgets based on historical data
             if 'category' in df.columns:
-                monthly_avg = df[df['amount'] < 0].groupby('category')['amount'].sum().abs() / max(1, len(df['month_year'].unique()))
+                category_totals = self._spending_tables(df)['category_monthly'].groupby(level='category', observed=True).sum()
+                monthly_avg = category_totals / max(1, df['month_year'].nunique())
                 budgets = {cat: amount * 1.1 for cat, amount in monthly_avg.items()}  # 10% buffer
         
         if budgets and 'category' in df.columns:
             category_predictions = self.predict_category_spending(df)
             
-            for category, budget in budgets.items():
-                if category in category_predictions:
-                    predicted = category_predictions[category]['predicted_amount']
-                    if predicted > budget:
-                        overage = predicted - budget
-                        percentage_over = (overage / budget) * 100
-                        
-                        risks.append({
-                            'category': category,
-                            'budget': budget,
-                            'predicted': predicted,
-                            'overage': overage,
-                            'percentage_over': percentage_over,
-                            'risk_level': 'high' if percentage_over > 20 else 'medium'
-                        })
+            # Line predictions up against the budgets (in budget order) and compare them all at once
+            budget = pd.Series(budgets, dtype=float)
+            predicted = pd.Series(
+                {category: prediction['predicted_amount'] for category, prediction in category_predictions.items()},
+                dtype=float
+            ).reindex(budget.index)
+            over = predicted > budget
+            
+            at_risk = pd.DataFrame({'budget': budget[over], 'predicted': predicted[over]})
+            at_risk['overage'] = at_risk['predicted'] - at_risk['budget']
+            at_risk['percentage_over'] = at_risk['overage'] / at_risk['budget'] * 100
+            at_risk['risk_level'] = np.where(at_risk['percentage_over'] > 20, 'high', 'medium')
+            
+            risks = at_risk.rename_axis('category').reset_index().to_dict('records')
         
         return risks
     
-    def _get_seasonal_factor(self, monthly_data: pd.Series, months_ahead: int) -> float:
-        """Calculate simple seasonal adjustment factor."""
+    def _spending_tables(self, df: pd.DataFrame) -> Dict[str, Optional[pd.Series]]:
+        """Expense totals per month and per (category, month_year), computed once per dataframe."""
+        # Holding a reference to the dataframe keeps its identity from being reused
+        cached = self._spending_cache
+        if cached is not None and cached[0] is df:
+            return cached[1]
+        
+        # Negate the expenses once up front so the grouped totals come out positive
+        expenses = df[df['amount'] < 0]
+        spent = -expenses['amount']
+        tables = {
+            'monthly': spent.groupby(expenses['month_year'], observed=True).sum(),
+            'category_monthly': (
+                spent.groupby([expenses['category'], expenses['month_year']], observed=True).sum()
+                if 'category' in df.columns else None
+            )
+        }
+        
+        self._spending_cache = (df, tables)
+        return tables
+    
+    def _get_seasonal_factors(self, monthly_data: pd.Series, months_ahead: int) -> np.ndarray:
+        """Calculate simple seasonal adjustment factors for each of the next months_ahead months."""
         if len(monthly_data) < 12:
-            return 1.0  # No seasonal adjustment for insufficient data
+            return np.ones(months_ahead)  # No seasonal adjustment for insufficient data
         
-        # Simple seasonal pattern (could be enhanced)
+        # Simple seasonal pattern (could be enhanced): index of each target month, 0 = January
         current_month = datetime.now().month
-        future_month = ((current_month + months_ahead - 1) % 12) + 1
-        
-        # Basic seasonal factors (could be data-driven)
-        seasonal_factors = {
-            1: 0.9,   # January (post-holiday)
-            2: 0.95,  # February
-            3: 1.0,   # March
-            4: 1.05,  # April
-            5: 1.0,   # May
-            6: 1.1,   # June (summer activities)
-            7: 1.15,  # July (vacation)
-            8: 1.1,   # August
-            9: 1.0,   # September
-            10: 1.05, # October
-            11: 1.2,  # November (holiday prep)
-            12: 1.3   # December (holidays)
-        }
-        
-        return seasonal_factors.get(future_month, 1.0)
+        return SEASONAL_FACTORS[(current_month + np.arange(months_ahead)) % 12]
     
     def _calculate_confidence(self, historical_data: pd.Series, predictions: List[float]) -> float:
         """Calculate confidence level for predictions."""
         if len(historical_data) < 3:
             return 60.0
         
-        # Calculate historical variance
-        variance = historical_data.var()
-        mean_value = historical_data.mean()
+        # Calculate historical variance on the raw values (no NaNs here, so skip pandas' NaN handling)
+        values = historical_data.to_numpy(dtype=np.float64)
+        variance = values.var(ddof=1)
+        mean_value = values.mean()
         
         if mean_value == 0:
             return 50.0
@@ -230,7 +260,7 @@ class PredictiveAnalytics:
     def create_prediction_chart(self, df: pd.DataFrame, prediction_data: Dict[str, Any]) -> go.Figure:
         """Create visualization for spending predictions."""
         # Historical data
-        monthly_spending = df[df['amount'] < 0].groupby('month_year')['amount'].sum().abs()
+        monthly_spending = self._spending_tables(df)['monthly']
         
         fig = go.Figure()
         
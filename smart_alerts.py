@@ -2,60 +2,134 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Any
+from types import MappingProxyType
 import streamlit as st
+from utils import linear_fit
+
+# Alert trigger levels, read-only and shared by every instance
+ALERT_THRESHOLDS = MappingProxyType({
+    'spending_spike': 1.5,    # 50% above normal
+    'budget_warning': 0.8,    # 80% of budget used
+    'unusual_transaction': 2.0, # 2x std deviation
+    'category_overspend': 1.3  # 30% above category average
+})
+
+# Sort priority of each alert type; unknown types rank lowest
+ALERT_PRIORITIES = {
+    'budget_exceeded': 10,
+    'spending_spike': 9,
+    'budget_warning': 8,
+    'unusual_transaction': 7,
+    'category_overspend': 6,
+    'upward_trend': 5,
+    'missing_recurring': 3
+}
 
 class SmartAlertsSystem:
     """AI-powered spending alerts and notifications."""
     
     def __init__(self):
-        self.alert_thresholds = {
-            'spending_spike': 1.5,    # 50% above normal
-            'budget_warning': 0.8,    # 80% of budget used
-            'unusual_transaction': 2.0, # 2x std deviation
-            'category_overspend': 1.3  # 30% above category average
-        }
+        self.alert_thresholds = ALERT_THRESHOLDS
     
     def generate_alerts(self, df: pd.DataFrame, budgets: Dict[str, float] = None) -> List[Dict[str, Any]]:
         """Generate comprehensive smart alerts."""
         alerts = []
         
-        # Current month data
-        current_month = datetime.now().strftime('%Y-%m')
-        current_month_data = df[df['date'].dt.strftime('%Y-%m') == current_month]
-        
-        # 1. Budget alerts
-        if budgets:
-            alerts.extend(self._check_budget_alerts(current_month_data, budgets))
-        
-        # 2. Spending spike alerts
-        alerts.extend(self._check_spending_spikes(df, current_month_data))
+        if df.empty:
+            return alerts
         
-        # 3. Unusual transaction alerts
-        alerts.extend(self._check_unusual_transactions(df, current_month_data))
+        # Expense subsets and totals shared by the checks below, computed once
+        spending = self._summarize_spending(df)
         
-        # 4. Category overspending alerts
-        alerts.extend(self._check_category_overspending(df, current_month_data))
+        # Checks 1-4 compare this month's expenses against history, so none can fire without any
+        if not spending['current_expenses'].empty:
+            # 1. Budget alerts
+            if budgets:
+                alerts.extend(self._check_budget_alerts(spending, budgets))
+            
+            # 2. Spending spike alerts
+            alerts.extend(self._check_spending_spikes(spending))
+            
+            # 3. Unusual transaction alerts
+            alerts.extend(self._check_unusual_transactions(spending))
+            
+            # 4. Category overspending alerts
+            alerts.extend(self._check_category_overspending(spending))
         
         # 5. Trend alerts
-        alerts.extend(self._check_trend_alerts(df))
+        alerts.extend(self._check_trend_alerts(spending))
         
         # 6. Recurring expense alerts
         alerts.extend(self._check_recurring_expense_alerts(df))
         
         # Sort by priority
-        alerts.sort(key=lambda x: self._get_alert_priority(x['type']), reverse=True)
+        alerts.sort(key=lambda x: ALERT_PRIORITIES.get(x['type'], 1), reverse=True)
         
         return alerts[:10]  # Return top 10 most important alerts
     
-    def _check_budget_alerts(self, current_data: pd.DataFrame, budgets: Dict[str, float]) -> List[Dict[str, Any]]:
+    def _summarize_spending(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Split out expenses and this month's expenses once, with the totals the alert checks share."""
+        expenses = df[df['amount'] < 0]
+        
+        # Current month data; compare month periods directly rather than formatting every date
+        current_expenses = expenses[expenses['month_year'] == pd.Period(datetime.now(), freq='M')]
+        
+        has_category = 'category' in df.columns
+        return {
+            'expenses': expenses,
+            'current_expenses': current_expenses,
+            'monthly_spending': expenses.groupby('month_year', observed=True)['amount'].sum().abs(),
+            'category_monthly_avg': self._category_monthly_average(expenses) if has_category else None,
+            'current_category_spending': self._sum_by_category(current_expenses) if has_category else None
+        }
+    
+    def _group_codes(self, column: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+        """Integer group codes (-1 for missing) and sorted labels, reusing categorical codes when present."""
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            return column.cat.codes.to_numpy(), column.cat.categories
+        codes, labels = pd.factorize(column, sort=True)
+        return codes, pd.Index(labels)
+    
+    def _sum_by_category(self, expenses: pd.DataFrame) -> pd.Series:
+        """Absolute spending per category, like groupby('category', observed=True) but summed with one bincount."""
+        codes, labels = self._group_codes(expenses['category'])
+        
+        # Missing categories (code -1) are left out, as groupby drops them
+        valid = codes >= 0
+        codes = codes[valid]
+        totals = np.bincount(codes, weights=expenses['amount'].to_numpy()[valid], minlength=len(labels))
+        observed = np.bincount(codes, minlength=len(labels)) > 0
+        return pd.Series(np.abs(totals[observed]), index=pd.Index(labels[observed], name='category'), name='amount')
+    
+    def _category_monthly_average(self, expenses: pd.DataFrame) -> pd.Series:
+        """Average monthly spending per category over the months it had spending, from one bincount."""
+        category_codes, categories = self._group_codes(expenses['category'])
+        month_codes, months = self._group_codes(expenses['month_year'])
+        
+        # One cell per (category, month); missing keys are left out, as groupby drops them
+        valid = (category_codes >= 0) & (month_codes >= 0)
+        # Categorical codes can be int8, so widen them before combining or the cell index overflows
+        cells = category_codes[valid].astype(np.intp) * len(months) + month_codes[valid].astype(np.intp)
+        size = len(categories) * len(months)
+        totals = np.bincount(cells, weights=expenses['amount'].to_numpy()[valid], minlength=size)
+        months_spent = (np.bincount(cells, minlength=size) > 0).reshape(len(categories), len(months)).sum(axis=1)
+        
+        # Every cell total is negative, so the mean of their absolute values is minus the category total over its months
+        category_totals = totals.reshape(len(categories), len(months)).sum(axis=1)
+        observed = months_spent > 0
+        return pd.Series(
+            -category_totals[observed] / months_spent[observed],
+            index=pd.Index(categories[observed], name='category'), name='amount'
+        )
+    
+    def _check_budget_alerts(self, spending: Dict[str, Any], budgets: Dict[str, float]) -> List[Dict[str, Any]]:
         """Check for budget-related alerts."""
         alerts = []
         
-        if 'category' not in current_data.columns:
+        current_spending = spending['current_category_spending']
+        if current_spending is None:
             return alerts
         
-        current_spending = current_data[current_data['amount'] < 0].groupby('category')['amount'].sum().abs()
-        
         for category, budget in budgets.items():
             if category in current_spending:
                 spent = current_spending[category]
@@ -84,18 +158,18 @@ class SmartAlertsSystem:
         
         return alerts
     
-    def _check_spending_spikes(self, df: pd.DataFrame, current_data: pd.DataFrame) -> List[Dict[str, Any]]:
+    def _check_spending_spikes(self, spending: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Check for unusual spending spikes."""
         alerts = []
         
         # Calculate historical monthly average
-        monthly_spending = df[df['amount'] < 0].groupby('month_year')['amount'].sum().abs()
+        monthly_spending = spending['monthly_spending']
         
         if len(monthly_spending) < 2:
             return alerts
         
         historical_avg = monthly_spending[:-1].mean()  # Exclude current month
-        current_spending = abs(current_data[current_data['amount'] < 0]['amount'].sum())
+        current_spending = abs(spending['current_expenses']['amount'].sum())
         
         if current_spending > historical_avg * self.alert_thresholds['spending_spike']:
             increase_percentage = ((current_spending - historical_avg) / historical_avg) * 100
@@ -110,50 +184,59 @@ class SmartAlertsSystem:
         
         return alerts
     
-    def _check_unusual_transactions(self, df: pd.DataFrame, current_data: pd.DataFrame) -> List[Dict[str, Any]]:
+    def _check_unusual_transactions(self, spending: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Check for unusually large transactions."""
         alerts = []
         
-        # Calculate transaction size statistics
-        transaction_sizes = abs(df[df['amount'] < 0]['amount'])
+        # Calculate transaction size statistics (fewer than two expenses leaves no spread to compare against)
+        transaction_sizes = np.abs(spending['expenses']['amount'].to_numpy())
+        if len(transaction_sizes) < 2:
+            return alerts
+        
         mean_transaction = transaction_sizes.mean()
-        std_transaction = transaction_sizes.std()
+        std_transaction = transaction_sizes.std(ddof=1)
         
         if std_transaction == 0:
             return alerts
         
-        # Check current month's large transactions
-        current_transactions = current_data[current_data['amount'] < 0]
+        # Score every current-month expense at once, then build alerts only for the flagged ones
+        current_transactions = spending['current_expenses']
+        amounts = np.abs(current_transactions['amount'].to_numpy())
         
-        for _, transaction in current_transactions.iterrows():
-            amount = abs(transaction['amount'])
-            z_score = (amount - mean_transaction) / std_transaction
-            
-            if z_score > self.alert_thresholds['unusual_transaction']:
-                alerts.append({
-                    'type': 'unusual_transaction',
-                    'message': f"💳 Unusual transaction: ${amount:.2f} at {transaction['description']} ({z_score:.1f}x your typical spending)",
-                    'severity': 'medium',
-                    'amount': amount,
-                    'description': transaction['description'],
-                    'date': transaction['date'].strftime('%Y-%m-%d'),
-                    'z_score': z_score
-                })
+        # z > threshold is the same as amount > mean + threshold * std, so one comparison
+        # per row finds the outliers and z-scores are only computed for those
+        cutoff = mean_transaction + self.alert_thresholds['unusual_transaction'] * std_transaction
+        flagged = np.flatnonzero(amounts > cutoff)
+        flagged_amounts = amounts[flagged]
+        z_scores = (flagged_amounts - mean_transaction) / std_transaction
+        
+        descriptions = current_transactions['description'].to_numpy()[flagged]
+        dates = current_transactions['date'].iloc[flagged].dt.strftime('%Y-%m-%d').tolist()
+        
+        for amount, z_score, description, date_str in zip(flagged_amounts.tolist(), z_scores, descriptions, dates):
+            alerts.append({
+                'type': 'unusual_transaction',
+                'message': f"💳 Unusual transaction: ${amount:.2f} at {description} ({z_score:.1f}x your typical spending)",
+                'severity': 'medium',
+                'amount': amount,
+                'description': description,
+                'date': date_str,
+                'z_score': z_score
+            })
         
         return alerts
     
-    def _check_category_overspending(self, df: pd.DataFrame, current_data: pd.DataFrame) -> List[Dict[str, Any]]:
+    def _check_category_overspending(self, spending: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Check for category-specific overspending."""
         alerts = []
         
-        if 'category' not in df.columns:
+        # Historical category averages
+        historical_category_avg = spending['category_monthly_avg']
+        if historical_category_avg is None:
             return alerts
         
-        # Calculate historical category averages
-        historical_category_avg = df[df['amount'] < 0].groupby(['category', 'month_year'])['amount'].sum().abs().groupby('category').mean()
-        
         # Current month category spending
-        current_category_spending = current_data[current_data['amount'] < 0].groupby('category')['amount'].sum().abs()
+        current_category_spending = spending['current_category_spending']
         
         for category in current_category_spending.index:
             if category in historical_category_avg:
@@ -174,22 +257,21 @@ class SmartAlertsSystem:
         
         return alerts
     
-    def _check_trend_alerts(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    def _check_trend_alerts(self, spending: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Check for concerning spending trends."""
         alerts = []
         
-        monthly_spending = df[df['amount'] < 0].groupby('month_year')['amount'].sum().abs()
+        monthly_spending = spending['monthly_spending']
         
         if len(monthly_spending) < 3:
             return alerts
         
-        # Calculate trend
-        months = list(range(len(monthly_spending)))
-        spending_values = monthly_spending.values
-        trend_slope = np.polyfit(months, spending_values, 1)[0]
+        # Calculate trend on the raw values, reusing them for the average below
+        spending_values = monthly_spending.to_numpy(dtype=float)
+        trend_slope, _ = linear_fit(spending_values)
         
         # Check for concerning upward trend
-        if trend_slope > monthly_spending.mean() * 0.1:  # 10% increase per month
+        if trend_slope > spending_values.mean() * 0.1:  # 10% increase per month
             alerts.append({
                 'type': 'upward_trend',
                 'message': f"📈 Your spending has been increasing by ${trend_slope:.2f} per month over the last {len(monthly_spending)} months",
@@ -204,51 +286,43 @@ class SmartAlertsSystem:
         """Check for missing or changed recurring expenses."""
         alerts = []
         
-        # Find potential recurring expenses (same description, similar amounts)
-        recurring_candidates = df.groupby('description').agg({
-            'amount': ['count', 'std'],
-            'date': ['min', 'max']
-        }).reset_index()
+        # Only descriptions seen at least three times can be recurring; skip aggregating the one-offs
+        description_counts = df['description'].value_counts()
+        frequent = df[df['description'].isin(description_counts.index[description_counts >= 3])]
         
-        recurring_candidates.columns = ['description', 'count', 'std', 'first_date', 'last_date']
+        # Find potential recurring expenses (same description, similar amounts)
+        recurring_candidates = frequent.groupby('description').agg(
+            std=('amount', 'std'),
+            last_date=('date', 'max')
+        ).reset_index()
         
         # Filter for likely recurring expenses
-        recurring_expenses = recurring_candidates[
-            (recurring_candidates['count'] >= 3) &
-            (recurring_candidates['std'] < 10)  # Low variation in amount
-        ]
+        recurring_expenses = recurring_candidates[recurring_candidates['std'] < 10]  # Low variation in amount
         
-        current_month = datetime.now().strftime('%Y-%m')
+        # Whole days since each expense was last seen, for all candidates at once
+        last_dates = recurring_expenses['last_date'].to_numpy().astype('datetime64[D]')
+        days_since = (np.datetime64(datetime.now().date(), 'D') - last_dates).astype(int)
         
-        for _, expense in recurring_expenses.iterrows():
-            last_occurrence = expense['last_date']
-            days_since = (datetime.now() - last_occurrence).days
-            
-            # Alert if recurring expense is overdue
-            if days_since > 35:  # More than 35 days (allowing for monthly variation)
-                alerts.append({
-                    'type': 'missing_recurring',
-                    'message': f"🔄 Missing recurring expense: '{expense['description']}' last seen {days_since} days ago",
-                    'severity': 'low',
-                    'description': expense['description'],
-                    'days_since': days_since,
-                    'last_occurrence': last_occurrence.strftime('%Y-%m-%d')
-                })
+        # Alert if recurring expense is overdue
+        overdue = np.flatnonzero(days_since > 35)  # More than 35 days (allowing for monthly variation)
+        descriptions = recurring_expenses['description'].to_numpy()[overdue]
+        last_seen = np.datetime_as_string(last_dates[overdue], unit='D')
+        
+        for description, days, last_occurrence in zip(descriptions, days_since[overdue].tolist(), last_seen):
+            alerts.append({
+                'type': 'missing_recurring',
+                'message': f"🔄 Missing recurring expense: '{description}' last seen {days} days ago",
+                'severity': 'low',
+                'description': description,
+                'days_since': days,
+                'last_occurrence': str(last_occurrence)
+            })
         
         return alerts
     
     def _get_alert_priority(self, alert_type: str) -> int:
         """Get priority score for alert sorting."""
-        priority_scores = {
-            'budget_exceeded': 10,
-            'spending_spike': 9,
-            'budget_warning': 8,
-            'unusual_transaction': 7,
-            'category_overspend': 6,
-            'upward_trend': 5,
-            'missing_recurring': 3
-        }
-        return priority_scores.get(alert_type, 1)
+        return ALERT_PRIORITIES.get(alert_type, 1)
     
     def create_alerts_summary(self, alerts: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Create summary of alerts by severity."""
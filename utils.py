@@ -1,10 +1,32 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from typing import Any, Optional, List, Dict
+from typing import Any, Optional, List, Dict, Tuple
 import re
 from datetime import datetime
 import io
+import csv
+import hashlib
+
+# Everything that is not part of a plain signed decimal number (currency symbols, commas, spaces)
+NON_NUMERIC_PATTERN = re.compile(r'[^\d.-]')
+
+# Characters not allowed in file names on common filesystems
+UNSAFE_FILENAME_PATTERN = re.compile(r'[<>:"/\\|?*]')
+
+# Date formats tried in order before falling back to pandas' own inference
+DATE_FORMATS = (
+    '%Y-%m-%d',
+    '%m/%d/%Y',
+    '%d/%m/%Y',
+    '%Y/%m/%d',
+    '%m-%d-%Y',
+    '%d-%m-%Y',
+    '%B %d, %Y',
+    '%b %d, %Y',
+    '%d %B %Y',
+    '%d %b %Y'
+)
 
 def format_currency(amount: float) -> str:
     """Format amount as currency string."""
@@ -35,17 +57,14 @@ def validate_file(uploaded_file) -> bool:
         return False
     
     try:
-        # Try to read the file to check if it's valid
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file, nrows=5)  # Read only first 5 rows for validation
-        else:
-            df = pd.read_excel(uploaded_file, nrows=5)
+        # Only the header row is needed to count columns
+        n_columns = _count_header_columns(uploaded_file)
         
         # Reset file pointer
         uploaded_file.seek(0)
         
         # Check if file has minimum required columns
-        if len(df.columns) < 3:
+        if n_columns < 3:
             st.error("File must have at least 3 columns (date, description, amount).")
             return False
         
@@ -55,6 +74,32 @@ def validate_file(uploaded_file) -> bool:
         st.error(f"Error reading file: {str(e)}")
         return False
 
+def _count_header_columns(uploaded_file) -> int:
+    """Number of columns in the header row, reading as little of the file as possible."""
+    name = uploaded_file.name.lower()
+    
+    if name.endswith('.csv'):
+        # Parse just the first line; the csv module keeps quoted commas inside one field
+        first_line = uploaded_file.readline().decode('utf-8-sig', errors='replace')
+        return len(next(csv.reader([first_line]), []))
+    
+    if name.endswith('.xlsx'):
+        # Read-only mode streams rows instead of loading the whole workbook; like
+        # pd.read_excel, check the first sheet rather than the active one
+        import openpyxl
+        workbook = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+        try:
+            header = next(workbook.worksheets[0].iter_rows(max_row=1, values_only=True), ())
+        finally:
+            workbook.close()
+        
+        # Trailing empty cells are not columns
+        filled = [i for i, value in enumerate(header) if value is not None]
+        return filled[-1] + 1 if filled else 0
+    
+    # Legacy .xls workbooks go through pandas' reader
+    return len(pd.read_excel(uploaded_file, nrows=5).columns)
+
 def clean_amount_string(amount_str: str) -> float:
     """Clean and convert amount string to float."""
     if pd.isna(amount_str):
@@ -62,7 +107,7 @@ def clean_amount_string(amount_str: str) -> float:
     
     # Convert to string and remove common currency symbols and formatting
     cleaned = str(amount_str).strip()
-    cleaned = re.sub(r'[^\d.-]', '', cleaned)
+    cleaned = NON_NUMERIC_PATTERN.sub('', cleaned)
     
     try:
         return float(cleaned)
@@ -74,21 +119,7 @@ def parse_date_string(date_str: str) -> Optional[datetime]:
     if pd.isna(date_str):
         return None
     
-    # Common date formats to try
-    formats = [
-        '%Y-%m-%d',
-        '%m/%d/%Y',
-        '%d/%m/%Y',
-        '%Y/%m/%d',
-        '%m-%d-%Y',
-        '%d-%m-%Y',
-        '%B %d, %Y',
-        '%b %d, %Y',
-        '%d %B %Y',
-        '%d %b %Y'
-    ]
-    
-    for fmt in formats:
+    for fmt in DATE_FORMATS:
         try:
             return datetime.strptime(str(date_str).strip(), fmt)
         except ValueError:
@@ -100,6 +131,30 @@ def parse_date_string(date_str: str) -> Optional[datetime]:
     except:
         return None
 
+def parse_date_series(values: pd.Series) -> pd.Series:
+    """Parse a whole column like parse_date_string, one vectorized pass per format; unparseable values become NaT."""
+    parsed = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+    pending = np.flatnonzero(values.notna().to_numpy())
+    text = values.iloc[pending].astype(str).str.strip().to_numpy(dtype=object)
+    
+    # Each format only sees the values no earlier format could parse, so the first match wins as before
+    for fmt in DATE_FORMATS:
+        if len(pending) == 0:
+            break
+        attempt = pd.to_datetime(text, format=fmt, errors='coerce').to_numpy()
+        matched = ~np.isnat(attempt)
+        parsed[pending[matched]] = attempt[matched]
+        pending, text = pending[~matched], text[~matched]
+    
+    # If none of the formats work, let pandas infer each remaining value
+    if len(pending) > 0:
+        try:
+            parsed[pending] = pd.to_datetime(text, format='mixed', errors='coerce').to_numpy(dtype='datetime64[ns]')
+        except (ValueError, TypeError):
+            pass
+    
+    return pd.Series(parsed, index=values.index)
+
 def detect_column_types(df: pd.DataFrame) -> Dict[str, str]:
     """Detect likely column types in the dataframe."""
     column_types = {}
@@ -113,10 +168,7 @@ def detect_column_types(df: pd.DataFrame) -> Dict[str, str]:
             column_types[col] = 'date'
         elif len(sample_values) > 0:
             # Try to parse a few values as dates
-            date_count = 0
-            for val in sample_values:
-                if parse_date_string(str(val)) is not None:
-                    date_count += 1
+            date_count = parse_date_series(sample_values.astype(str)).notna().sum()
             if date_count >= len(sample_values) * 0.7:  # 70% are valid dates
                 column_types[col] = 'date'
         
@@ -124,16 +176,9 @@ def detect_column_types(df: pd.DataFrame) -> Dict[str, str]:
         if any(keyword in col_lower for keyword in ['amount', 'price', 'cost', 'value', 'debit', 'credit']):
             column_types[col] = 'amount'
         elif len(sample_values) > 0:
-            # Check if values look like amounts
-            numeric_count = 0
-            for val in sample_values:
-                try:
-                    clean_amount_string(str(val))
-                    numeric_count += 1
-                except:
-                    pass
-            if numeric_count >= len(sample_values) * 0.8:  # 80% are numeric
-                column_types[col] = 'amount'
+            # clean_amount_string never raises (unparseable text becomes 0.0), so every
+            # sampled value counts as an amount and no per-value check is needed
+            column_types[col] = 'amount'
         
         # Description detection
         if any(keyword in col_lower for keyword in ['description', 'desc', 'memo', 'detail', 'merchant']):
@@ -182,6 +227,25 @@ def get_date_range_options() -> List[Dict[str, Any]]:
         }
     ]
 
+def _sign_buckets(values: np.ndarray) -> np.ndarray:
+    """Bucket index per amount by sign: 0 expense, 1 zero or missing, 2 income."""
+    return (np.sign(np.nan_to_num(values)) + 1).astype(np.intp)
+
+def income_expense_totals(amounts: pd.Series) -> Tuple[float, float]:
+    """Total income and total expenses (as a positive number) from one pass over the amounts."""
+    # Missing amounts count as zero, as the masked sums used to skip them
+    values = np.nan_to_num(amounts.to_numpy(dtype=float))
+    sums = np.bincount(_sign_buckets(values), weights=values, minlength=3)
+    return sums[2], -sums[0]
+
+def linear_fit(values: np.ndarray) -> Tuple[float, float]:
+    """Least-squares slope and intercept of values against 0..n-1, in closed form."""
+    n = len(values)
+    x = np.arange(n, dtype=float)
+    sx, sy = x.sum(), values.sum()
+    slope = (n * (x * values).sum() - sx * sy) / (n * (x * x).sum() - sx * sx)
+    return slope, (sy - slope * sx) / n
+
 def calculate_financial_metrics(df: pd.DataFrame) -> Dict[str, Any]:
     """Calculate various financial metrics from the transaction data."""
     metrics = {}
@@ -191,20 +255,25 @@ def calculate_financial_metrics(df: pd.DataFrame) -> Dict[str, Any]:
     
     # Basic metrics
     metrics['total_transactions'] = len(df)
-    metrics['total_income'] = df[df['amount'] > 0]['amount'].sum()
-    metrics['total_expenses'] = abs(df[df['amount'] < 0]['amount'].sum())
+    # Sums per sign bucket; missing amounts add nothing and aren't counted
+    amounts = np.nan_to_num(df['amount'].to_numpy(dtype=float))
+    sums = np.bincount(_sign_buckets(amounts), weights=amounts, minlength=3)
+    n_expenses, n_income = np.count_nonzero(amounts < 0), np.count_nonzero(amounts > 0)
+    
+    metrics['total_income'], metrics['total_expenses'] = sums[2], -sums[0]
     metrics['net_flow'] = metrics['total_income'] - metrics['total_expenses']
     
     # Average metrics
-    metrics['avg_income_per_transaction'] = df[df['amount'] > 0]['amount'].mean() if len(df[df['amount'] > 0]) > 0 else 0
-    metrics['avg_expense_per_transaction'] = abs(df[df['amount'] < 0]['amount'].mean()) if len(df[df['amount'] < 0]) > 0 else 0
+    metrics['avg_income_per_transaction'] = metrics['total_income'] / n_income if n_income > 0 else 0
+    metrics['avg_expense_per_transaction'] = metrics['total_expenses'] / n_expenses if n_expenses > 0 else 0
     
     # Date range
     if 'date' in df.columns:
+        start, end = df['date'].min(), df['date'].max()
         metrics['date_range'] = {
-            'start': df['date'].min(),
-            'end': df['date'].max(),
-            'days': (df['date'].max() - df['date'].min()).days
+            'start': start,
+            'end': end,
+            'days': (end - start).days
         }
         
         # Monthly averages
@@ -215,7 +284,7 @@ def calculate_financial_metrics(df: pd.DataFrame) -> Dict[str, Any]:
     
     # Category metrics (if available)
     if 'category' in df.columns:
-        expense_by_category = df[df['amount'] < 0].groupby('category')['amount'].sum().abs()
+        expense_by_category = df[df['amount'] < 0].groupby('category', observed=True)['amount'].sum().abs()
         metrics['top_expense_category'] = expense_by_category.idxmax() if len(expense_by_category) > 0 else None
         metrics['top_expense_amount'] = expense_by_category.max() if len(expense_by_category) > 0 else 0
         metrics['category_count'] = df['category'].nunique()
@@ -260,7 +329,7 @@ def create_sample_data_template() -> pd.DataFrame:
 def sanitize_filename(filename: str) -> str:
     """Sanitize filename for safe file operations."""
     # Remove or replace invalid characters
-    sanitized = re.sub(r'[<>:"/\\|?*]', '_', filename)
+    sanitized = UNSAFE_FILENAME_PATTERN.sub('_', filename)
     
     # Limit length
     if len(sanitized) > 100:
@@ -276,3 +345,16 @@ def format_large_number(number: float) -> str:
         return f"${number/1_000:.1f}K"
     else:
         return f"${number:.2f}"
+
+def pandas_fingerprint(data) -> str:
+    """Content hash of a DataFrame or Series, sensitive to row order, column names and dtypes."""
+    if isinstance(data, pd.DataFrame):
+        row_hashes = pd.util.hash_pandas_object(data, index=False)
+        schema = (tuple(data.columns), tuple(str(dtype) for dtype in data.dtypes))
+    else:
+        row_hashes = pd.util.hash_pandas_object(data, index=True)
+        schema = (data.name, str(data.dtype))
+    
+    digest = hashlib.blake2b(row_hashes.to_numpy().tobytes(), digest_size=16)
+    digest.update(repr(schema).encode())
+    return digest.hexdigest()
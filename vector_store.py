@@ -1,40 +1,117 @@
 import chromadb
 from chromadb.config import Settings
+from chromadb.utils import embedding_functions
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator
 import streamlit as st
 from datetime import datetime
-import uuid
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from collections import Counter, OrderedDict, deque
+import hashlib
+import threading
+import weakref
 import os
+from utils import pandas_fingerprint
+
+# Document embeddings by SHA-256 of the document text, shared by every store in the
+# process so re-uploads and overlapping statements skip the embedding model. Vectors
+# are held as int8 with a per-vector scale, a quarter of the float32 footprint for a
+# cosine similarity error around 1e-4
+MAX_CACHED_DOCUMENT_EMBEDDINGS = 50_000
+_document_embeddings: OrderedDict = OrderedDict()
+_document_embeddings_lock = threading.Lock()
+
+def _quantize_embedding(embedding: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Symmetric int8 scalar quantization of one embedding."""
+    scale = float(np.abs(embedding).max()) / 127 or 1.0
+    return np.round(embedding / scale).astype(np.int8), scale
+
+def _dequantize_embedding(quantized: Tuple[np.ndarray, float]) -> np.ndarray:
+    """Approximate float32 embedding back from its int8 form."""
+    values, scale = quantized
+    return values.astype(np.float32) * np.float32(scale)
+
+def _delete_collection(client, collection_name: str):
+    """Delete a collection from the shared in-memory backend, if it still exists."""
+    try:
+        client.delete_collection(collection_name)
+    except Exception:
+        pass  # Already deleted
 
 class VectorStore:
-    """Manages vector storage and semantic search for financial transactions."""
+    """Manages vector storage and semantic search for financial transactions.
+    
+    Each store owns its collection: it is deleted by drop(), or once the store is
+    garbage collected (e.g. with the Streamlit session holding it).
+    """
     
-    def __init__(self):
+    def __init__(self, collection_name: str = "financial_transactions"):
+        self.collection_name = collection_name
         self.client = None
         self.collection = None
+        self.ingest_future: Optional[Future] = None
+        self._release: Optional[weakref.finalize] = None
+        
+        # Background ingests of successive uploads run one at a time against the collection
+        self._ingest_lock = threading.Lock()
+        
+        # Number of stored transactions, tracked here so searches skip a count() round trip
+        self._count = 0
+        
+        # Queries are embedded here rather than inside Chroma so the vectors can
+        # also drive the near-duplicate search cache
+        self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        
+        # Search result caches, invalidated whenever the collection is rebuilt:
+        # exact hits by normalized query text, near-duplicates by embedding similarity
+        self._search_cache: OrderedDict = OrderedDict()
+        self._recent_searches: deque = deque(maxlen=64)
+        self.max_cached_searches = 128
+        
+        # Query embeddings by normalized query text; these don't depend on the stored
+        # transactions, so they survive collection rebuilds
+        self._embedding_cache: OrderedDict = OrderedDict()
+        self.max_cached_embeddings = 256
+        self.similar_query_threshold = 0.98
+        
+        # Corpus size above which the HNSW graph is built with more links per node
+        self.large_corpus_threshold = 50_000
+        
+        # Ingestion embeds batches of this many rows on parallel threads; Chroma 1.x
+        # releases the GIL while adding, while older clients get the serial path
+        self.ingest_batch_size = 500
+        self.max_ingest_workers = min(8, os.cpu_count() or 1)
+        self.parallel_ingest = int(chromadb.__version__.split('.')[0]) >= 1
+        
         self._initialize_chroma()
     
     def _initialize_chroma(self):
         """Initialize ChromaDB client and collection."""
         try:
-            # Configure ChromaDB to use in-memory storage for simplicity
             self.client = chromadb.Client(Settings(
                 is_persistent=False,  # Use in-memory storage
                 anonymized_telemetry=False
             ))
             
             # Create or get collection
-            collection_name = "financial_transactions"
+            collection_name = self.collection_name
             try:
-                self.collection = self.client.get_collection(collection_name)
+                self.collection = self.client.get_collection(
+                    collection_name, embedding_function=self.embedding_function
+                )
             except Exception:
                 self.collection = self.client.create_collection(
                     name=collection_name,
-                    metadata={"description": "Financial transaction embeddings"}
+                    metadata={"description": "Financial transaction embeddings"},
+                    embedding_function=self.embedding_function
                 )
             
+            self.refresh_count()
+            
+            # In-memory clients in one process share a backend, so an abandoned
+            # collection would otherwise stay in memory until the server restarts
+            self._release = weakref.finalize(self, _delete_collection, self.client, collection_name)
             st.success("✅ Vector database initialized successfully!")
             
         except Exception as e:
@@ -42,100 +119,321 @@ class VectorStore:
             self.client = None
             self.collection = None
     
-    def add_transactions(self, df: pd.DataFrame) -> bool:
-        """Add transactions to the vector store."""
+    def add_transactions(self, df: pd.DataFrame, notify: bool = True, reset: bool = False) -> bool:
+        """Add transactions to the vector store.
+        
+        Stored transactions missing from df are removed and only new ones are embedded;
+        pass reset=True to rebuild the collection from scratch instead.
+        Pass notify=False when running off the Streamlit script thread.
+        """
         if self.collection is None:
-            st.error("Vector database not initialized")
+            if notify:
+                st.error("Vector database not initialized")
             return False
         
         try:
-            # Clear existing data
-            self.collection.delete()
+            # Skip re-embedding when the stored collection already holds exactly this data
+            fingerprint = self._data_fingerprint(df)
+            if not reset and self._holds_data(fingerprint, len(df)):
+                if notify:
+                    st.success(f"✅ {len(df)} transactions already in vector database")
+                return True
             
-            # Prepare documents and metadata
-            documents = []
-            metadatas = []
-            ids = []
+            if reset or self.refresh_count() == 0:
+                # Recreate the collection with an index sized to the data
+                self._reset_collection(len(df), fingerprint)
+                stored = None
+            else:
+                # Incremental update: an unchanged ID means an unchanged document
+                stored = set(self.collection.get(include=[])['ids'])
             
-            for idx, row in df.iterrows():
-                # Create a searchable text representation
-                doc_text = self._create_document_text(row)
-                documents.append(doc_text)
-                
-                # Prepare metadata
-                metadata = {
-                    "date": row['date'].strftime('%Y-%m-%d'),
-                    "amount": float(row['amount']),
-                    "category": str(row.get('category', 'Other')),
-                    "description": str(row['description']),
-                    "transaction_type": str(row.get('transaction_type', 'unknown')),
-                    "month": int(row.get('month', 1)),
-                    "year": int(row.get('year', 2023))
-                }
-                metadatas.append(metadata)
-                
-                # Generate unique ID
-                ids.append(str(uuid.uuid4()))
-            
-            # Add to collection in batches
-            batch_size = 100
-            for i in range(0, len(documents), batch_size):
-                batch_docs = documents[i:i+batch_size]
-                batch_metas = metadatas[i:i+batch_size]
-                batch_ids = ids[i:i+batch_size]
-                
-                self.collection.add(
-                    documents=batch_docs,
-                    metadatas=batch_metas,
-                    ids=batch_ids
-                )
+            # Documents are built and added a batch at a time, so only the
+            # batches in flight are ever held as Python objects
+            seen = set()
+            self._add_batches(self._new_batches(df, stored, seen))
+            
+            if stored is not None:
+                self._delete_ids(list(stored.difference(seen)))
+                self._update_metadata(data_fingerprint=fingerprint)
+                self._clear_search_cache()
+            
+            self._count = len(df)
             
-            st.success(f"✅ Added {len(documents)} transactions to vector database")
+            if notify:
+                st.success(f"✅ Added {len(df)} transactions to vector database")
             return True
             
         except Exception as e:
-            st.error(f"❌ Error adding transactions to vector store: {str(e)}")
+            if notify:
+                st.error(f"❌ Error adding transactions to vector store: {str(e)}")
             return False
     
-    def _create_document_text(self, row: pd.Series) -> str:
-        """Create a searchable text representation of a transaction."""
-        date_str = row['date'].strftime('%Y-%m-%d %B')
-        amount_str = f"${abs(row['amount']):.2f}"
-        category = row.get('category', 'Other')
-        description = str(row['description'])
-        
-        # Create comprehensive text for better semantic search
-        doc_text = f"""
-        Transaction on {date_str}
-        Amount: {amount_str}
-        Category: {category}
-        Description: {description}
-        Type: {'expense' if row['amount'] < 0 else 'income'}
-        """
+    def add_transactions_in_background(self, df: pd.DataFrame, executor: Executor) -> Future:
+        """Index transactions on a worker thread so the UI can render meanwhile."""
+        self.ingest_future = executor.submit(self._add_transactions_serially, df)
+        return self.ingest_future
+    
+    def _add_transactions_serially(self, df: pd.DataFrame) -> bool:
+        """add_transactions for a worker thread, after any earlier ingest has finished."""
+        with self._ingest_lock:
+            return self.add_transactions(df, notify=False)
+    
+    def is_ready(self) -> bool:
+        """Whether any background ingestion has finished."""
+        return self.ingest_future is None or self.ingest_future.done()
+    
+    def _reset_collection(self, n_documents: int, fingerprint: str = ""):
+        """Drop and recreate the collection to remove all stored transactions."""
+        self.client.delete_collection(self.collection_name)
+        self.collection = self.client.create_collection(
+            name=self.collection_name,
+            metadata={**self._index_metadata(n_documents), "data_fingerprint": fingerprint},
+            embedding_function=self.embedding_function
+        )
+        self._count = 0
+        self._clear_search_cache()
+    
+    def _delete_ids(self, ids: List[str]):
+        """Remove stored transactions by ID, in batches the client accepts."""
+        batch_size = self._max_batch_size()
+        for i in range(0, len(ids), batch_size):
+            self.collection.delete(ids=ids[i:i+batch_size])
+    
+    def _update_metadata(self, **fields: Any):
+        """Set collection metadata fields, keeping the rest (HNSW settings can't be modified)."""
+        metadata = {
+            key: value for key, value in (self.collection.metadata or {}).items()
+            if not key.startswith("hnsw:")
+        }
+        self.collection.modify(metadata={**metadata, **fields})
+    
+    def drop(self):
+        """Delete this store's collection and everything in it."""
+        if self._release is not None:
+            self._release()  # A no-op once the collection has been deleted
+        self.collection = None
+        self._count = 0
+        self._clear_search_cache()
+    
+    def _data_fingerprint(self, df: pd.DataFrame) -> str:
+        """Content hash of a transactions frame, used as the ingestion idempotency key."""
+        return pandas_fingerprint(df)
+    
+    def _holds_data(self, fingerprint: str, n_documents: int) -> bool:
+        """Whether the collection was fully built from data with this fingerprint."""
+        stored = (self.collection.metadata or {}).get("data_fingerprint")
+        return stored == fingerprint and self.refresh_count() == n_documents
+    
+    def refresh_count(self) -> int:
+        """Re-read the stored transaction count, e.g. after adding to the collection directly."""
+        self._count = self.collection.count() if self.collection is not None else 0
+        return self._count
+    
+    def _clear_search_cache(self):
+        """Forget cached search results after the stored transactions change."""
+        self._search_cache.clear()
+        self._recent_searches.clear()
+    
+    def _index_metadata(self, n_documents: int) -> Dict[str, Any]:
+        """Collection metadata with HNSW parameters sized to the corpus."""
+        # Chroma always serves queries from an HNSW graph; search breadth grows
+        # with sqrt(N) much like nprobe for an IVF index, within sane bounds
+        search_ef = int(min(100, max(20, np.sqrt(n_documents))))
+        
+        # Years of history need a denser graph to keep recall up at the same search breadth
+        large_corpus = n_documents > self.large_corpus_threshold
+        
+        return {
+            "description": "Financial transaction embeddings",
+            "hnsw:space": "cosine",
+            "hnsw:M": 32 if large_corpus else 16,
+            "hnsw:construction_ef": 200 if large_corpus else 100,
+            "hnsw:search_ef": search_ef
+        }
+    
+    def _ingest_batch_size(self) -> int:
+        """Rows per ingest batch: small batches to spread over threads, else as few calls as allowed."""
+        if self.parallel_ingest and self.max_ingest_workers > 1:
+            return min(self.ingest_batch_size, self._max_batch_size())
+        # Serial path: the embedding function sees large batches instead of 100 rows at a time
+        return self._max_batch_size()
+    
+    def _iter_batches(self, df: pd.DataFrame) -> Iterator[Tuple[List[str], List[Dict[str, Any]], List[str], List[str]]]:
+        """(documents, metadatas, ids, content hashes) for consecutive slices of df."""
+        batch_size = self._ingest_batch_size()
+        occurrences = Counter()
+        
+        for start in range(0, len(df), batch_size):
+            chunk = df.iloc[start:start + batch_size]
+            documents = self._create_document_texts(chunk)
+            
+            # Content hashes key the embedding cache and double as deterministic IDs;
+            # repeats of an identical transaction get an occurrence suffix
+            keys = [hashlib.sha256(text.encode()).hexdigest() for text in documents]
+            ids = []
+            for key in keys:
+                k = occurrences[key]
+                occurrences[key] += 1
+                ids.append(key if k == 0 else f"{key}-{k}")
+            
+            yield documents, self._create_metadatas(chunk), ids, keys
+    
+    def _new_batches(self, df: pd.DataFrame, stored: Optional[set], seen: set) -> Iterator[tuple]:
+        """Batches of df with already-stored IDs dropped, recording every ID in seen."""
+        for batch in self._iter_batches(df):
+            ids = batch[2]
+            seen.update(ids)
+            if not stored:
+                yield batch
+                continue
+            
+            new = [i for i, doc_id in enumerate(ids) if doc_id not in stored]
+            if new:
+                yield tuple([column[i] for i in new] for column in batch)
+    
+    def _add_batches(self, batches: Iterable[tuple]):
+        """Add (documents, metadatas, ids, keys) batches, overlapping their embedding where possible."""
+        if not self.parallel_ingest or self.max_ingest_workers <= 1:
+            for batch in batches:
+                self._add_batch(*batch)
+            return
         
-        return doc_text.strip()
+        # Keep a bounded number of batches in flight so the rest stay unbuilt
+        workers = self.max_ingest_workers
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vector-add") as executor:
+            pending = deque()
+            for batch in batches:
+                pending.append(executor.submit(self._add_batch, *batch))
+                if len(pending) >= 2 * workers:
+                    pending.popleft().result()
+            
+            # Surface the first failure, if any
+            for future in pending:
+                future.result()
+    
+    def _add_batch(self, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str], keys: List[str]):
+        """Add one batch, embedding only documents whose content hash hasn't been embedded before."""
+        with _document_embeddings_lock:
+            cached = [_document_embeddings.get(key) for key in keys]
+            for key, quantized in zip(keys, cached):
+                if quantized is not None:
+                    _document_embeddings.move_to_end(key)
+        embeddings = [None if quantized is None else _dequantize_embedding(quantized) for quantized in cached]
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            computed = self.embedding_function([documents[i] for i in missing])
+            with _document_embeddings_lock:
+                for i, embedding in zip(missing, computed):
+                    embeddings[i] = np.asarray(embedding, dtype=np.float32)
+                    _document_embeddings[keys[i]] = _quantize_embedding(embeddings[i])
+                while len(_document_embeddings) > MAX_CACHED_DOCUMENT_EMBEDDINGS:
+                    _document_embeddings.popitem(last=False)
+        
+        self.collection.upsert(embeddings=embeddings, documents=documents, metadatas=metadatas, ids=ids)
+    
+    def _max_batch_size(self) -> int:
+        """Largest batch the client accepts in a single add call."""
+        try:
+            return self.client.get_max_batch_size()
+        except Exception:
+            return 1000
+    
+    def _create_metadatas(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Per-transaction metadata, built from whole columns with the usual defaults."""
+        n = len(df)
+        columns = {
+            "date": df['date'].dt.strftime('%Y-%m-%d').tolist(),
+            "amount": df['amount'].astype(float).tolist(),
+            "category": df['category'].astype(str).tolist() if 'category' in df.columns else ['Other'] * n,
+            "description": df['description'].astype(str).tolist(),
+            "transaction_type": (
+                df['transaction_type'].astype(str).tolist() if 'transaction_type' in df.columns else ['unknown'] * n
+            ),
+            "month": df['month'].astype(int).tolist() if 'month' in df.columns else [1] * n,
+            "year": df['year'].astype(int).tolist() if 'year' in df.columns else [2023] * n
+        }
+        
+        # Zipping plain lists is much cheaper than DataFrame.to_dict('records')
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+    
+    def _create_document_texts(self, df: pd.DataFrame) -> List[str]:
+        """Create a searchable text representation of every transaction."""
+        amounts = df['amount']
+        date_str = df['date'].dt.strftime('%Y-%m-%d %B')
+        amount_str = amounts.abs().map('${:.2f}'.format)
+        category = df['category'].astype(str) if 'category' in df.columns else 'Other'
+        description = df['description'].astype(str)
+        type_str = pd.Series(np.where(amounts < 0, 'expense', 'income'), index=df.index)
+        
+        # Same comprehensive layout (and indentation) as the original per-row template
+        sep = "\n        "
+        doc_text = (
+            "Transaction on " + date_str
+            + sep + "Amount: " + amount_str
+            + sep + "Category: " + category
+            + sep + "Description: " + description
+            + sep + "Type: " + type_str
+        )
+        
+        return doc_text.tolist()
+    
+    def embed_queries(self, queries: List[str]) -> List[np.ndarray]:
+        """Unit-length query embeddings, embedding any not seen recently in a single call."""
+        keys = [self._normalize_query(query) for query in queries]
+        missing = {key: query for key, query in zip(keys, queries) if key not in self._embedding_cache}
+        
+        if missing:
+            for key, embedding in zip(missing, self.embedding_function(list(missing.values()))):
+                embedding = np.asarray(embedding, dtype=np.float32)
+                self._embedding_cache[key] = embedding / (np.linalg.norm(embedding) or 1.0)
+        
+        embeddings = []
+        for key in keys:
+            self._embedding_cache.move_to_end(key)
+            embeddings.append(self._embedding_cache[key])
+        
+        while len(self._embedding_cache) > self.max_cached_embeddings:
+            self._embedding_cache.popitem(last=False)
+        
+        return embeddings
+    
+    def _normalize_query(self, query: str) -> str:
+        """Query text with case and spacing differences removed."""
+        return ' '.join(query.lower().split())
+    
+    def _search_cache_key(self, query: str, n_results: int) -> tuple:
+        """Cache key that ignores case and spacing differences."""
+        return (self._normalize_query(query), n_results)
     
     def search_transactions(self, query: str, n_results: int = 10) -> List[Dict[str, Any]]:
         """Search for transactions using semantic similarity."""
         if self.collection is None:
             return []
         
+        # Exact repeat of a recent query (ignoring case and spacing)
+        cache_key = self._search_cache_key(query, n_results)
+        if cache_key in self._search_cache:
+            self._search_cache.move_to_end(cache_key)
+            return self._search_cache[cache_key]
+        
         try:
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=min(n_results, self.collection.count())
-            )
+            query_embedding = self.embed_queries([query])[0]
+            
+            # Near-duplicate of a recent query: reuse its results instead of searching again
+            formatted_results = self._similar_search_results(query_embedding, n_results)
             
-            # Format results
-            formatted_results = []
-            if results['documents'] and len(results['documents']) > 0:
-                for i, doc in enumerate(results['documents'][0]):
-                    result = {
-                        'document': doc,
-                        'metadata': results['metadatas'][0][i],
-                        'distance': results['distances'][0][i] if 'distances' in results else 0
-                    }
-                    formatted_results.append(result)
+            if formatted_results is None:
+                results = self.collection.query(
+                    query_embeddings=[query_embedding.tolist()],
+                    n_results=min(n_results, self._count)
+                )
+                formatted_results = self._format_results(results)
+                self._recent_searches.append((query_embedding, n_results, formatted_results))
+            
+            self._search_cache[cache_key] = formatted_results
+            if len(self._search_cache) > self.max_cached_searches:
+                self._search_cache.popitem(last=False)
             
             return formatted_results
             
@@ -143,14 +441,25 @@ class VectorStore:
             st.error(f"❌ Error searching transactions: {str(e)}")
             return []
     
+    def _similar_search_results(self, query_embedding: np.ndarray, n_results: int) -> Optional[List[Dict[str, Any]]]:
+        """Results of a recent search whose query embedding is nearly identical, if any."""
+        candidates = [entry for entry in self._recent_searches if entry[1] == n_results]
+        if not candidates:
+            return None
+        
+        similarities = np.stack([entry[0] for entry in candidates]) @ query_embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.similar_query_threshold:
+            return candidates[best][2]
+        return None
+    
     def search_by_category(self, category: str, n_results: int = 10) -> List[Dict[str, Any]]:
         """Search transactions by category."""
         if self.collection is None:
             return []
         
         try:
-            results = self.collection.query(
-                query_texts=[f"category {category} expenses"],
+            results = self._filter_results(
                 where={"category": category},
                 n_results=n_results
             )
@@ -167,8 +476,7 @@ class VectorStore:
             return []
         
         try:
-            results = self.collection.query(
-                query_texts=[f"transactions between {start_date} and {end_date}"],
+            results = self._filter_results(
                 where={
                     "$and": [
                         {"date": {"$gte": start_date}},
@@ -190,8 +498,7 @@ class VectorStore:
             return []
         
         try:
-            results = self.collection.query(
-                query_texts=[f"transactions between ${min_amount} and ${max_amount}"],
+            results = self._filter_results(
                 where={
                     "$and": [
                         {"amount": {"$gte": min_amount}},
@@ -207,6 +514,18 @@ class VectorStore:
             st.error(f"❌ Error searching by amount range: {str(e)}")
             return []
     
+    def _filter_results(self, where: Dict[str, Any], n_results: int) -> Dict[str, Any]:
+        """Transactions matching a metadata filter, shaped like a query result.
+        
+        A pure filter needs no query embedding or HNSW traversal; distances are reported as 0.
+        """
+        raw = self.collection.get(where=where, limit=n_results, include=['documents', 'metadatas'])
+        return {
+            'documents': [raw['documents']],
+            'metadatas': [raw['metadatas']],
+            'distances': [[0] * len(raw['documents'])]
+        }
+    
     def _format_results(self, results: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Format search results consistently."""
         formatted_results = []
@@ -4,7 +4,7 @@ from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 import streamlit as st
 
 class FinanceVisualizer:
@@ -15,17 +15,31 @@ class FinanceVisualizer:
             '#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FECA57',
             '#FF9FF3', '#54A0FF', '#5F27CD', '#00D2D3', '#FF9F43'
         ]
+        
+        # (dataframe, derived frame) for the last dataframe seen, swapped as one
+        # tuple so sessions sharing this instance never see a mismatched pair
+        self._monthly_cache: Optional[Tuple[pd.DataFrame, pd.DataFrame]] = None
+        self._expense_cache: Optional[Tuple[pd.DataFrame, pd.DataFrame]] = None
+        
+        # Passed to the Figure constructor: applying a template with update_layout
+        # after the traces are added costs noticeably more per chart
+        self._base_layout = {'template': 'plotly_white', 'height': 400}
     
     def create_monthly_trend(self, df: pd.DataFrame) -> go.Figure:
         """Create a monthly spending trend chart."""
-        # Group by month and calculate spending
-        monthly_data = df.groupby('month_year').agg({
-            'amount': lambda x: x[x < 0].sum() * -1  # Convert negative to positive for expenses
-        }).reset_index()
+        if self._lacks_data(df, 'month_year'):
+            return go.Figure()
+        
+        # Monthly spending (expenses as positive amounts)
+        monthly_data = self._monthly_totals(df)['Expenses'].rename('amount').reset_index()
         
         monthly_data['month_year_str'] = monthly_data['month_year'].astype(str)
         
-        fig = go.Figure()
+        fig = go.Figure(layout=self._layout(
+            title='Monthly Spending Trend',
+            xaxis_title='Month',
+            yaxis_title='Amount ($)'
+        ))
         
         fig.add_trace(go.Scatter(
             x=monthly_data['month_year_str'],
@@ -36,53 +50,78 @@ class FinanceVisualizer:
             marker=dict(size=8)
         ))
         
-        fig.update_layout(
-            title='Monthly Spending Trend',
-            xaxis_title='Month',
-            yaxis_title='Amount ($)',
-            template='plotly_white',
-            height=400
-        )
-        
         return fig
     
+    def _layout(self, **layout: Any) -> Dict[str, Any]:
+        """Figure layout on the shared base (template and default height)."""
+        return {**self._base_layout, **layout}
+    
+    def _lacks_data(self, df: pd.DataFrame, *columns: str) -> bool:
+        """Whether df is empty or missing 'amount' or any of the given columns."""
+        return df.empty or 'amount' not in df.columns or any(column not in df.columns for column in columns)
+    
+    def _expenses(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Expense rows with a positive 'abs_amount' column, selected once per dataframe."""
+        # Holding a reference to the dataframe keeps its identity from being reused
+        cached = self._expense_cache
+        if cached is not None and cached[0] is df:
+            return cached[1]
+        
+        amounts = df['amount'].to_numpy()
+        mask = amounts < 0
+        expenses = df[mask].assign(abs_amount=-amounts[mask])
+        
+        self._expense_cache = (df, expenses)
+        return expenses
+    
+    def _monthly_totals(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Expenses (as positive amounts) and income per month_year, computed once per dataframe."""
+        # Holding a reference to the dataframe keeps its identity from being reused
+        cached = self._monthly_cache
+        if cached is not None and cached[0] is df:
+            return cached[1]
+        
+        # Split amounts into two masked columns so one plain groupby sum covers both
+        amounts = df['amount']
+        monthly = pd.DataFrame({
+            'Expenses': -amounts.where(amounts < 0, 0),
+            'Income': amounts.where(amounts > 0, 0)
+        }).groupby(df['month_year'], observed=True).sum()
+        
+        self._monthly_cache = (df, monthly)
+        return monthly
+    
     def create_category_pie_chart(self, df: pd.DataFrame) -> go.Figure:
         """Create a pie chart for spending by category."""
-        if 'category' not in df.columns:
+        if self._lacks_data(df, 'category'):
             return go.Figure()
         
         # Calculate spending by category (only expenses)
-        category_spending = df[df['amount'] < 0].groupby('category')['amount'].sum().abs()
+        category_spending = self._expenses(df).groupby('category', observed=True)['abs_amount'].sum()
         
         fig = go.Figure(data=[go.Pie(
             labels=category_spending.index,
             values=category_spending.values,
             hole=0.3,
             marker_colors=self.color_palette[:len(category_spending)]
-        )])
-        
-        fig.update_layout(
-            title='Spending Distribution by Category',
-            template='plotly_white',
-            height=400
-        )
+        )], layout=self._layout(title='Spending Distribution by Category'))
         
         return fig
     
     def create_spending_vs_income_chart(self, df: pd.DataFrame) -> go.Figure:
         """Create a chart comparing monthly spending vs income."""
-        monthly_data = df.groupby('month_year').agg({
-            'amount': [
-                lambda x: x[x < 0].sum() * -1,  # Expenses (positive)
-                lambda x: x[x > 0].sum()        # Income
-            ]
-        })
+        if self._lacks_data(df, 'month_year'):
+            return go.Figure()
         
-        monthly_data.columns = ['Expenses', 'Income']
-        monthly_data = monthly_data.reset_index()
+        monthly_data = self._monthly_totals(df).reset_index()
         monthly_data['month_year_str'] = monthly_data['month_year'].astype(str)
         
-        fig = go.Figure()
+        fig = go.Figure(layout=self._layout(
+            title='Monthly Income vs Expenses',
+            xaxis_title='Month',
+            yaxis_title='Amount ($)',
+            barmode='group'
+        ))
         
         fig.add_trace(go.Bar(
             x=monthly_data['month_year_str'],
@@ -98,26 +137,20 @@ class FinanceVisualizer:
             marker_color='#FF6B6B'
         ))
         
-        fig.update_layout(
-            title='Monthly Income vs Expenses',
-            xaxis_title='Month',
-            yaxis_title='Amount ($)',
-            barmode='group',
-            template='plotly_white',
-            height=400
-        )
-        
         return fig
     
     def create_daily_spending_heatmap(self, df: pd.DataFrame) -> go.Figure:
         """Create a heatmap showing spending patterns by day of week and hour."""
-        # Add day of week and hour columns
-        df_copy = df.copy()
-        df_copy['day_of_week'] = df_copy['date'].dt.day_name()
-        df_copy['day_num'] = df_copy['date'].dt.dayofweek
+        if self._lacks_data(df, 'date'):
+            return go.Figure()
+        
+        # Day of week keys for the expense rows only, as local series (no copy of the frame)
+        expenses = self._expenses(df)
+        day_of_week = expenses['date'].dt.day_name().rename('day_of_week')
+        day_num = expenses['date'].dt.dayofweek.rename('day_num')
         
         # Calculate daily spending
-        daily_spending = df_copy[df_copy['amount'] < 0].groupby(['day_num', 'day_of_week'])['amount'].sum().abs().reset_index()
+        daily_spending = expenses['abs_amount'].rename('amount').groupby([day_num, day_of_week]).sum().reset_index()
         
         # Create pivot table for heatmap
         days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
@@ -126,40 +159,51 @@ class FinanceVisualizer:
             x=daily_spending['day_of_week'],
             y=daily_spending['amount'],
             marker_color=self.color_palette[0]
-        ))
-        
-        fig.update_layout(
+        ), layout=self._layout(
             title='Spending by Day of Week',
             xaxis_title='Day',
-            yaxis_title='Total Spending ($)',
-            template='plotly_white',
-            height=400
-        )
+            yaxis_title='Total Spending ($)'
+        ))
         
         return fig
     
     def create_transaction_timeline(self, df: pd.DataFrame, category: str = None) -> go.Figure:
         """Create a timeline of transactions."""
-        df_filtered = df.copy()
+        if self._lacks_data(df, 'date', 'description'):
+            return go.Figure()
+        
+        df_filtered = df
         
         if category:
             df_filtered = df_filtered[df_filtered['category'] == category]
         
-        # Sort by date
+        # Sort by date (returns a new frame, so the caller's data is untouched)
         df_filtered = df_filtered.sort_values('date')
         
-        # Create different colors for income vs expenses
-        colors = ['green' if x > 0 else 'red' for x in df_filtered['amount']]
+        # Create different colors for income vs expenses, and marker sizes from one abs() pass
+        amounts = df_filtered['amount'].to_numpy(dtype=float)
+        colors = np.where(amounts > 0, 'green', 'red')
+        sizes = np.abs(amounts)
+        if sizes.size:
+            # All-zero amounts get the base size instead of NaN
+            sizes *= 20 / (sizes.max() or 1.0)
+            sizes += 5
         
-        fig = go.Figure()
+        fig = go.Figure(layout=self._layout(
+            title=f'Transaction Timeline{" - " + category if category else ""}',
+            xaxis_title='Date',
+            yaxis_title='Amount ($)',
+            height=500
+        ))
         
-        fig.add_trace(go.Scatter(
+        # One marker per transaction, so draw with WebGL to stay responsive on long histories
+        fig.add_trace(go.Scattergl(
             x=df_filtered['date'],
             y=df_filtered['amount'],
             mode='markers',
             marker=dict(
                 color=colors,
-                size=abs(df_filtered['amount']) / df_filtered['amount'].abs().max() * 20 + 5,
+                size=sizes,
                 opacity=0.7
             ),
             text=df_filtered['description'],
@@ -167,43 +211,24 @@ class FinanceVisualizer:
             name='Transactions'
         ))
         
-        fig.update_layout(
-            title=f'Transaction Timeline{" - " + category if category else ""}',
-            xaxis_title='Date',
-            yaxis_title='Amount ($)',
-            template='plotly_white',
-            height=500
-        )
-        
         return fig
     
     def create_spending_breakdown_sunburst(self, df: pd.DataFrame) -> go.Figure:
         """Create a sunburst chart for hierarchical spending breakdown."""
-        if 'category' not in df.columns:
+        if self._lacks_data(df, 'category'):
             return go.Figure()
         
-        # Prepare data for sunburst
-        spending_data = df[df['amount'] < 0].copy()
-        spending_data['amount'] = spending_data['amount'].abs()
-        
-        # Create hierarchical structure
-        sunburst_data = []
+        # Prepare data for sunburst: expense totals per category, in order of first appearance
+        expenses = self._expenses(df)
+        category_spending = expenses.groupby('category', observed=True, sort=False)['abs_amount'].sum()
         
-        # Add root
-        total_spending = spending_data['amount'].sum()
-        
-        # Add categories
-        for category in spending_data['category'].unique():
-            category_amount = spending_data[spending_data['category'] == category]['amount'].sum()
-            sunburst_data.append({
-                'ids': category,
-                'labels': category,
-                'parents': '',
-                'values': category_amount
-            })
-        
-        # Convert to DataFrame for plotly
-        sunburst_df = pd.DataFrame(sunburst_data)
+        # One ring of categories under the root
+        sunburst_df = pd.DataFrame({
+            'ids': category_spending.index,
+            'labels': category_spending.index,
+            'parents': '',
+            'values': category_spending.to_numpy()
+        })
         
         fig = go.Figure(go.Sunburst(
             ids=sunburst_df['ids'],
@@ -212,13 +237,10 @@ class FinanceVisualizer:
             values=sunburst_df['values'],
             branchvalues="total",
             marker=dict(colors=self.color_palette)
-        ))
-        
-        fig.update_layout(
+        ), layout=self._layout(
             title='Spending Breakdown',
-            template='plotly_white',
             height=500
-        )
+        ))
         
         return fig
     
@@ -228,14 +250,19 @@ class FinanceVisualizer:
             return go.Figure()
         
         # Calculate actual spending by category
-        actual_spending = df[df['amount'] < 0].groupby('category')['amount'].sum().abs()
+        actual_spending = self._expenses(df).groupby('category', observed=True)['abs_amount'].sum()
         
         # Prepare data for comparison
         categories = list(set(actual_spending.index) | set(budget_dict.keys()))
         actual_values = [actual_spending.get(cat, 0) for cat in categories]
         budget_values = [budget_dict.get(cat, 0) for cat in categories]
         
-        fig = go.Figure()
+        fig = go.Figure(layout=self._layout(
+            title='Budget vs Actual Spending',
+            xaxis_title='Category',
+            yaxis_title='Amount ($)',
+            barmode='group'
+        ))
         
         fig.add_trace(go.Bar(
             x=categories,
@@ -252,15 +279,6 @@ class FinanceVisualizer:
             marker_color='#FF6B6B'
         ))
         
-        fig.update_layout(
-            title='Budget vs Actual Spending',
-            xaxis_title='Category',
-            yaxis_title='Amount ($)',
-            barmode='group',
-            template='plotly_white',
-            height=400
-        )
-        
         return fig
     
     def generate_insights(self, df: pd.DataFrame) -> Dict[str, List[str]]:
@@ -274,19 +292,25 @@ class FinanceVisualizer:
         if len(df) == 0:
             return insights
         
+        # Expense rows, shared by the insights below
+        expenses = self._expenses(df)
+        
         # Spending insights
         if 'category' in df.columns:
-            top_category = df[df['amount'] < 0].groupby('category')['amount'].sum().abs().idxmax()
-            top_amount = df[df['amount'] < 0].groupby('category')['amount'].sum().abs().max()
+            category_spending = expenses.groupby('category', observed=True)['abs_amount'].sum()
+            top = category_spending.to_numpy().argmax()
+            top_category, top_amount = category_spending.index[top], category_spending.iloc[top]
             insights['spending'].append(f"Your highest spending category is {top_category} with ${top_amount:.2f}")
             
             # Average transaction size
-            avg_expense = df[df['amount'] < 0]['amount'].abs().mean()
+            avg_expense = expenses['abs_amount'].mean()
             insights['spending'].append(f"Your average expense transaction is ${avg_expense:.2f}")
         
         # Trend insights
         if 'month_year' in df.columns:
-            monthly_spending = df[df['amount'] < 0].groupby('month_year')['amount'].sum().abs()
+            # Months with any expense, as before
+            monthly_expenses = self._monthly_totals(df)['Expenses']
+            monthly_spending = monthly_expenses[monthly_expenses > 0]
             if len(monthly_spending) >= 2:
                 trend_change = monthly_spending.iloc[-1] - monthly_spending.iloc[-2]
                 if trend_change > 0:
@@ -296,7 +320,7 @@ class FinanceVisualizer:
         
         # Day of week patterns
         if 'day_of_week' in df.columns:
-            daily_spending = df[df['amount'] < 0].groupby('day_of_week')['amount'].sum().abs()
+            daily_spending = expenses.groupby('day_of_week')['abs_amount'].sum()
             highest_day = daily_spending.idxmax()
             insights['trends'].append(f"You tend to spend the most on {highest_day}s")
         